@@ -0,0 +1,167 @@
+"""Headless HTTP API for persona analysis, alongside the Streamlit UI.
+
+Analyses run on the same background job pool the UI uses, so JOB_WORKERS
+bounds how many run at once and JOB_MAX_QUEUED how many may wait; beyond
+that submissions get 429 with Retry-After. Concurrent requests for the same
+analysis share one job. Jobs live in this process, so run a single worker:
+
+    python api.py
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+    POST /analyses                    {"username": "kojied"} -> 202 {"job_id": ...}
+    GET  /analyses/{job_id}           status and progress
+    GET  /analyses/{job_id}/result    persona once done (202 while running)
+    GET  /analyses/{job_id}/stream    NDJSON progress, persona fields and the result as they happen
+    GET  /analyses/{job_id}/report    rendered report (?format=txt|md|html|json)
+"""
+import re
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from core.config import config
+from core.reddit_scraper import RedditScraper
+from core.llm_utils import PersonaAnalyzer
+from core.jobs import jobs, Job, QueueFull, DONE, ERROR
+from core.pipeline import run_analysis, analysis_key
+from core.metrics import start_metrics_server
+from core.clients import warm_up_in_background
+from utils.file_handler import FileHandler
+from utils.report_renderer import FORMATS, report_cache
+
+USERNAME_RE = re.compile(r'^[A-Za-z0-9_-]{3,20}$')
+MAX_ITEMS, MAX_DEEP_ITEMS = 50, 1000  # same limits as the UI sliders
+RETRY_AFTER_SECONDS = 10  # suggested back-off when the queue is full
+
+class AnalysisRequest(BaseModel):
+    username: str = Field(description="Reddit username or profile URL")
+    posts_limit: int = Field(config.MAX_POSTS, ge=1, le=MAX_DEEP_ITEMS)
+    comments_limit: int = Field(config.MAX_COMMENTS, ge=1, le=MAX_DEEP_ITEMS)
+    deep_analysis: bool = False
+    incremental: Optional[bool] = None  # default: INCREMENTAL_UPDATES
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config.validate()
+    start_metrics_server(config.METRICS_PORT)
+    if config.WARM_UP_CLIENTS:
+        warm_up_in_background()
+    app.state.services = RedditScraper(), PersonaAnalyzer(), FileHandler(config.PERSONA_DIR)
+    yield
+
+app = FastAPI(title="Reddit Persona Analyzer API", lifespan=lifespan)
+
+def get_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown or expired job: {job_id}")
+    return job
+
+def status_body(state: Dict) -> Dict:
+    return {key: state[key] for key in ('id', 'status', 'progress', 'message', 'error')}
+
+def result_body(result: Dict, include_raw: bool = False) -> Dict:
+    body = {
+        'username': result['username'],
+        'persona': result['persona'],
+        'user_info': result['user_data']['user_info'],
+        'filepath': result['filepath'],
+        'save_error': result['save_error']
+    }
+    if include_raw:
+        body['user_data'] = result['user_data']
+    return body
+
+@app.post('/analyses', status_code=202)
+async def submit_analysis(request: AnalysisRequest, http_request: Request, response: Response):
+    scraper, analyzer, file_handler = http_request.app.state.services
+    value = request.username.strip()
+    username = scraper.extract_username(value) or re.sub(r'^/?u(ser)?/', '', value).strip('/')
+    if not USERNAME_RE.match(username):
+        raise HTTPException(422, f"Invalid Reddit username: {request.username}")
+    max_items = MAX_DEEP_ITEMS if request.deep_analysis else MAX_ITEMS
+    if max(request.posts_limit, request.comments_limit) > max_items:
+        raise HTTPException(422, f"At most {max_items} posts and comments each without deep_analysis")
+
+    key = analysis_key(username, request.posts_limit, request.comments_limit, request.deep_analysis,
+                       request.incremental)
+    try:
+        job_id, created = jobs.submit_once(
+            key, run_analysis, username, request.posts_limit, request.comments_limit, request.deep_analysis,
+            scraper, analyzer, file_handler, incremental=request.incremental
+        )
+    except QueueFull as e:
+        return JSONResponse({'detail': str(e)}, status_code=429,
+                            headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+    response.headers['Location'] = f"/analyses/{job_id}"
+    return {
+        'job_id': job_id,
+        'username': username,
+        'deduplicated': not created,
+        'status_url': f"/analyses/{job_id}",
+        'result_url': f"/analyses/{job_id}/result",
+        'stream_url': f"/analyses/{job_id}/stream"
+    }
+
+@app.get('/analyses/{job_id}')
+async def analysis_status(job_id: str):
+    return status_body(get_job(job_id).snapshot())
+
+@app.get('/analyses/{job_id}/result')
+async def analysis_result(job_id: str, include_raw: bool = False):
+    state = get_job(job_id).snapshot()
+    if state['status'] == ERROR:
+        raise HTTPException(500, state['error'])
+    if state['status'] != DONE:
+        return JSONResponse(status_body(state), status_code=202,
+                            headers={'Retry-After': str(max(1, round(config.JOB_POLL_INTERVAL)))})
+    return result_body(state['result'], include_raw)
+
+@app.get('/analyses/{job_id}/stream')
+async def stream_analysis(job_id: str):
+    """One JSON object per line: progress updates, persona fields as the LLM streams them, then the result"""
+    job = get_job(job_id)
+
+    async def events():
+        last, fields_sent = None, 0
+        while True:
+            state = job.snapshot()
+            progress = (state['status'], state['progress'], state['message'])
+            if progress != last:
+                last = progress
+                yield json.dumps({'event': 'progress', **status_body(state)}) + "\n"
+            for key, value in state['fields'][fields_sent:]:
+                yield json.dumps({'event': 'field', 'key': key, 'value': value}, ensure_ascii=False) + "\n"
+            fields_sent = len(state['fields'])
+            if state['status'] == DONE:
+                yield json.dumps({'event': 'result', **result_body(state['result'])}, ensure_ascii=False) + "\n"
+                return
+            if state['status'] == ERROR:
+                yield json.dumps({'event': 'error', 'error': state['error']}) + "\n"
+                return
+            await asyncio.sleep(config.API_STREAM_INTERVAL)
+
+    return StreamingResponse(events(), media_type='application/x-ndjson')
+
+@app.get('/analyses/{job_id}/report')
+def analysis_report(job_id: str, format: str = 'txt'):
+    if format not in FORMATS:
+        raise HTTPException(422, f"Unknown report format: {format} (one of {', '.join(FORMATS)})")
+    state = get_job(job_id).snapshot()
+    if state['status'] != DONE:
+        raise HTTPException(409, f"Analysis is {state['status']}, no report yet")
+    result = state['result']
+    report = report_cache.get(result['username'], result['persona'], result['user_data'])
+    return Response(report.render(format), media_type=report.mime(format),
+                    headers={'Content-Disposition': f'attachment; filename="{report.filename(format)}"'})
+
+@app.get('/health')
+async def health():
+    return {'status': 'ok', **jobs.queue_depth()}
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=config.API_HOST, port=config.API_PORT)
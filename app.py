@@ -1,10 +1,16 @@
 import streamlit as st
-import os
+import time
 from core.config import config
 from core.reddit_scraper import RedditScraper
 from core.llm_utils import PersonaAnalyzer
 from utils.file_handler import FileHandler
 from utils.persona_render import PersonaRenderer 
+from utils.report_renderer import FORMATS, report_cache
+from core.metrics import start_metrics_server
+from core.jobs import jobs, QueueFull, DONE, ERROR
+from core.pipeline import run_analysis, analysis_key
+from core.clients import warm_up_in_background
+from core.persona_update import describe_changes
 
 # Page config
 st.set_page_config(
@@ -13,6 +19,16 @@ st.set_page_config(
     layout="wide"
 )
 
+# Expose /metrics once per process (Streamlit reruns this script on every interaction)
+start_metrics_server(config.METRICS_PORT)
+
+@st.cache_resource
+def get_services():
+    """Scraper, analyzer, file handler and renderer shared by every session and rerun"""
+    if config.WARM_UP_CLIENTS:
+        warm_up_in_background()
+    return RedditScraper(), PersonaAnalyzer(), FileHandler(), PersonaRenderer()
+
 def main():
     st.title("🔍 Reddit User Persona Analyzer")
     st.markdown("**BeyondChats AI/LLM Engineer Assignment**")
@@ -31,6 +47,7 @@ def main():
     try:
         config.validate()
         st.sidebar.success("✅ Configuration valid")
+        get_services()  # builds (and warms up) the shared clients on the first page load
     except ValueError as e:
         st.sidebar.error(f"❌ {e}")
         st.error("Please set up environment variables first!")
@@ -51,22 +68,28 @@ def main():
     )
     
     # Settings
+    deep_analysis = st.checkbox(
+        "Deep analysis (full history)",
+        help="Summarize the whole history in parallel chunks and merge the results"
+    )
+    incremental = st.checkbox(
+        "Update previous persona",
+        value=config.INCREMENTAL_UPDATES,
+        help="Revise the last saved persona with activity since then instead of analyzing from scratch"
+    )
+    max_items = 1000 if deep_analysis else 50
     col1, col2 = st.columns(2)
     with col1:
-        posts_limit = st.slider("Posts to analyze", 10, 50, 25)
+        posts_limit = st.slider("Posts to analyze", 10, max_items, 25)
     with col2:
-        comments_limit = st.slider("Comments to analyze", 10, 50, 25)
+        comments_limit = st.slider("Comments to analyze", 10, max_items, 25)
     
     if st.button("🚀 Analyze Profile", type="primary"):
         if not profile_url:
             st.error("Please enter a Reddit profile URL")
             return
         
-        # Initialize services
-        scraper = RedditScraper()
-        analyzer = PersonaAnalyzer()
-        file_handler = FileHandler()
-        renderer = PersonaRenderer()
+        scraper, analyzer, file_handler, renderer = get_services()
         
         # Extract username
         username = scraper.extract_username(profile_url)
@@ -74,116 +97,171 @@ def main():
             st.error("Invalid Reddit profile URL")
             return
         
-        # Progress
-        progress = st.progress(0)
-        status = st.empty()
-        
+        # Run the analysis on a background worker; this session only polls its job.
+        # Sessions (and API clients) asking for the same analysis at once share one job.
         try:
-            # Step 1: Scrape data
-            status.text("🔍 Scraping Reddit data...")
-            progress.progress(25)
-            
-            config.MAX_POSTS = posts_limit
-            config.MAX_COMMENTS = comments_limit
-            user_data = scraper.get_user_data(username)
-            file_handler.save_raw_user_data(username, user_data)
-            
-            # Step 2: Show summary
-            progress.progress(50)
-            status.text("📊 Processing data...")
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Posts", len(user_data['posts']))
-            with col2:
-                st.metric("Comments", len(user_data['comments']))
-            with col3:
-                st.metric("Total Karma", user_data['user_info']['comment_karma'] + user_data['user_info']['link_karma'])
-            
-            # Step 3: Analyze
-            progress.progress(75)
-            status.text("🧠 Analyzing persona...")
-            
-            persona_data = analyzer.analyze_persona(user_data)
-            
-            # Step 4: Save and display
-            progress.progress(100)
-            status.text("✅ Complete!")
+            st.session_state['job_id'], _ = jobs.submit_once(
+                analysis_key(username, posts_limit, comments_limit, deep_analysis, incremental),
+                run_analysis, username, posts_limit, comments_limit, deep_analysis, scraper, analyzer, file_handler,
+                incremental=incremental
+            )
+        except QueueFull:
+            st.error("⏳ Too many analyses are queued right now, please try again in a minute")
+            return
+        st.session_state.pop('analysis', None)
+    
+    job_id = st.session_state.get('job_id')
+    job = jobs.get(job_id) if job_id else None
+    if job is not None:
+        state = job.snapshot()
+        if state['status'] == DONE:
+            # Keep the result in the session so later reruns (e.g. downloads) still show it
+            st.session_state['analysis'] = state['result']
+            del st.session_state['job_id']
+        elif state['status'] == ERROR:
+            st.error(f"❌ Error: {state['error']}")
+            return
+        else:
+            show_progress(state)
+            time.sleep(config.JOB_POLL_INTERVAL)
+            st.rerun()
+    
+    if 'analysis' in st.session_state:
+        show_results(st.session_state['analysis'])
 
-            if persona_data.get('metadata', {}).get('is_json', False):
-                st.success("✅ Generated visual persona card!")
-                
-                # Render the visual persona card (DISABLED)
-                renderer.render_lucas_style_persona(persona_data)
+def show_progress(state: dict):
+    _, _, _, renderer = get_services()
+    st.progress(state['progress'])
+    st.text(state['message'])
+    
+    # Fill in the card with the persona fields streamed so far
+    card = renderer.create_progressive_card()
+    for key, value in state['fields']:
+        card.update(key, value)
 
-                # Show raw JSON data in expandable section
-                with st.expander("📊 Raw JSON Data"):
-                    st.json(persona_data)
-    
-                
-                citations = persona_data.get('citations', [])
-                if citations:
-                    with st.expander("📚 Supporting Evidence"):
-                        for i, citation in enumerate(citations, 1):
-                            st.write(f"**{i}.** {citation}")
+def show_results(result: dict):
+    _, _, _, renderer = get_services()
+    user_data = result['user_data']
+    persona_data = result['persona']
+    filepath = result['filepath']
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Posts", len(user_data['posts']))
+    with col2:
+        st.metric("Comments", len(user_data['comments']))
+    with col3:
+        st.metric("Total Karma", user_data['user_info']['comment_karma'] + user_data['user_info']['link_karma'])
+    
+    if persona_data.get('metadata', {}).get('is_json', False):
+        st.success("✅ Generated visual persona card!")
+        
+        # Render the visual persona card
+        renderer.render_lucas_style_persona(persona_data)
 
-                with st.expander("ℹ️ Analysis Metadata"):
-                    metadata = persona_data.get('metadata', {})
-                    st.write(f"**Model:** {metadata.get('model_used', 'Unknown')}")
-                    st.write(f"**Timestamp:** {metadata.get('timestamp', 'Unknown')}")
-                    st.write(f"**Posts Analyzed:** {metadata.get('posts_analyzed', 0)}")
-                    st.write(f"**Comments Analyzed:** {metadata.get('comments_analyzed', 0)}")
-                    
-                    top_subreddits = metadata.get('top_subreddits', [])
-                    if top_subreddits:
-                        st.write("**Top Subreddits:**")
-                        for sub, count in top_subreddits:
-                            st.write(f"- r/{sub} ({count} posts/comments)")
-                            
-            else:
-                # Fallback to text display
-                st.warning("⚠️ Got text response instead of JSON, showing text analysis:")
-                st.header("📋 Persona Analysis")
-                st.write(persona_data.get('analysis', 'No analysis available'))
-            
-            
-            # Save file
-            filepath = file_handler.save_persona(username, persona_data, user_data)
-            
-            # Display results
-            st.header("📋 Persona Analysis")
-            st.write(persona_data.get('analysis', 'No analysis available'))
-            
-            # Download button
-            with open(filepath, 'r', encoding='utf-8') as f:
-                st.download_button(
-                    label="📥 Download Report",
-                    data=f.read(),
-                    file_name=os.path.basename(filepath),
-                    mime="text/plain"
-                )
-            
-            # Show sample data
-            with st.expander("📝 Sample Posts"):
-                for i, post in enumerate(user_data['posts'][:3], 1):
-                    st.write(f"**{i}. {post['title']}**")
-                    st.write(f"r/{post['subreddit']} | Score: {post['score']}")
-                    if post['selftext']:
-                        st.write(post['selftext'][:200] + "...")
-                    st.divider()
-            
-            with st.expander("💬 Sample Comments"):
-                for i, comment in enumerate(user_data['comments'][:3], 1):
-                    st.write(f"**{i}. r/{comment['subreddit']}** (Score: {comment['score']})")
-                    st.write(comment['body'][:200] + "...")
-                    st.divider()
-            
-            st.success(f"✅ Analysis saved to: {filepath}")
+        # Show raw JSON data in expandable section
+        with st.expander("📊 Raw JSON Data"):
+            st.json(persona_data)
+
+        
+        citations = persona_data.get('citations', [])
+        grounded = persona_data.get('metadata', {}).get('citations')
+        if citations:
+            with st.expander("📚 Supporting Evidence"):
+                for i, citation in enumerate(grounded or citations, 1):
+                    if isinstance(citation, str):
+                        st.write(f"**{i}.** {citation}")
+                    elif citation['verified']:
+                        st.write(f"**{i}.** {citation['citation']}")
+                        st.caption(f"✅ [{citation['kind']} in r/{citation['subreddit']}]({citation['permalink']})"
+                                   f" · match {citation['confidence']:.0%}")
+                    else:
+                        st.write(f"**{i}.** {citation['citation']}")
+                        st.caption(f"⚠️ Not found in the scraped content (best match {citation['confidence']:.0%})")
+
+        activity = persona_data.get('metadata', {}).get('activity')
+        if activity:
+            with st.expander("📈 Activity Profile"):
+                renderer.render_activity(activity)
+
+        metadata = persona_data.get('metadata', {})
+        if metadata.get('unchanged'):
+            st.info("ℹ️ No new activity since the last analysis, showing the saved persona.")
+        elif metadata.get('mode') == 'update':
+            with st.expander(f"🔄 Changes Since {metadata.get('based_on', 'Last Version')[:10]}"):
+                st.write(f"Revised with {metadata['delta_posts']} new posts and "
+                         f"{metadata['delta_comments']} new comments.")
+                for line in describe_changes(metadata.get('changes', {})) or ["No changes to the persona."]:
+                    st.write(f"- {line}")
+
+        with st.expander("ℹ️ Analysis Metadata"):
+            st.write(f"**Model:** {metadata.get('model_used', 'Unknown')}")
+            st.write(f"**Timestamp:** {metadata.get('timestamp', 'Unknown')}")
+            if metadata.get('version'):
+                st.write(f"**Version:** {metadata['version']}")
+            st.write(f"**Posts Analyzed:** {metadata.get('posts_analyzed', 0)}")
+            st.write(f"**Comments Analyzed:** {metadata.get('comments_analyzed', 0)}")
+            filtering = metadata.get('evidence', {}).get('filtering') or metadata.get('filtering')
+            if filtering:
+                st.write(f"**Filtered Out:** {filtering['items_in'] - filtering['items_out']} removed, "
+                         f"low-signal or duplicate items ({filtering['tokens_saved']:,} tokens saved)")
+            usage = metadata.get('usage', {})
+            if usage:
+                st.write(f"**Tokens:** {usage.get('prompt_tokens', 0):,} prompt + "
+                         f"{usage.get('completion_tokens', 0):,} completion"
+                         f"{' (cached result)' if metadata.get('cache_hit') else ''}")
+            spans = metadata.get('trace', [])
+            if spans:
+                st.write("**Timings:**")
+                st.table([
+                    {'Stage': s['name'], 'Start (ms)': s['start_ms'], 'Duration (ms)': s['duration_ms']}
+                    for s in spans
+                ])
             
-        except Exception as e:
-            # st.error(f"❌ Error: {str(e)}")
-            progress.progress(0)
-            status.text("")
+            top_subreddits = metadata.get('top_subreddits', [])
+            if top_subreddits:
+                st.write("**Top Subreddits:**")
+                for sub, count in top_subreddits:
+                    st.write(f"- r/{sub} ({count} posts/comments)")
+                    
+    else:
+        # Fallback to text display
+        st.warning("⚠️ Got text response instead of JSON, showing text analysis:")
+        st.header("📋 Persona Analysis")
+        st.write(persona_data.get('analysis', 'No analysis available'))
+    
+    # Download button: rendered in memory (and cached per persona version), never reread from disk
+    report = report_cache.get(result['username'], persona_data, user_data)
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox("Format", list(FORMATS), format_func=str.upper, label_visibility="collapsed")
+    with col2:
+        st.download_button(
+            label="📥 Download Report",
+            data=report.render(fmt),
+            file_name=report.filename(fmt),
+            mime=report.mime(fmt)
+        )
+    if not filepath:
+        st.error(f"❌ Error saving report: {result['save_error']}")
+    
+    # Show sample data
+    with st.expander("📝 Sample Posts"):
+        for i, post in enumerate(user_data['posts'][:3], 1):
+            st.write(f"**{i}. {post['title']}**")
+            st.write(f"r/{post['subreddit']} | Score: {post['score']}")
+            if post['selftext']:
+                st.write(post['selftext'][:200] + "...")
+            st.divider()
+    
+    with st.expander("💬 Sample Comments"):
+        for i, comment in enumerate(user_data['comments'][:3], 1):
+            st.write(f"**{i}. r/{comment['subreddit']}** (Score: {comment['score']})")
+            st.write(comment['body'][:200] + "...")
+            st.divider()
+    
+    if filepath:
+        st.success(f"✅ Analysis saved to: {filepath}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
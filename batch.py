@@ -0,0 +1,224 @@
+"""Headless batch persona analysis.
+
+Reads usernames (or profile URLs) from a file or stdin, one per line, and runs
+them through a scrape pool and an analysis pool connected as a pipeline.
+Progress is checkpointed so an interrupted run resumes where it stopped.
+
+    python batch.py usernames.txt --scrape-workers 4 --analyze-workers 2
+    cat usernames.txt | python batch.py -
+
+With --archive, histories are read from bulk archive dumps instead of the
+Reddit API (no Reddit credentials needed). All dumps are scanned once for
+every user before analysis starts:
+
+    python batch.py usernames.txt --archive RS_2023-01.zst RC_2023-01.zst
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Set
+from core.config import config
+from core.reddit_scraper import RedditScraper
+from core.data_sources import DataSource, ArchiveDumpSource
+from core.llm_utils import PersonaAnalyzer
+from core.citation_index import CitationIndex, ground_citations
+from core.pipeline import stamp_new_version
+from utils.file_handler import FileHandler
+from core.metrics import metrics
+from core.scheduler import priority, BATCH
+
+def read_usernames(source: Iterable[str], scraper: DataSource) -> List[str]:
+    usernames = []
+    seen = set()
+    for line in source:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        username = scraper.extract_username(line) or re.sub(r'^/?u(ser)?/', '', line).strip('/')
+        if username not in seen:
+            seen.add(username)
+            usernames.append(username)
+    return usernames
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Return usernames already completed in a previous run"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted write
+            if record.get('status') == 'done':
+                done.add(record['username'])
+    return done
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+class BatchRunner:
+    def __init__(self, scrape_workers: int = 4, analyze_workers: int = 2, output_dir: str = None,
+                 checkpoint_path: str = None, source: DataSource = None):
+        self.scraper = source or RedditScraper()
+        self.analyzer = PersonaAnalyzer()
+        self.file_handler = FileHandler(output_dir or config.PERSONA_DIR)
+        self.scrape_workers = scrape_workers
+        self.analyze_workers = analyze_workers
+        self.checkpoint_path = checkpoint_path or os.path.join(self.file_handler.output_dir, 'batch_checkpoint.jsonl')
+        self.timings = {'scrape': [], 'analyze': [], 'save': []}
+        self.counts = {'done': 0, 'error': 0, 'skipped': 0}
+        self._lock = threading.Lock()
+
+    def scrape(self, username: str) -> Dict:
+        user_data = self.file_handler.load_cached_user_data(username, config.MAX_POSTS, config.MAX_COMMENTS)
+        if user_data is None:
+            previous = self.file_handler.load_latest_user_data(username)
+            # Batch requests queue behind interactive ones for the shared quotas
+            with priority(BATCH):
+                user_data = self.scraper.get_user_data(username, previous=previous)
+            self.file_handler.save_raw_user_data(username, user_data)
+        return user_data
+
+    def analyze(self, username: str, user_data: Dict, index: CitationIndex) -> str:
+        started = time.perf_counter()
+        with priority(BATCH):
+            persona = self.analyzer.analyze_persona(user_data)
+        if persona.get('metadata', {}).get('is_json'):
+            ground_citations(persona, index)
+            stamp_new_version(persona, self.file_handler.load_latest_persona(username))
+        self._record('analyze', time.perf_counter() - started)
+
+        # Saved like the app saves it, as the user's next version
+        started = time.perf_counter()
+        filepath = self.file_handler.save_persona(username, persona, user_data, 'json')
+        self._record('save', time.perf_counter() - started)
+        return filepath
+
+    def run(self, usernames: List[str]):
+        done = load_checkpoint(self.checkpoint_path)
+        pending = [username for username in usernames if username not in done]
+        self.counts['skipped'] = len(usernames) - len(pending)
+        print(f"{len(pending)} users to analyze ({self.counts['skipped']} already done)", file=sys.stderr)
+
+        # Bound the number of scraped-but-unanalyzed users held in memory
+        in_flight = threading.BoundedSemaphore(self.scrape_workers + 2 * self.analyze_workers)
+        started = time.perf_counter()
+
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as checkpoint, \
+                ThreadPoolExecutor(self.scrape_workers, thread_name_prefix='scrape') as scrape_pool, \
+                ThreadPoolExecutor(self.analyze_workers, thread_name_prefix='analyze') as analyze_pool:
+
+            def finish(username: str, status: str, **fields):
+                record = {'username': username, 'status': status, 'finished_at': time.time(), **fields}
+                with self._lock:
+                    self.counts[status] += 1
+                    checkpoint.write(json.dumps(record) + "\n")
+                    checkpoint.flush()
+                    completed = self.counts['done'] + self.counts['error']
+                print(f"[{completed}/{len(pending)}] {username}: {status}", file=sys.stderr)
+                in_flight.release()
+
+            def analyze_stage(username: str, user_data: Dict, index: CitationIndex):
+                try:
+                    filepath = self.analyze(username, user_data, index)
+                    finish(username, 'done', path=filepath)
+                except Exception as e:
+                    finish(username, 'error', stage='analyze', error=str(e))
+
+            def scrape_stage(username: str):
+                try:
+                    scrape_started = time.perf_counter()
+                    user_data = self.scrape(username)
+                    index = CitationIndex(user_data)
+                    self._record('scrape', time.perf_counter() - scrape_started)
+                except Exception as e:
+                    finish(username, 'error', stage='scrape', error=str(e))
+                    return
+                analyze_pool.submit(analyze_stage, username, user_data, index)
+
+            for username in pending:
+                in_flight.acquire()
+                scrape_pool.submit(scrape_stage, username)
+
+            # Wait for everything still in the pipeline to drain
+            for _ in range(self.scrape_workers + 2 * self.analyze_workers):
+                in_flight.acquire()
+
+        self.print_summary(time.perf_counter() - started)
+        metrics.dump(os.path.join(self.file_handler.output_dir, 'batch_metrics.json'))
+
+    def _record(self, stage: str, seconds: float):
+        with self._lock:
+            self.timings[stage].append(seconds)
+
+    def print_summary(self, elapsed: float):
+        processed = self.counts['done'] + self.counts['error']
+        rate = processed / elapsed * 60 if elapsed > 0 else 0.0
+        print("\nBATCH SUMMARY", file=sys.stderr)
+        print("=" * 50, file=sys.stderr)
+        print(f"Completed: {self.counts['done']}  Failed: {self.counts['error']}  "
+              f"Skipped (checkpoint): {self.counts['skipped']}", file=sys.stderr)
+        print(f"Elapsed: {elapsed:.1f}s  Throughput: {rate:.1f} users/min", file=sys.stderr)
+        for stage, values in self.timings.items():
+            print(f"{stage:>8}: n={len(values):<6} p50={percentile(values, 50):.2f}s "
+                  f"p95={percentile(values, 95):.2f}s", file=sys.stderr)
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Batch Reddit persona analysis")
+    parser.add_argument('input', help="File with one username or profile URL per line, or '-' for stdin")
+    parser.add_argument('--scrape-workers', type=int, default=4)
+    parser.add_argument('--analyze-workers', type=int, default=2)
+    parser.add_argument('--posts', type=int, default=config.MAX_POSTS, help="Posts to scrape per user")
+    parser.add_argument('--comments', type=int, default=config.MAX_COMMENTS, help="Comments to scrape per user")
+    parser.add_argument('--output-dir', default=config.PERSONA_DIR)
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: <output-dir>/batch_checkpoint.jsonl)")
+    parser.add_argument('--archive', nargs='+', metavar='DUMP',
+                        help="Read histories from these NDJSON archive dumps (.zst, .gz or plain) instead of Reddit")
+    parser.add_argument('--archive-workers', type=int, default=config.ARCHIVE_WORKERS,
+                        help="Processes parsing the dumps (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    try:
+        config.validate(reddit=not args.archive)
+    except ValueError as e:
+        parser.exit(1, f"❌ {e}\n")
+
+    config.MAX_POSTS = args.posts
+    config.MAX_COMMENTS = args.comments
+
+    source = None
+    if args.archive:
+        try:
+            source = ArchiveDumpSource(args.archive, args.archive_workers)
+        except Exception as e:
+            parser.exit(1, f"❌ {e}\n")
+    runner = BatchRunner(args.scrape_workers, args.analyze_workers, args.output_dir, args.checkpoint, source)
+    if args.input == '-':
+        usernames = read_usernames(sys.stdin, runner.scraper)
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            usernames = read_usernames(f, runner.scraper)
+
+    if source is not None:
+        done = load_checkpoint(runner.checkpoint_path)
+        pending = [username for username in usernames if username not in done]
+        started = time.perf_counter()
+        found = source.prefetch(pending)
+        print(f"Found {found}/{len(pending)} users in {len(args.archive)} archive dump(s) "
+              f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    runner.run(usernames)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Offline stand-ins for the PRAW and Groq clients used by the benchmarks.
+
+FakeReddit replays raw user snapshots (the `*_raw_*.json` files FileHandler
+writes, or synthetic histories) through the same attributes RedditScraper
+reads. FakeGroq mimics `client.chat.completions.create`, including streaming
+and the `usage` field, with configurable latency and response quality.
+"""
+import json
+import time
+import random
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+# --- Reddit -----------------------------------------------------------------
+
+class _Listing:
+    def __init__(self, items: List, page_latency: float, page_size: int = 100):
+        self.items = items
+        self.page_latency = page_latency
+        self.page_size = page_size
+
+    def new(self, limit: int = 100) -> Iterator:
+        for index, item in enumerate(self.items[:limit]):
+            if index % self.page_size == 0 and self.page_latency:
+                time.sleep(self.page_latency)
+            yield item
+
+class FakeRedditor:
+    def __init__(self, user_data: Dict, page_latency: float):
+        info = user_data['user_info']
+        self.name = info['username']
+        self.created_utc = info['created_utc']
+        self.comment_karma = info['comment_karma']
+        self.link_karma = info['link_karma']
+        self.submissions = _Listing([_submission(post) for post in user_data['posts']], page_latency)
+        self.comments = _Listing([_comment(comment) for comment in user_data['comments']], page_latency)
+
+def _strip_host(permalink: str) -> str:
+    return permalink.split('reddit.com', 1)[-1]
+
+def _submission(post: Dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        title=post['title'],
+        selftext=post['selftext'],
+        subreddit=post['subreddit'],
+        score=post['score'],
+        permalink=_strip_host(post['permalink']),
+        created_utc=post['created_utc']
+    )
+
+def _comment(comment: Dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        body=comment['body'],
+        subreddit=comment['subreddit'],
+        score=comment['score'],
+        permalink=_strip_host(comment['permalink']),
+        created_utc=comment['created_utc']
+    )
+
+class FakeReddit:
+    """Serves `redditor(name)` from in-memory raw snapshots keyed by username"""
+
+    def __init__(self, users: Dict[str, Dict], page_latency: float = 0.0):
+        self.users = users
+        self.page_latency = page_latency
+
+    @classmethod
+    def from_files(cls, paths: List[str], page_latency: float = 0.0) -> 'FakeReddit':
+        users = {}
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                user_data = json.load(f)
+            users[user_data['user_info']['username']] = user_data
+        return cls(users, page_latency)
+
+    def redditor(self, name: str) -> FakeRedditor:
+        if name not in self.users:
+            raise Exception(f"received 404 HTTP response for user {name}")
+        return FakeRedditor(self.users[name], self.page_latency)
+
+    def info(self, fullnames: List[str]) -> Iterator:
+        return iter([])
+
+SUBREDDITS = ['AskReddit', 'python', 'nyc', 'gaming', 'personalfinance', 'cooking', 'movies', 'science']
+WORDS = ('the a to of and I it you that was for on is with my this but have they just like not '
+         'game work city code money food film think really people time would good new').split()
+
+def synthetic_user_data(username: str, n_posts: int, n_comments: int, seed: int = 0) -> Dict:
+    """Generate a raw snapshot with realistic field shapes, newest items first"""
+    rng = random.Random(seed)
+    now = time.time()
+
+    def text(low: int, high: int) -> str:
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    posts = []
+    created = now
+    for i in range(n_posts):
+        created -= rng.expovariate(1 / 36000)
+        subreddit = rng.choice(SUBREDDITS)
+        posts.append({
+            'title': text(4, 14).capitalize(),
+            'selftext': rng.choice(['', '[removed]', text(10, 300)]),
+            'subreddit': subreddit,
+            'score': int(rng.paretovariate(1.2)),
+            'permalink': f"https://reddit.com/r/{subreddit}/comments/p{i:x}/post_{i}/",
+            'created_utc': created
+        })
+    comments = []
+    created = now
+    for i in range(n_comments):
+        created -= rng.expovariate(1 / 7200)
+        subreddit = rng.choice(SUBREDDITS)
+        comments.append({
+            'body': text(3, 150),
+            'subreddit': subreddit,
+            'score': int(rng.paretovariate(1.5)),
+            'permalink': f"https://reddit.com/r/{subreddit}/comments/x{i % 997:x}/thread/c{i:x}/",
+            'created_utc': created
+        })
+    return {
+        'user_info': {
+            'username': username,
+            'created_utc': now - 5 * 365 * 86400,
+            'comment_karma': sum(c['score'] for c in comments),
+            'link_karma': sum(p['score'] for p in posts),
+            'account_age_days': 5 * 365.0
+        },
+        'posts': posts,
+        'comments': comments
+    }
+
+# --- Groq -------------------------------------------------------------------
+
+CANNED_PERSONA = {
+    "name": "Reddit User {username}",
+    "username": "{username}",
+    "quote": "I'm just here for the discussions, honestly.",
+    "demographics": {"age": "25-34", "occupation": "Software Engineer", "location": "New York",
+                     "status": "Single", "tier": "Active User", "archetype": "The Explorer"},
+    "personality": {"Curious": 0.8, "Analytical": 0.7, "Humorous": 0.6, "Social": 0.5},
+    "motivations": {"Learning": 0.8, "Entertainment": 0.7, "Social Connection": 0.5},
+    "behaviors": ["Posts questions about city life", "Comments on game updates"],
+    "frustrations": ["Crowded bars during intern season"],
+    "goals": ["Find a community with similar interests"],
+    "interests": ["Gaming", "Technology", "Urban life"],
+    "confidence_level": {"demographics": "Low", "personality": "Medium", "motivations": "Medium"},
+    "citations": ["I feel violated by intern season"]
+}
+
+def canned_response(username: str, quality: str = 'valid') -> str:
+    """Persona JSON as a model might return it.
+
+    quality: 'valid', 'fenced' (markdown fence + prose), 'malformed' (single
+    quotes, trailing commas, raw newline) or 'truncated' (cut off mid-object).
+    """
+    text = json.dumps(CANNED_PERSONA, indent=2).replace('{username}', username)
+    if quality == 'fenced':
+        return f"Here is the persona:\n```json\n{text}\n```"
+    if quality == 'malformed':
+        text = text.replace('"quote": "I\'m just', "'quote': 'I'm just").replace("honestly.\"", "honestly.'")
+        text = text.replace('"Gaming",', '"Gaming",\n').replace(']\n}', '],\n}')
+        return text.replace('Crowded bars', 'Crowded\nbars')
+    if quality == 'truncated':
+        return text[:int(len(text) * 0.8)]
+    return text
+
+class _Completions:
+    def __init__(self, owner: 'FakeGroq'):
+        self.owner = owner
+
+    def create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        owner = self.owner
+        owner.calls += 1
+        prompt = ' '.join(message['content'] for message in messages)
+        username = 'unknown'
+        for line in prompt.splitlines():
+            if line.strip().startswith('Username:'):
+                username = line.split(':', 1)[1].strip()
+                break
+        content = canned_response(username, owner.quality)
+        usage = SimpleNamespace(
+            prompt_tokens=len(prompt) // 4,
+            completion_tokens=len(content) // 4,
+            total_tokens=(len(prompt) + len(content)) // 4
+        )
+
+        time.sleep(owner.latency)
+        if not stream:
+            time.sleep(len(content) / 4 / owner.tokens_per_second)
+            return SimpleNamespace(
+                model=model,
+                usage=usage,
+                choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop')]
+            )
+        return self._stream(model, content, usage)
+
+    def _stream(self, model: str, content: str, usage) -> Iterator:
+        step = 16  # ~4 tokens per chunk
+        for start in range(0, len(content), step):
+            time.sleep(step / 4 / self.owner.tokens_per_second)
+            delta = SimpleNamespace(content=content[start:start + step])
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(delta=delta, finish_reason=None)])
+        yield SimpleNamespace(model=model, choices=[], x_groq=SimpleNamespace(usage=usage))
+
+class FakeGroq:
+    """Mimics `Groq().chat.completions.create` without network access.
+
+    latency: seconds before the first token; tokens_per_second: generation
+    speed; quality: see canned_response.
+    """
+
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 1e9, quality: str = 'valid'):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.quality = quality
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
@@ -0,0 +1,109 @@
+"""Import-time budget check.
+
+Imports each entry-point module in a fresh interpreter under `python -X importtime`,
+fails if its cumulative import time exceeds the budget or if one of the
+repo's own modules loads a heavy dependency (PRAW, Groq, pandas, ...)
+eagerly instead of on the code path that needs it, and prints the slowest
+imports as a startup profile. What third-party packages such as Streamlit
+import for themselves is not counted.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 150 --top 15 batch
+
+tests/test_import_time.py runs the same check for DEFAULT_MODULES.
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['core.reddit_scraper', 'core.llm_utils', 'utils.file_handler', 'batch', 'app']
+DEFAULT_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', 200))
+MODULE_BUDGETS_MS = {'app': 1500}  # Streamlit itself takes most of this
+
+# Must only be imported when a request actually needs them
+DEFERRED = ['praw', 'prawcore', 'groq', 'httpx', 'requests', 'pandas', 'numpy', 'scipy', 'zstandard', 'plotly', 'langchain_groq']
+
+LINE_RE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def profile_import(module: str) -> List[Tuple[str, int, int, int]]:
+    """Return (name, self_us, cumulative_us, depth) for every module `import module` loads"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+def is_first_party(name: str) -> bool:
+    top = name.split('.')[0]
+    return os.path.exists(os.path.join(ROOT, top + '.py')) or os.path.isdir(os.path.join(ROOT, top))
+
+def eager_imports(entries: List[Tuple[str, int, int, int]]) -> List[str]:
+    """DEFERRED packages imported directly by one of the repo's modules"""
+    eager = set()
+    stack = []  # importer chain; -X importtime lists a module after everything it imports
+    for name, _, _, depth in reversed(entries):
+        del stack[depth:]
+        top = name.split('.')[0]
+        if top in DEFERRED and depth and is_first_party(stack[depth - 1]):
+            eager.add(top)
+        stack.append(name)
+    return sorted(eager)
+
+def budget_for(module: str) -> float:
+    return MODULE_BUDGETS_MS.get(module, DEFAULT_BUDGET_MS)
+
+def check_module(module: str, budget_ms: float, repeat: int) -> Dict:
+    runs = [profile_import(module) for _ in range(repeat)]
+    # The fastest run is the least disturbed by the machine's other work
+    entries = min(runs, key=lambda run: next(c for n, _, c, _ in run if n == module))
+    total_ms = next(cumulative for name, _, cumulative, _ in entries if name == module) / 1000
+    eager = eager_imports(entries)
+    return {
+        'module': module,
+        'total_ms': round(total_ms, 1),
+        'over_budget': total_ms > budget_ms,
+        'eager_imports': eager,
+        'entries': entries
+    }
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check cold-start import time of the app's modules")
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--budget-ms', type=float, help="Budget for every module (default: IMPORT_TIME_BUDGET_MS, "
+                                                        "or the module's entry in MODULE_BUDGETS_MS)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per module; the fastest is reported")
+    parser.add_argument('--top', type=int, default=10, help="Slowest imports to list per module")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        budget_ms = args.budget_ms if args.budget_ms is not None else budget_for(module)
+        try:
+            report = check_module(module, budget_ms, args.repeat)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failed = True
+            continue
+        ok = not report['over_budget'] and not report['eager_imports']
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {module}: {report['total_ms']:.1f} ms (budget {budget_ms:.0f} ms)")
+        if report['eager_imports']:
+            print(f"   imported eagerly: {', '.join(report['eager_imports'])}")
+        slowest = sorted(report['entries'], key=lambda entry: entry[1], reverse=True)[:args.top]
+        for name, self_us, cumulative_us, _ in slowest:
+            print(f"   {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
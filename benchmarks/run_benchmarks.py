@@ -0,0 +1,161 @@
+"""Offline pipeline benchmarks.
+
+Runs scrape -> prompt build -> LLM -> parse -> save -> render against the fakes
+in benchmarks/fakes.py, so no Reddit or Groq credentials are needed, and
+prints per-stage timings as JSON for run-over-run comparison.
+
+    python -m benchmarks.run_benchmarks --iterations 5 --output bench.json
+    python -m benchmarks.run_benchmarks --llm-latency 0.5 --quality malformed
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import config
+from core.scheduler import scheduler
+from core.reddit_scraper import RedditScraper
+from core.llm_utils import PersonaAnalyzer
+from utils.file_handler import FileHandler
+from benchmarks.fakes import FakeReddit, FakeGroq, synthetic_user_data
+
+STAGES = ['scrape', 'prompt_build', 'llm', 'parse', 'save', 'render']
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+    return {
+        'n': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(pick(50) * 1000, 3),
+        'p95_ms': round(pick(95) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+def timed(samples: Dict[str, List[float]], stage: str, fn: Callable, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    samples[stage].append(time.perf_counter() - started)
+    return result
+
+def make_renderer():
+    """PersonaRenderer if Streamlit is importable (it runs in bare mode outside `streamlit run`)"""
+    try:
+        from utils.persona_render import PersonaRenderer
+        return PersonaRenderer()
+    except ImportError:
+        return None
+
+def run_scenario(name: str, reddit: FakeReddit, username: str, groq: FakeGroq,
+                 iterations: int, output_dir: str) -> Dict:
+    user_data = reddit.users[username]
+    config.MAX_POSTS = len(user_data['posts'])
+    config.MAX_COMMENTS = len(user_data['comments'])
+
+    scraper = RedditScraper(reddit=reddit)
+    analyzer = PersonaAnalyzer(client=groq)
+    file_handler = FileHandler(output_dir)
+    renderer = make_renderer()
+
+    samples = {stage: [] for stage in STAGES}
+    errors = []
+    for _ in range(iterations):
+        scraped = timed(samples, 'scrape', scraper.get_user_data, username)
+        prompt, _, _ = timed(samples, 'prompt_build', analyzer.build_prompt, scraped)
+        # Bypass analyze_persona: it would serve repeats from the persona cache
+        response, _, _, _ = timed(samples, 'llm', analyzer._create, analyzer._request_params(prompt))
+        try:
+            persona, _ = timed(samples, 'parse', analyzer._parse_persona, response.choices[0].message.content)
+        except Exception as e:
+            errors.append(str(e)[:200])
+            continue
+        started = time.perf_counter()
+        file_handler.save_raw_user_data(username, scraped)
+        file_handler.save_persona_json(username, persona)
+        samples['save'].append(time.perf_counter() - started)
+        if renderer is not None:
+            timed(samples, 'render', renderer.render_lucas_style_persona, persona)
+
+    return {
+        'name': name,
+        'username': username,
+        'posts': len(user_data['posts']),
+        'comments': len(user_data['comments']),
+        'iterations': iterations,
+        'parse_errors': len(errors),
+        'errors': errors[:3],
+        'stages': {stage: summarize(values) for stage, values in samples.items() if values},
+        'total_mean_ms': round(sum(sum(values) / len(values) for values in samples.values() if values) * 1000, 3)
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Offline RedditGPT pipeline benchmarks")
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--fixtures', default=os.path.join(config.PERSONA_DIR, '*_raw_*.json'),
+                        help="Glob of raw snapshots to replay")
+    parser.add_argument('--synthetic', default='1000,10000',
+                        help="Comma-separated total item counts for synthetic histories ('' to skip)")
+    parser.add_argument('--page-latency', type=float, default=0.0, help="Seconds per fake listing page")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="Seconds to first token from fake Groq")
+    parser.add_argument('--tokens-per-second', type=float, default=1e9, help="Fake Groq generation speed")
+    parser.add_argument('--quality', default='valid', choices=['valid', 'fenced', 'malformed', 'truncated'])
+    parser.add_argument('--output', help="Write results JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Pacing against the real OAuth quota would dominate every timing
+    for resource in ('reddit', 'groq_requests', 'groq_tokens'):
+        scheduler.configure(resource, per_minute=1e12, burst=10 ** 12)
+
+    users = {}
+    for path in sorted(glob.glob(args.fixtures)):
+        with open(path, 'r', encoding='utf-8') as f:
+            user_data = json.load(f)
+        user_data.pop('snapshot', None)
+        users[f"fixture:{os.path.basename(path)}"] = user_data
+    for size in filter(None, args.synthetic.split(',')):
+        total = int(size)
+        users[f"synthetic:{total}"] = synthetic_user_data(f"synthetic_{total}", total // 5, total - total // 5)
+
+    groq = FakeGroq(args.llm_latency, args.tokens_per_second, args.quality)
+    scenarios = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, user_data in users.items():
+            username = user_data['user_info']['username']
+            reddit = FakeReddit({username: user_data}, args.page_latency)
+            scenarios.append(run_scenario(name, reddit, username, groq, args.iterations, output_dir))
+            print(f"{name}: {scenarios[-1]['total_mean_ms']:.1f} ms/iteration", file=sys.stderr)
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': vars(args),
+        'scenarios': scenarios
+    }
+    encoded = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+if __name__ == "__main__":
+    main()
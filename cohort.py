@@ -0,0 +1,82 @@
+"""Cohort analysis across every analyzed user.
+
+Builds user x subreddit activity and persona trait matrices from the stored
+raw histories and saved personas, then prints clusters and, for --user, that
+user's nearest neighbours. --output writes every user's neighbours and
+cluster to JSON.
+
+    python cohort.py --clusters 8
+    python cohort.py --user kojied --neighbors 10
+    python cohort.py --output cohort.json
+"""
+import sys
+import json
+import time
+import argparse
+from typing import List
+from core.config import config
+from core.cohort import load_cohort, nearest_neighbors, cluster_users, describe_clusters, neighbor_table
+from utils.file_handler import FileHandler
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Compare and cluster analyzed Reddit users")
+    parser.add_argument('--user', help="Show this user's nearest neighbours")
+    parser.add_argument('--neighbors', type=int, default=config.COHORT_NEIGHBORS, help="Neighbours per user")
+    parser.add_argument('--clusters', type=int, default=config.COHORT_CLUSTERS, help="Number of clusters")
+    parser.add_argument('--weight', type=float, default=config.COHORT_SUBREDDIT_WEIGHT,
+                        help="Weight of subreddit overlap vs. persona traits (0-1)")
+    parser.add_argument('--data-dir', default=config.PERSONA_DIR)
+    parser.add_argument('--output', help="Write all neighbours and cluster labels to this JSON file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    cohort = load_cohort(FileHandler(args.data_dir))
+    if len(cohort) < 2:
+        parser.exit(1, f"❌ Need at least 2 analyzed users in {args.data_dir}, found {len(cohort)}\n")
+    print(f"{len(cohort)} users, {len(cohort.subreddits)} subreddits, {len(cohort.traits)} traits "
+          f"(loaded in {time.perf_counter() - started:.1f}s)", file=sys.stderr)
+
+    started = time.perf_counter()
+    labels, _ = cluster_users(cohort, args.clusters, args.weight)
+    clusters = describe_clusters(cohort, labels)
+    print(f"Clustered in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    for cluster in clusters:
+        subreddits = ', '.join(f"r/{s['name']} {s['share']:.0%}" for s in cluster['top_subreddits'])
+        traits = ', '.join(f"{t['name']} {t['mean']:.2f}" for t in cluster['top_traits'])
+        print(f"\nCluster {cluster['cluster']} ({cluster['size']} users, e.g. {', '.join(cluster['members'][:3])})")
+        print(f"  subreddits: {subreddits or '-'}")
+        print(f"  traits: {traits or '-'}")
+
+    if args.user:
+        print(f"\nNearest neighbours of u/{args.user}:")
+        try:
+            table = neighbor_table(cohort, args.user, args.neighbors, args.weight)
+        except Exception as e:
+            parser.exit(1, f"❌ {e}\n")
+        for entry in table:
+            print(f"  {entry['similarity']:.3f}  u/{entry['username']}  "
+                  f"({', '.join(f'r/{s}' for s in entry['shared_subreddits']) or 'no shared subreddits'})")
+
+    if args.output:
+        started = time.perf_counter()
+        indices, scores = nearest_neighbors(cohort, args.neighbors, args.weight)
+        print(f"Computed neighbours in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        result = {
+            'users': {
+                username: {
+                    'cluster': int(labels[row]),
+                    'neighbors': [
+                        {'username': cohort.users[other], 'similarity': round(float(score), 3)}
+                        for other, score in zip(indices[row], scores[row]) if score > 0
+                    ]
+                }
+                for row, username in enumerate(cohort.users)
+            },
+            'clusters': clusters
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        print(f"Wrote {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import math
+from datetime import datetime, timezone
+from typing import Dict, List
+from core.config import config
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+SCORE_PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+def _frame(user_data: Dict):
+    # pandas is only needed once an analysis runs, so it isn't imported at startup
+    import pandas as pd
+
+    rows = [('post', p['subreddit'], p['score'], p['created_utc'], f"{p['title']} {p['selftext']}")
+            for p in user_data['posts']]
+    rows += [('comment', c['subreddit'], c['score'], c['created_utc'], c['body'])
+             for c in user_data['comments']]
+    frame = pd.DataFrame(rows, columns=['kind', 'subreddit', 'score', 'created_utc', 'text'])
+    frame['created'] = pd.to_datetime(frame['created_utc'], unit='s', utc=True)
+    frame['length'] = frame['text'].str.len().fillna(0).astype(int)
+    return frame.sort_values('created_utc', ignore_index=True)
+
+def _round(value, digits: int = 2):
+    return round(float(value), digits)
+
+def activity_profile(user_data: Dict, top_n: int = 10) -> Dict:
+    """Summarize a scraped history as compact numbers for the prompt and the persona card.
+
+    Everything is computed over the whole history with vectorized pandas
+    operations. The result is JSON-serializable. Times are UTC.
+    """
+    if not user_data['posts'] and not user_data['comments']:
+        return {'items': 0}
+    frame = _frame(user_data)
+    posts = int((frame['kind'] == 'post').sum())
+    comments = len(frame) - posts
+
+    hours = frame['created'].dt.hour.value_counts().reindex(range(24), fill_value=0)
+    weekdays = frame['created'].dt.dayofweek.value_counts().reindex(range(7), fill_value=0)
+
+    counts = frame['subreddit'].value_counts()
+    shares = counts / counts.sum()
+    entropy = max(0.0, float(-(shares * shares.map(math.log2)).sum()))
+
+    scores = frame['score'].quantile(list(SCORE_PERCENTILES))
+    lengths = frame.groupby('kind')['length'].agg(['mean', 'median', 'max'])
+
+    # Bursts: runs of items separated by less than the gap, with at least the minimum size
+    gap = config.ACTIVITY_BURST_GAP_MINUTES * 60
+    session = (frame['created_utc'].diff() > gap).cumsum()
+    sessions = frame.groupby(session)['created_utc'].agg(['size', 'min', 'max'])
+    bursts = sessions[sessions['size'] >= config.ACTIVITY_BURST_MIN_ITEMS]
+    largest = bursts.loc[bursts['size'].idxmax()] if len(bursts) else None
+
+    days = frame['created'].dt.normalize()
+    span_days = max((frame['created_utc'].iloc[-1] - frame['created_utc'].iloc[0]) / 86400, 1.0)
+    return {
+        'items': len(frame),
+        'posts': posts,
+        'comments': comments,
+        'post_comment_ratio': _round(posts / comments) if comments else None,
+        'first_activity': frame['created'].iloc[0].strftime('%Y-%m-%d'),
+        'last_activity': frame['created'].iloc[-1].strftime('%Y-%m-%d'),
+        'active_days': int(days.nunique()),
+        'items_per_week': _round(len(frame) / span_days * 7),
+        'hour_histogram': [int(n) for n in hours],
+        'weekday_histogram': dict(zip(WEEKDAYS, (int(n) for n in weekdays))),
+        'peak_hours': [int(hour) for hour in hours[hours > 0].sort_values(ascending=False, kind='stable').index[:3]],
+        'subreddit_count': int(len(counts)),
+        'subreddit_entropy': _round(entropy),
+        'subreddit_concentration': _round(1 - entropy / math.log2(len(counts))) if len(counts) > 1 else 1.0,
+        'top_subreddits': [
+            {'name': name, 'count': int(count), 'share': _round(share, 3)}
+            for name, count, share in zip(counts.index[:top_n], counts[:top_n], shares[:top_n])
+        ],
+        'score_percentiles': {f"p{int(q * 100)}": _round(v, 1) for q, v in scores.items()},
+        'score_max': int(frame['score'].max()),
+        'text_length': {
+            kind: {'mean': _round(row['mean'], 1), 'median': _round(row['median'], 1), 'max': int(row['max'])}
+            for kind, row in lengths.iterrows()
+        },
+        'bursts': {
+            'count': int(len(bursts)),
+            'share_of_items': _round(bursts['size'].sum() / len(frame), 3),
+            'largest': int(largest['size']) if largest is not None else 0,
+            'largest_on': datetime.fromtimestamp(largest['min'], tz=timezone.utc).strftime('%Y-%m-%d')
+                          if largest is not None else None
+        }
+    }
+
+def top_subreddits(profile: Dict, n: int = 5) -> List:
+    """The (subreddit, count) pairs the prompt and metadata have always used"""
+    return [(entry['name'], entry['count']) for entry in profile.get('top_subreddits', [])[:n]]
+
+def format_activity(profile: Dict) -> str:
+    """Render the profile as a few dense prompt lines (~100 tokens)"""
+    if not profile.get('items'):
+        return "No activity"
+    lengths = profile['text_length']
+    scores = profile['score_percentiles']
+    bursts = profile['bursts']
+    weekdays = ', '.join(f"{day} {n}" for day, n in profile['weekday_histogram'].items())
+    subreddits = ', '.join(f"r/{s['name']} {s['share']:.0%}" for s in profile['top_subreddits'][:8])
+    lines = [
+        f"Items: {profile['posts']} posts, {profile['comments']} comments "
+        f"({profile['first_activity']} to {profile['last_activity']}, {profile['items_per_week']}/week, "
+        f"{profile['active_days']} active days)",
+        f"Peak hours (UTC): {', '.join(f'{h:02d}:00' for h in profile['peak_hours'])}; weekdays: {weekdays}",
+        f"Subreddits: {profile['subreddit_count']} distinct, entropy {profile['subreddit_entropy']} bits, "
+        f"concentration {profile['subreddit_concentration']}; {subreddits}",
+        f"Scores: median {scores['p50']}, p90 {scores['p90']}, max {profile['score_max']}",
+        "Characters per item: " + ', '.join(f"{kind}s mean {n['mean']:.0f} / median {n['median']:.0f}"
+                                            for kind, n in lengths.items()),
+        f"Bursts (>= {config.ACTIVITY_BURST_MIN_ITEMS} items, gaps < {config.ACTIVITY_BURST_GAP_MINUTES} min): "
+        f"{bursts['count']}, {bursts['share_of_items']:.0%} of items, largest {bursts['largest']}"
+    ]
+    return "\n    ".join(lines)
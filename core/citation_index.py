@@ -0,0 +1,116 @@
+import re
+import math
+import heapq
+from typing import Dict, List, Optional
+from core.config import config
+from core.evidence import item_text
+from core.filtering import STOPWORDS
+from core.metrics import metrics, span
+
+# Letters and digits of any script, so non-Latin citations are indexed too
+_TOKEN_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+# Text between straight or curly quotes, long enough to be a quotation rather than a term
+_QUOTED_RE = re.compile(r'["“”]([^"“”]{12,})["“”]')
+_SUBREDDIT_RE = re.compile(r'\br/([A-Za-z0-9_]+)')
+CANDIDATES = 3  # best-scoring items checked for word order before picking a match
+EXCERPT_CHARS = 200
+
+def _words(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower().replace('’', "'"))
+
+def _terms(words: List[str]) -> List[str]:
+    # Index terms: no stopwords or single characters, which match nearly every item
+    return [word for word in words if len(word) > 1 and word not in STOPWORDS]
+
+def _searchable_text(item: Dict) -> str:
+    return f"{item['title']} {item_text(item)}" if 'title' in item else item_text(item)
+
+def _bigrams(words: List[str]) -> set:
+    return set(zip(words, words[1:]))
+
+class CitationIndex:
+    """Inverted index over a user's posts and comments for grounding model citations.
+
+    Built once per scraped history. `match` scores items by the IDF-weighted
+    share of the citation's terms they contain, then re-ranks the best few by
+    how much of the citation's word order (bigrams) they reproduce, so a
+    lookup touches only the postings of the citation's own terms.
+    """
+
+    def __init__(self, user_data: Dict):
+        self.items = []  # (kind, item) per document id
+        self._postings = {}  # term -> [document ids]
+        for kind in ('posts', 'comments'):
+            for item in user_data[kind]:
+                text = _searchable_text(item)
+                if not text:
+                    continue
+                doc = len(self.items)
+                self.items.append((kind[:-1], item))
+                for term in set(_terms(_words(text))):
+                    self._postings.setdefault(term, []).append(doc)
+
+        count = len(self.items)
+        self._idf = {term: math.log(1 + count / len(docs)) for term, docs in self._postings.items()}
+        # Terms the user never wrote weigh as much as the rarest ones, so they lower the confidence
+        self._unseen_idf = math.log(1 + count) if count else 1.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def match(self, citation: str) -> Dict:
+        """Find the item a citation quotes: its permalink plus a 0-1 confidence.
+
+        Quoted text inside the citation is matched if present (the model
+        often wraps quotes in a description); a verbatim quote scores 1.0.
+        """
+        quoted = _QUOTED_RE.findall(citation)
+        query = _words(' '.join(quoted) if quoted else citation)
+        weights = {term: self._idf.get(term, self._unseen_idf) for term in set(_terms(query))}
+        result = {'citation': citation, 'kind': None, 'permalink': None, 'subreddit': None, 'excerpt': None,
+                  'confidence': 0.0, 'verified': False}
+        if not weights or not self.items:
+            return result
+
+        total = sum(weights.values())
+        scores = {}
+        for term, weight in weights.items():
+            for doc in self._postings.get(term, ()):
+                scores[doc] = scores.get(doc, 0.0) + weight
+        if not scores:
+            return result
+
+        hinted = {name.lower() for name in _SUBREDDIT_RE.findall(citation)}
+        best, best_confidence = None, -1.0
+        for doc, score in heapq.nlargest(CANDIDATES, scores.items(), key=lambda entry: entry[1]):
+            kind, item = self.items[doc]
+            words = _words(_searchable_text(item))
+            if query and ' '.join(query) in ' '.join(words):
+                confidence = 1.0
+            else:
+                query_bigrams = _bigrams(query)
+                ordered = len(query_bigrams & _bigrams(words)) / len(query_bigrams) if query_bigrams else 1.0
+                confidence = 0.5 * score / total + 0.5 * ordered
+            if item['subreddit'].lower() in hinted:
+                confidence += 1e-6  # prefer the subreddit the citation names on ties
+            if confidence > best_confidence:
+                best, best_confidence = (kind, item), confidence
+
+        kind, item = best
+        confidence = round(min(best_confidence, 1.0), 3)
+        result.update(kind=kind, permalink=item['permalink'], subreddit=item['subreddit'],
+                      excerpt=_searchable_text(item)[:EXCERPT_CHARS], confidence=confidence,
+                      verified=confidence >= config.CITATION_MIN_CONFIDENCE)
+        return result
+
+def ground_citations(persona: Dict, index: CitationIndex) -> List[Dict]:
+    """Match a persona's citations against the index and store them in metadata['citations']"""
+    with span('citations.ground') as attrs:
+        grounded = [index.match(citation) for citation in persona.get('citations') or []
+                    if isinstance(citation, str)]
+        verified = sum(1 for citation in grounded if citation['verified'])
+        attrs.update(citations=len(grounded), verified=verified)
+    metrics.inc('citations_total', verified, verified='true')
+    metrics.inc('citations_total', len(grounded) - verified, verified='false')
+    persona.setdefault('metadata', {})['citations'] = grounded
+    return grounded
@@ -0,0 +1,129 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from core.config import config
+from core.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_lock = threading.Lock()
+_local = threading.local()  # per-thread clients of libraries that aren't thread-safe
+WARM_UP_SPREAD_TIMEOUT = 5  # seconds a warm-up task waits for the others so each lands on its own thread
+
+def _shared(name: str, build):
+    """Build the client `name` once per process and hand out the same instance afterwards"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = build()
+    return client
+
+def _build_reddit_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    # One keep-alive pool sized for the concurrent listing fetches of every session
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # Every response reports the remaining OAuth quota; pace the shared bucket by it
+    session.hooks['response'].append(scheduler.response_hook('reddit'))
+    return session
+
+def _build_reddit():
+    import praw
+
+    reddit = praw.Reddit(
+        client_id=config.REDDIT_CLIENT_ID,
+        client_secret=config.REDDIT_CLIENT_SECRET,
+        user_agent=config.REDDIT_USER_AGENT,
+        requestor_kwargs={'session': _shared('reddit_session', _build_reddit_session)}
+    )
+    logger.info(f"✅ Reddit client initialized for {threading.current_thread().name}")
+    return reddit
+
+def _build_reddit_pool():
+    return ThreadPoolExecutor(max_workers=config.REDDIT_FETCH_WORKERS, thread_name_prefix='reddit-fetch')
+
+def _build_groq():
+    import httpx
+    from groq import Groq
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=config.HTTP_POOL_SIZE,
+                            max_keepalive_connections=config.HTTP_POOL_SIZE),
+        timeout=httpx.Timeout(config.GROQ_TIMEOUT, connect=10.0),
+        # Every response (streams included, once headers arrive) reports the remaining quotas
+        event_hooks={'response': [scheduler.response_hook('groq_requests', 'groq_tokens')]}
+    )
+    # Retries are left to the scheduler, which knows about the shared quotas
+    client = Groq(api_key=config.GROQ_API_KEY, max_retries=0, http_client=http_client)
+    logger.info("✅ Groq client initialized")
+    return client
+
+def get_reddit():
+    """PRAW client of the calling thread.
+
+    PRAW objects are not thread-safe, so every thread gets its own instance,
+    built (and authenticated) once and reused for the thread's lifetime. All
+    of them share one pooled requests.Session, so keep-alive connections are
+    still reused across threads. Run Reddit calls on `reddit_pool()` so the
+    set of threads, and with it the number of clients and OAuth tokens, stays
+    fixed.
+    """
+    reddit = getattr(_local, 'reddit', None)
+    if reddit is None:
+        reddit = _local.reddit = _build_reddit()
+    return reddit
+
+def reddit_pool() -> ThreadPoolExecutor:
+    """Process-wide threads that RedditScraper runs every Reddit call on (REDDIT_FETCH_WORKERS)"""
+    return _shared('reddit_pool', _build_reddit_pool)
+
+def get_groq():
+    """Process-wide Groq client with a keep-alive connection pool"""
+    return _shared('groq', _build_groq)
+
+def _warm_up_reddit():
+    """Authenticate the PRAW client of every reddit_pool() thread"""
+    barrier = threading.Barrier(config.REDDIT_FETCH_WORKERS)
+
+    def authenticate():
+        # Holding each task until all have started puts one on every pool thread
+        try:
+            barrier.wait(WARM_UP_SPREAD_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass  # real fetches took some threads first; those authenticate on their own
+        scheduler.call('reddit', lambda: get_reddit().auth.scopes(), max_retries=0)
+
+    futures = [reddit_pool().submit(authenticate) for _ in range(config.REDDIT_FETCH_WORKERS)]
+    for future in futures:
+        future.result()
+
+def warm_up():
+    """Authenticate the Reddit clients and open the Groq connection ahead of the first request.
+
+    The Reddit clients warmed up are the ones on the fetch pool's threads,
+    which are the ones scrapes use.
+
+    Failures are logged and ignored: the first real request will surface them.
+    """
+    try:
+        _warm_up_reddit()
+        logger.info(f"✅ Reddit clients warmed up ({config.REDDIT_FETCH_WORKERS} fetch threads)")
+    except Exception as e:
+        logger.warning(f"Reddit warm-up failed: {e}")
+    try:
+        scheduler.call('groq_requests', lambda: get_groq().models.list(), max_retries=0)
+        logger.info("✅ Groq client warmed up")
+    except Exception as e:
+        logger.warning(f"Groq warm-up failed: {e}")
+
+def warm_up_in_background() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name='client-warm-up', daemon=True)
+    thread.start()
+    return thread
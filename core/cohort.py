@@ -0,0 +1,270 @@
+import math
+import logging
+from typing import Dict, List, Optional, Tuple
+from core.config import config
+
+logger = logging.getLogger(__name__)
+
+TRAIT_FIELDS = ('personality', 'motivations')
+MIN_TRAIT_USERS = 2  # traits named in fewer personas than this carry no comparison signal
+BATCH_CELLS = 25_000_000  # similarity entries per neighbour batch (~100 MB of float32)
+CLUSTER_RESTARTS = 4  # k-means runs from different seeds; the tightest clustering is kept
+
+class Cohort:
+    """Feature matrices of many analyzed users, rows aligned with `users`.
+
+    counts: sparse user x subreddit item counts (scipy CSR).
+    traits: dense user x trait persona scores, NaN where a persona lacks the trait.
+    The similarity features are derived from both by `features`.
+    """
+
+    def __init__(self, users: List[str], subreddits: List[str], counts, traits: List[str], trait_scores):
+        self.users = users
+        self.subreddits = subreddits
+        self.counts = counts
+        self.traits = traits
+        self.trait_scores = trait_scores
+        self.index = {username: row for row, username in enumerate(users)}
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def features(self, subreddit_weight: float = None):
+        """Row-scaled (activity, traits) blocks whose row-wise dot products are cosine similarities.
+
+        Activity is TF-IDF weighted (log counts, rarer subreddits weigh more) and
+        traits are centered per column. Each block is L2-normalized and scaled by
+        sqrt(weight), so A_i.A_j + T_i.T_j = w * cos_activity + (1 - w) * cos_traits.
+        Users missing one block are renormalized over the other.
+        """
+        import numpy as np
+        from scipy import sparse
+
+        weight = config.COHORT_SUBREDDIT_WEIGHT if subreddit_weight is None else subreddit_weight
+        n = len(self.users)
+
+        activity = self.counts.astype(np.float32).tocsr(copy=True)
+        activity.data = np.log1p(activity.data)
+        df = np.bincount(activity.indices, minlength=activity.shape[1])
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        activity = activity @ sparse.diags(idf)
+        activity_norm = np.sqrt(np.asarray(activity.multiply(activity).sum(axis=1)).ravel())
+
+        scores = self.trait_scores
+        present = ~np.isnan(scores)
+        # Every kept trait is present for at least MIN_TRAIT_USERS users, so no column is all NaN
+        column_mean = np.nanmean(scores, axis=0) if scores.shape[1] else np.zeros(0, dtype=np.float32)
+        traits = np.where(present, scores - column_mean, 0).astype(np.float32)
+        has_persona = present.any(axis=1)
+        trait_norm = np.linalg.norm(traits, axis=1)
+
+        has_activity = activity_norm > 0
+        has_traits = has_persona & (trait_norm > 0)
+        total = weight * has_activity + (1 - weight) * has_traits
+        total[total == 0] = 1
+        activity_scale = np.where(has_activity, np.sqrt(weight / total) / np.maximum(activity_norm, 1e-12), 0)
+        trait_scale = np.where(has_traits, np.sqrt((1 - weight) / total) / np.maximum(trait_norm, 1e-12), 0)
+        activity = sparse.diags(activity_scale.astype(np.float32)) @ activity
+        traits = traits * trait_scale.astype(np.float32)[:, None]
+        return activity.tocsr(), traits
+
+def build_cohort(subreddit_rows: List[Tuple[str, str, int]], personas: Dict[str, Dict]) -> Cohort:
+    """Assemble a Cohort from (username, subreddit, count) rows and {username: persona}"""
+    import numpy as np
+    import pandas as pd
+    from scipy import sparse
+
+    frame = pd.DataFrame(subreddit_rows, columns=['username', 'subreddit', 'count'])
+    users = list(pd.unique(pd.concat([frame['username'], pd.Series(list(personas), dtype=object)])))
+    index = {username: row for row, username in enumerate(users)}
+    subreddit_codes, subreddits = pd.factorize(frame['subreddit'])
+    counts = sparse.csr_matrix(
+        (frame['count'].to_numpy(np.float32), (frame['username'].map(index).to_numpy(), subreddit_codes)),
+        shape=(len(users), len(subreddits))
+    )
+
+    # Trait names are free text from the model; compare them case-insensitively per field
+    rows, names, values = [], [], []
+    for username, persona in personas.items():
+        for field in TRAIT_FIELDS:
+            for trait, score in (persona.get(field) or {}).items():
+                try:
+                    score = float(score)
+                except (TypeError, ValueError):
+                    continue
+                rows.append(index[username])
+                names.append(f"{field}:{trait.strip().lower()}")
+                values.append(score)
+    trait_frame = pd.DataFrame({'row': rows, 'trait': names, 'score': values})
+    usage = trait_frame.groupby('trait')['row'].nunique()
+    kept = sorted(usage[usage >= MIN_TRAIT_USERS].index)
+    trait_frame = trait_frame[trait_frame['trait'].isin(kept)].drop_duplicates(['row', 'trait'])
+    trait_scores = np.full((len(users), len(kept)), np.nan, dtype=np.float32)
+    trait_scores[trait_frame['row'].to_numpy(np.int64), pd.Index(kept, dtype=object).get_indexer(trait_frame['trait'])] = \
+        trait_frame['score'].to_numpy(np.float32)
+
+    return Cohort(users, list(subreddits), counts, kept, trait_scores)
+
+def load_cohort(file_handler) -> Cohort:
+    """Cohort over every stored raw history and the newest saved persona of each user"""
+    return build_cohort(file_handler.subreddit_counts(), file_handler.latest_personas())
+
+def nearest_neighbors(cohort: Cohort, k: int = None, subreddit_weight: float = None,
+                      rows: Optional[List[int]] = None):
+    """Top-k most similar users for each of `rows` (default: everyone).
+
+    Similarities are computed a batch of rows at a time as one sparse and one
+    dense matrix product against all users, and the top k are picked with
+    argpartition, so memory stays at about BATCH_CELLS floats per batch.
+    Returns (neighbor indices, similarities), both shaped (len(rows), k),
+    best first.
+    """
+    import numpy as np
+
+    k = min(k or config.COHORT_NEIGHBORS, len(cohort) - 1)
+    rows = np.arange(len(cohort)) if rows is None else np.asarray(rows)
+    if k <= 0:
+        return np.empty((len(rows), 0), dtype=np.int64), np.empty((len(rows), 0), dtype=np.float32)
+    activity, traits = cohort.features(subreddit_weight)
+    activity_t, traits_t = activity.T.tocsr(), np.ascontiguousarray(traits.T)
+    batch = max(1, BATCH_CELLS // len(cohort))
+
+    indices = np.empty((len(rows), k), dtype=np.int64)
+    scores = np.empty((len(rows), k), dtype=np.float32)
+    for start in range(0, len(rows), batch):
+        block = rows[start:start + batch]
+        similarity = (activity[block] @ activity_t).toarray() + traits[block] @ traits_t
+        similarity[np.arange(len(block)), block] = -np.inf  # never your own neighbour
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        indices[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+def _spherical_kmeans(activity, traits, n_clusters: int, rng, max_iterations: int):
+    """One k-means++ seeded spherical k-means run; returns (labels, similarity of each user to its centroid)"""
+    import numpy as np
+    from scipy import sparse
+
+    n = activity.shape[0]
+
+    def similarities(activity_centroids, trait_centroids):
+        return np.asarray(activity @ activity_centroids.T) + traits @ trait_centroids.T
+
+    # k-means++ on cosine distance: each new seed is drawn proportionally to its squared distance
+    seeds = [int(rng.integers(n))]
+    best = similarities(activity[seeds].toarray(), traits[seeds]).ravel()
+    for _ in range(1, n_clusters):
+        distance = np.clip(1 - best, 0, None) ** 2
+        total = distance.sum()
+        seed_row = int(rng.choice(n, p=distance / total)) if total > 0 else int(rng.integers(n))
+        seeds.append(seed_row)
+        best = np.maximum(best, similarities(activity[[seed_row]].toarray(), traits[[seed_row]]).ravel())
+    activity_centroids, trait_centroids = activity[seeds].toarray(), traits[seeds].copy()
+
+    labels = np.full(n, -1)
+    for iteration in range(max_iterations):
+        similarity = similarities(activity_centroids, trait_centroids)
+        new_labels = similarity.argmax(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        members = sparse.csr_matrix((np.ones(n, dtype=np.float32), (labels, np.arange(n))), shape=(n_clusters, n))
+        activity_centroids = (members @ activity).toarray()
+        trait_centroids = members @ traits
+        sizes = np.asarray(members.sum(axis=1)).ravel()
+        for empty in np.flatnonzero(sizes == 0):
+            # Re-seed an empty cluster with the user farthest from its centroid
+            farthest = int(np.argmin(similarity[np.arange(n), labels]))
+            activity_centroids[empty], trait_centroids[empty] = activity[farthest].toarray().ravel(), traits[farthest]
+        norms = np.sqrt((activity_centroids ** 2).sum(axis=1) + (trait_centroids ** 2).sum(axis=1))
+        norms[norms == 0] = 1
+        activity_centroids /= norms[:, None]
+        trait_centroids /= norms[:, None]
+    else:
+        logger.info(f"Cohort clustering stopped after {max_iterations} iterations without converging")
+
+    return labels, similarities(activity_centroids, trait_centroids)[np.arange(n), labels]
+
+def cluster_users(cohort: Cohort, n_clusters: int = None, subreddit_weight: float = None,
+                  max_iterations: int = 30, seed: int = 0, restarts: int = CLUSTER_RESTARTS):
+    """Spherical k-means over the combined features, k-means++ seeded.
+
+    Each iteration assigns every user with two matrix products against the
+    centroids and recomputes the centroids with a sparse one-hot product.
+    Sparse activity easily settles in a poor local optimum, so the run is
+    repeated `restarts` times and the one with the highest total similarity
+    to its centroids wins. Returns (labels, similarity of each user to its
+    centroid).
+    """
+    import numpy as np
+
+    n_clusters = min(n_clusters or config.COHORT_CLUSTERS, len(cohort))
+    activity, traits = cohort.features(subreddit_weight)
+    rng = np.random.default_rng(seed)
+    best = None
+    for _ in range(max(1, restarts)):
+        labels, fit = _spherical_kmeans(activity, traits, n_clusters, rng, max_iterations)
+        if best is None or fit.sum() > best[1].sum():
+            best = labels, fit
+    return best
+
+def describe_clusters(cohort: Cohort, labels, top: int = 5) -> List[Dict]:
+    """Size, most active subreddits (share of the cluster's items) and average traits per cluster"""
+    import numpy as np
+    from scipy import sparse
+
+    n_clusters = int(labels.max()) + 1 if len(labels) else 0
+    members = sparse.csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                                shape=(n_clusters, len(labels)))
+    subreddit_totals = (members @ cohort.counts).toarray()
+    present = ~np.isnan(cohort.trait_scores)
+    trait_sums = members @ np.where(present, cohort.trait_scores, 0)
+    trait_counts = members @ present.astype(np.float32)
+
+    clusters = []
+    for cluster in range(n_clusters):
+        totals = subreddit_totals[cluster]
+        items = totals.sum()
+        top_subreddits = np.argsort(-totals)[:top]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = trait_sums[cluster] / trait_counts[cluster]
+        # Traits averaged over at least a third of the cluster's personas
+        enough = trait_counts[cluster] >= max(1, trait_counts[cluster].max(initial=0) / 3)
+        ranked = [t for t in np.argsort(-np.nan_to_num(means, nan=-1)) if enough[t]][:top]
+        clusters.append({
+            'cluster': cluster,
+            'size': int(members[cluster].sum()),
+            'members': [cohort.users[row] for row in members[cluster].indices[:top]],
+            'top_subreddits': [
+                {'name': cohort.subreddits[s], 'share': round(float(totals[s] / items), 3)}
+                for s in top_subreddits if totals[s] > 0
+            ],
+            'top_traits': [
+                {'name': cohort.traits[t].split(':', 1)[1], 'field': cohort.traits[t].split(':', 1)[0],
+                 'mean': round(float(means[t]), 2)}
+                for t in ranked
+            ]
+        })
+    return clusters
+
+def shared_subreddits(cohort: Cohort, row: int, other: int, top: int = 5) -> List[str]:
+    """Subreddits both users are active in, by their combined item count"""
+    a, b = cohort.counts[row], cohort.counts[other]
+    common = set(a.indices) & set(b.indices)
+    combined = {s: a[0, s] + b[0, s] for s in common}
+    return [cohort.subreddits[s] for s in sorted(combined, key=combined.get, reverse=True)[:top]]
+
+def neighbor_table(cohort: Cohort, username: str, k: int = None, subreddit_weight: float = None) -> List[Dict]:
+    """A user's nearest neighbours with similarity and shared subreddits"""
+    row = cohort.index.get(username)
+    if row is None:
+        raise Exception(f"u/{username} is not in the cohort (no stored history or persona)")
+    indices, scores = nearest_neighbors(cohort, k, subreddit_weight, rows=[row])
+    return [
+        {'username': cohort.users[other], 'similarity': round(float(score), 3),
+         'shared_subreddits': shared_subreddits(cohort, row, other)}
+        for other, score in zip(indices[0], scores[0]) if math.isfinite(score) and score > 0
+    ]
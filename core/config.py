@@ -13,18 +13,107 @@ class Config:
     # OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+    STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'true').lower() == 'true'
+    GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', 60))  # seconds per request
+
+    # LLM dispatch (see core/dispatch.py)
+    GROQ_FALLBACK_MODEL = os.getenv('GROQ_FALLBACK_MODEL', 'llama-3.1-8b-instant')  # hedge/fallback target, '' disables
+    LLM_DEADLINE_SECONDS = float(os.getenv('LLM_DEADLINE_SECONDS', 45))  # bound on one persona completion
+    HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', 'true').lower() == 'true'
+    HEDGE_DELAY_SECONDS = float(os.getenv('HEDGE_DELAY_SECONDS', 10))  # hedge delay until the primary's p90 is known
+
+    # Background analysis jobs
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))  # analyses running at once across all sessions
+    JOB_RETENTION = int(os.getenv('JOB_RETENTION', 3600))  # seconds finished jobs stay collectable
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 0.5))  # seconds between UI refreshes
+    JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', 64))  # jobs waiting for a worker before new ones are refused, 0 = no limit
+
+    # HTTP API (see api.py)
+    API_HOST = os.getenv('API_HOST', '127.0.0.1')
+    API_PORT = int(os.getenv('API_PORT', 8000))
+    API_STREAM_INTERVAL = float(os.getenv('API_STREAM_INTERVAL', 0.2))  # seconds between progress checks of a streamed job
+
+    # Shared API clients
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))  # keep-alive connections per API
+    WARM_UP_CLIENTS = os.getenv('WARM_UP_CLIENTS', 'true').lower() == 'true'  # pre-authenticate at startup
     
     # App settings
     MAX_POSTS = 50
     MAX_COMMENTS = 50
     PERSONA_DIR = "./data/personas"
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # serve /metrics on this port, 0 disables
+
+    # Scraping
+    CONCURRENT_FETCH = os.getenv('CONCURRENT_FETCH', 'true').lower() == 'true'
+    REDDIT_FETCH_WORKERS = int(os.getenv('REDDIT_FETCH_WORKERS', 6))  # long-lived threads, one PRAW client each
+    REDDIT_REQUESTS_PER_MINUTE = int(os.getenv('REDDIT_REQUESTS_PER_MINUTE', 100))  # OAuth quota
+    REDDIT_REQUEST_BURST = int(os.getenv('REDDIT_REQUEST_BURST', 10))
+
+    # Shared rate limits (see core/scheduler.py)
+    GROQ_REQUESTS_PER_MINUTE = int(os.getenv('GROQ_REQUESTS_PER_MINUTE', 30))
+    GROQ_TOKENS_PER_MINUTE = int(os.getenv('GROQ_TOKENS_PER_MINUTE', 6000))
+    SCHEDULER_MAX_RETRIES = int(os.getenv('SCHEDULER_MAX_RETRIES', 4))  # retries of throttled/transient failures
+    SCHEDULER_BACKOFF_BASE = float(os.getenv('SCHEDULER_BACKOFF_BASE', 1.0))  # seconds, doubled per retry
+
+    # Prompt evidence selection
+    PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 2500))  # tokens of posts/comments per prompt
+    EVIDENCE_ITEM_MAX_TOKENS = int(os.getenv('EVIDENCE_ITEM_MAX_TOKENS', 250))
+    EVIDENCE_MIN_ITEM_TOKENS = 20  # don't squeeze in items shorter than this
+    EVIDENCE_DIVERSITY_PENALTY = 0.5  # value discount per item already picked from a subreddit
+    EVIDENCE_RECENCY_HALF_LIFE_DAYS = 180
+
+    # Filtering before prompt building
+    FILTER_NEAR_DUPLICATES = os.getenv('FILTER_NEAR_DUPLICATES', 'true').lower() == 'true'
+    FILTER_DUPLICATE_THRESHOLD = float(os.getenv('FILTER_DUPLICATE_THRESHOLD', 0.8))  # estimated Jaccard similarity
+    FILTER_REPOST_WINDOW_MINUTES = 30  # similar titles posted this close together in one subreddit are reposts
+    FILTER_MIN_COMMENT_WORDS = 3  # shorter comments ("lol", "this") say little about the author
+    FILTER_MIN_TITLE_WORDS = 4  # link posts without a body need at least this informative a title
+
+    # Incremental persona updates
+    INCREMENTAL_UPDATES = os.getenv('INCREMENTAL_UPDATES', 'true').lower() == 'true'
+    PERSONA_UPDATE_TOKEN_BUDGET = int(os.getenv('PERSONA_UPDATE_TOKEN_BUDGET', 1500))  # evidence tokens for new items
+
+    # Citation grounding
+    CITATION_MIN_CONFIDENCE = float(os.getenv('CITATION_MIN_CONFIDENCE', 0.6))  # below this a citation is unverified
+
+    # Cohort analysis (see core/cohort.py)
+    COHORT_SUBREDDIT_WEIGHT = float(os.getenv('COHORT_SUBREDDIT_WEIGHT', 0.5))  # vs. persona trait similarity
+    COHORT_NEIGHBORS = 10
+    COHORT_CLUSTERS = 8
+
+    # Activity profile
+    ACTIVITY_BURST_GAP_MINUTES = 60  # items closer together than this belong to one session
+    ACTIVITY_BURST_MIN_ITEMS = 5  # sessions at least this large count as bursts
+
+    # Map-reduce analysis of full histories
+    MAP_CHUNK_TOKENS = int(os.getenv('MAP_CHUNK_TOKENS', 3000))
+    MAP_REDUCE_CONCURRENCY = int(os.getenv('MAP_REDUCE_CONCURRENCY', 4))
+
+    # Archive dumps (see core/data_sources.py)
+    ARCHIVE_WORKERS = int(os.getenv('ARCHIVE_WORKERS', 0))  # processes parsing dump blocks, 0 = one per CPU
+
+    # Raw data storage
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')  # 'sqlite' (deduplicated) or 'json' (file per scrape)
+    HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH')  # default: history.db in the output directory
+
+    # Raw data cache
+    RAW_CACHE_TTL = int(os.getenv('RAW_CACHE_TTL', 3600))  # seconds, 0 disables
+    RAW_CACHE_KEEP = int(os.getenv('RAW_CACHE_KEEP', 1))  # snapshots kept per user
+    SCORE_REFRESH_DAYS = int(os.getenv('SCORE_REFRESH_DAYS', 7))  # re-read scores of younger items
+
+    # Persona result cache
+    PERSONA_CACHE_DIR = os.getenv('PERSONA_CACHE_DIR', './data/cache/personas')
+    PERSONA_CACHE_MAX_ENTRIES = int(os.getenv('PERSONA_CACHE_MAX_ENTRIES', 128))  # in-memory LRU
+    PERSONA_CACHE_MAX_DISK_ENTRIES = int(os.getenv('PERSONA_CACHE_MAX_DISK_ENTRIES', 2000))
+    PERSONA_CACHE_TTL = int(os.getenv('PERSONA_CACHE_TTL', 7 * 86400))  # seconds
     
     @classmethod
-    def validate(cls):
+    def validate(cls, reddit: bool = True):
+        """Check required credentials; `reddit=False` when histories come from archive dumps"""
         missing = []
-        if not cls.REDDIT_CLIENT_ID:
+        if reddit and not cls.REDDIT_CLIENT_ID:
             missing.append('REDDIT_CLIENT_ID')
-        if not cls.REDDIT_CLIENT_SECRET:
+        if reddit and not cls.REDDIT_CLIENT_SECRET:
             missing.append('REDDIT_CLIENT_SECRET')
         if not cls.GROQ_API_KEY:
             missing.append('GROQ_API_KEY')
@@ -0,0 +1,301 @@
+import os
+import re
+import abc
+import gzip
+import json
+import heapq
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from core.config import config
+from core.metrics import metrics, span
+
+logger = logging.getLogger(__name__)
+
+BLOCK_BYTES = 8 * 1024 * 1024  # decompressed bytes handed to a parser process at a time
+BLOCKS_PER_WORKER = 2  # blocks in flight per process; bounds memory regardless of dump size
+ZSTD_MAX_WINDOW = 2 ** 31  # Pushshift-style dumps are compressed with --long=31
+AUTHOR_RE = re.compile(rb'"author"\s*:\s*"([^"\\]*)"')
+DELETED_BODIES = ('[deleted]',)
+
+class DataSource(abc.ABC):
+    """Where user histories come from.
+
+    `get_user_data` returns {'user_info', 'posts', 'comments'} in the shape
+    RedditScraper produces, newest items first, so anything downstream
+    (history store, prompt building, batch) works with any source.
+    """
+
+    def extract_username(self, url: str) -> Optional[str]:
+        patterns = [
+            r'reddit\.com/u/([^/\?]+)',
+            r'reddit\.com/user/([^/\?]+)'
+        ]
+        for pattern in patterns:
+            match = re.search(pattern, url)
+            if match:
+                return match.group(1)
+        return None
+
+    @abc.abstractmethod
+    def get_user_data(self, username: str, previous: Optional[Dict] = None, *, max_posts: Optional[int] = None,
+                      max_comments: Optional[int] = None) -> Dict:
+        """A user's history, merged with `previous` (a stored snapshot) if given"""
+
+# Set in each parser process by _init_worker
+_authors: Set[bytes] = set()
+
+def _init_worker(authors: Set[bytes]):
+    global _authors
+    _authors = authors
+
+def _permalink(obj: Dict, is_comment: bool) -> str:
+    if obj.get('permalink'):
+        return f"https://reddit.com{obj['permalink']}"
+    if is_comment:
+        return f"https://reddit.com/r/{obj.get('subreddit')}/comments/{str(obj.get('link_id', ''))[3:]}/_/{obj.get('id')}/"
+    return f"https://reddit.com/r/{obj.get('subreddit')}/comments/{obj.get('id')}/"
+
+def _to_item(obj: Dict) -> Optional[Tuple[str, Dict]]:
+    """A dump record as ('post' | 'comment', item) in the scraper's item shape"""
+    try:
+        created_utc = float(obj['created_utc'])
+        score = int(obj.get('score') or 0)
+    except (KeyError, TypeError, ValueError):
+        return None
+    if 'title' in obj:
+        return 'post', {
+            'title': obj['title'],
+            'selftext': obj.get('selftext') or '',
+            'subreddit': str(obj.get('subreddit')),
+            'score': score,
+            'permalink': _permalink(obj, False),
+            'created_utc': created_utc
+        }
+    if 'body' in obj and obj['body'] not in DELETED_BODIES:
+        return 'comment', {
+            'body': obj['body'],
+            'subreddit': str(obj.get('subreddit')),
+            'score': score,
+            'permalink': _permalink(obj, True),
+            'created_utc': created_utc
+        }
+    return None
+
+def _scan_block(block: bytes) -> List[Tuple[str, Optional[float], str, Dict]]:
+    """Records by wanted authors in a block of whole NDJSON lines.
+
+    Only lines whose raw bytes name a wanted author are JSON-decoded; for a
+    small author set that skips nearly every line of the dump. Returns
+    (author, author_created_utc, kind, item) per match.
+    """
+    matches = []
+    last_start = -1
+    for match in AUTHOR_RE.finditer(block):
+        if match.group(1).lower() not in _authors:
+            continue
+        start = block.rfind(b'\n', 0, match.start()) + 1
+        if start == last_start:
+            continue  # another author field on a line already parsed
+        last_start = start
+        end = block.find(b'\n', match.end())
+        try:
+            obj = json.loads(block[start:end if end != -1 else len(block)])
+        except ValueError:
+            continue
+        # The byte match may have been a nested author (e.g. of a crossposted original)
+        author = obj.get('author')
+        if not isinstance(author, str) or author.lower().encode() not in _authors:
+            continue
+        converted = _to_item(obj)
+        if converted is not None:
+            author_created = obj.get('author_created_utc')
+            matches.append((author, float(author_created) if author_created else None, *converted))
+    return matches
+
+def _open_dump(path: str):
+    """Binary stream of a dump's decompressed NDJSON"""
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception("Reading .zst dumps needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW).stream_reader(
+            open(path, 'rb'), read_across_frames=True, closefd=True)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+def _blocks(stream) -> Iterator[bytes]:
+    """Split a stream into ~BLOCK_BYTES blocks that end on a line boundary"""
+    remainder = b''
+    while True:
+        chunk = stream.read(BLOCK_BYTES)
+        if not chunk:
+            break
+        data = remainder + chunk
+        cut = data.rfind(b'\n') + 1
+        if cut == 0:
+            remainder = data  # a single line longer than the block so far
+            continue
+        remainder = data[cut:]
+        yield data[:cut]
+    if remainder:
+        yield remainder
+
+class _History:
+    """Newest posts/comments of one author kept while scanning, plus totals over everything seen"""
+
+    def __init__(self, username: str, max_posts: int, max_comments: int):
+        self.username = username
+        self.limits = {'post': max_posts, 'comment': max_comments}
+        self.items = {'post': [], 'comment': []}  # min-heaps of (created_utc, seq, item)
+        self.karma = {'post': 0, 'comment': 0}
+        self.created_utc = None
+
+    def add(self, author_created: Optional[float], kind: str, item: Dict, seq: int):
+        self.karma[kind] += item['score']
+        first_seen = author_created or item['created_utc']
+        self.created_utc = first_seen if self.created_utc is None else min(self.created_utc, first_seen)
+        heap, limit = self.items[kind], self.limits[kind]
+        if len(heap) < limit:
+            heapq.heappush(heap, (item['created_utc'], seq, item))
+        elif limit and item['created_utc'] > heap[0][0]:
+            heapq.heapreplace(heap, (item['created_utc'], seq, item))
+
+    def user_data(self) -> Dict:
+        posts, comments = ([entry[2] for entry in sorted(self.items[kind], key=lambda e: e[:2], reverse=True)]
+                           for kind in ('post', 'comment'))
+        return {
+            'user_info': {
+                'username': self.username,
+                'created_utc': self.created_utc,
+                # Dumps carry no profile; karma is approximated by the scores of everything archived
+                'comment_karma': self.karma['comment'],
+                'link_karma': self.karma['post'],
+                'account_age_days': (datetime.now().timestamp() - self.created_utc) / 86400
+            },
+            'posts': posts,
+            'comments': comments
+        }
+
+class ArchiveDumpSource(DataSource):
+    """User histories from bulk Reddit archive dumps instead of the API.
+
+    Dumps are NDJSON files of submissions and/or comments, plain or
+    compressed with zstd (.zst) or gzip (.gz), e.g. the Pushshift
+    RS_/RC_ monthly files. `prefetch` reads every dump once for a whole
+    set of authors: the file is decompressed as a stream and cut into
+    blocks of whole lines, which worker processes filter by author and
+    parse, with at most BLOCKS_PER_WORKER blocks per worker in flight.
+    Memory therefore depends on the number of authors and the item
+    limits, not on the size of the dumps. No Reddit API calls are made.
+    """
+
+    def __init__(self, paths: Iterable[str], workers: Optional[int] = None):
+        self.paths = list(paths)
+        workers = config.ARCHIVE_WORKERS if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        self._histories = {}  # lowercase username -> (user_data or None if absent, max_posts, max_comments)
+        missing = [path for path in self.paths if not os.path.exists(path)]
+        if missing:
+            raise Exception(f"Archive dump not found: {', '.join(missing)}")
+
+    def prefetch(self, usernames: Iterable[str], max_posts: Optional[int] = None,
+                 max_comments: Optional[int] = None) -> int:
+        """Scan the dumps once for all `usernames`; returns how many were found"""
+        max_posts = config.MAX_POSTS if max_posts is None else max_posts
+        max_comments = config.MAX_COMMENTS if max_comments is None else max_comments
+        histories = {username.lower(): _History(username, max_posts, max_comments) for username in usernames}
+        if not histories:
+            return 0
+
+        with span('archive.scan', files=len(self.paths), authors=len(histories), workers=self.workers) as attrs:
+            matched, scanned = self._scan(histories)
+            attrs.update(bytes=scanned, items=matched)
+
+        found = 0
+        for key, history in histories.items():
+            # Users without any archived item are remembered too, so they aren't scanned for again
+            found += history.created_utc is not None
+            self._histories[key] = (history.user_data() if history.created_utc is not None else None,
+                                    max_posts, max_comments)
+        return found
+
+    def _scan(self, histories: Dict[str, '_History']) -> Tuple[int, int]:
+        authors = {key.encode() for key in histories}
+        matched = scanned = seq = 0
+
+        def collect(results: List):
+            nonlocal matched, seq
+            for author, author_created, kind, item in results:
+                history = histories.get(author.lower())
+                if history is not None:
+                    # Dumps spell the name as Reddit stores it; prefer that over the input's casing
+                    history.username = author
+                    history.add(author_created, kind, item, seq)
+                    seq += 1
+                    matched += 1
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(authors,))
+        else:
+            _init_worker(authors)
+        try:
+            for path in self.paths:
+                started, file_bytes = time.perf_counter(), 0
+                pending = deque()
+                with _open_dump(path) as stream:
+                    for block in _blocks(stream):
+                        file_bytes += len(block)
+                        if pool is None:
+                            collect(_scan_block(block))
+                            continue
+                        pending.append(pool.submit(_scan_block, block))
+                        if len(pending) >= self.workers * BLOCKS_PER_WORKER:
+                            collect(pending.popleft().result())
+                    while pending:
+                        collect(pending.popleft().result())
+                elapsed = time.perf_counter() - started
+                scanned += file_bytes
+                metrics.inc('archive_bytes_total', file_bytes)
+                logger.info(f"📦 Scanned {os.path.basename(path)}: {file_bytes / 1e6:,.0f} MB in {elapsed:.1f}s "
+                            f"({file_bytes / 1e6 / max(elapsed, 1e-9):,.0f} MB/s)")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        metrics.inc('archive_items_total', matched)
+        return matched, scanned
+
+    def get_user_data(self, username: str, previous: Optional[Dict] = None, *, max_posts: Optional[int] = None,
+                      max_comments: Optional[int] = None) -> Dict:
+        """A user's history from the dumps, scanning them for just this user unless prefetched.
+
+        A prefetched history is handed out once and then dropped, so a batch
+        holds only the users it has not reached yet. Items in `previous` that
+        the dumps lack (e.g. scraped after the dump was taken) are merged in.
+        """
+        max_posts = config.MAX_POSTS if max_posts is None else max_posts
+        max_comments = config.MAX_COMMENTS if max_comments is None else max_comments
+        key = username.lower()
+        cached = self._histories.get(key)
+        if cached is None or cached[1] < max_posts or cached[2] < max_comments:
+            self.prefetch([username], max_posts, max_comments)
+        entry = self._histories.pop(key, None)
+        if entry is None or entry[0] is None:
+            raise Exception(f"u/{username} has no posts or comments in the archive dumps")
+        user_data = entry[0]
+        user_data['posts'] = _merge(user_data['posts'], (previous or {}).get('posts', []), max_posts)
+        user_data['comments'] = _merge(user_data['comments'], (previous or {}).get('comments', []), max_comments)
+        return user_data
+
+def _merge(items: List[Dict], known: List[Dict], limit: int) -> List[Dict]:
+    """Union by permalink, newest first, cut to `limit`"""
+    seen = {item['permalink'] for item in items}
+    merged = items + [item for item in known if item['permalink'] not in seen]
+    merged.sort(key=lambda item: item['created_utc'], reverse=True)
+    return merged[:limit]
@@ -0,0 +1,184 @@
+import time
+import logging
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional, Tuple
+from core.config import config
+from core.metrics import metrics, in_context
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 200  # recent successful latencies kept per model
+MIN_SAMPLES = 10  # below this the configured HEDGE_DELAY_SECONDS is used instead of the p90
+QUEUE_POLL_SECONDS = 0.05  # how often to check whether a queued request has been sent
+
+class DispatchCancelled(Exception):
+    """Raised inside an attempt that lost to the other model before it was sent"""
+
+class DeadlineExceeded(Exception):
+    pass
+
+class Ticket:
+    """One model's attempt: lets it find out it lost, and tells the dispatcher when it was sent"""
+
+    def __init__(self, model: str, deadline: float):
+        self.model = model
+        self.deadline = deadline
+        self.cancelled = threading.Event()
+        self.sent_at = None
+
+    def send(self) -> float:
+        """Call right before sending; returns the seconds left for the request (its timeout)"""
+        if self.cancelled.is_set():
+            raise DispatchCancelled(f"{self.model} request lost to the other model")
+        now = time.monotonic()
+        if self.sent_at is None:
+            self.sent_at = now
+        remaining = self.sent_at + self.deadline - now
+        if remaining <= 0:
+            # A retry after the first send ran out of time
+            raise DeadlineExceeded(f"{self.model} request exceeded its {self.deadline:g}s deadline")
+        return remaining
+
+class Dispatcher:
+    """Runs an LLM call under a deadline, hedging to a secondary model when the primary is slow.
+
+    The primary request starts immediately. If it hasn't finished within its
+    observed p90 latency of being sent, the same request is sent to the
+    secondary model and whichever finishes first wins. If the primary fails,
+    the secondary is tried as a fallback. Deadlines and hedge delays count
+    from the moment a request is sent, so waiting for our own rate limits
+    doesn't use them up. The loser is cancelled: it is not sent if it is
+    still queued, and a losing stream is closed. A loser already in flight
+    runs to at most its deadline and its result is discarded.
+    """
+
+    def __init__(self, max_workers: int = 32):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._latencies = {}  # model -> deque of recent successful latencies
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(pct / 100 * len(samples)))]
+
+    def hedge_delay(self, model: str) -> float:
+        p90 = self.percentile(model, 90)
+        return config.HEDGE_DELAY_SECONDS if p90 is None else p90
+
+    def _attempt(self, attempt: Callable, ticket: Ticket):
+        try:
+            result = attempt(ticket.model, ticket)
+        except DispatchCancelled:
+            raise
+        except Exception:
+            if ticket.sent_at is not None:
+                metrics.observe('llm_attempt_seconds', time.monotonic() - ticket.sent_at, model=ticket.model,
+                                outcome='error')
+            raise
+        seconds = time.monotonic() - ticket.sent_at
+        self.record(ticket.model, seconds)
+        metrics.observe('llm_attempt_seconds', seconds, model=ticket.model, outcome='ok')
+        return result
+
+    @staticmethod
+    def _discard(discard: Optional[Callable], future):
+        """Done callback of a losing attempt: close a stream it produced and hand its result to `discard`"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        # Stop a stream from generating any further
+        close = getattr(result[0] if isinstance(result, tuple) else result, 'close', None)
+        if close is not None:
+            close()
+        if discard is not None:
+            discard(result)
+
+    def run(self, attempt: Callable[[str, Ticket], Any], primary: str, secondary: Optional[str] = None,
+            deadline: float = None, hedge: bool = None, discard: Callable[[Any], None] = None) -> Tuple[Any, str]:
+        """Call `attempt(model, ticket)` and return (result, model that produced it).
+
+        The attempt calls `ticket.send()` right before each request it sends
+        and uses the returned seconds as the request timeout. A losing attempt
+        that still finishes has its result passed to `discard`. Raises
+        DeadlineExceeded if no attempt succeeds within `deadline` of being
+        sent, or the primary's error if both models fail.
+        """
+        deadline = config.LLM_DEADLINE_SECONDS if deadline is None else deadline
+        hedge = config.HEDGE_REQUESTS if hedge is None else hedge
+        secondary = secondary if secondary and secondary != primary else None
+        delay = self.hedge_delay(primary)
+        started = time.monotonic()
+
+        running, tickets, errors = {}, {}, {}
+
+        def launch(model: str):
+            tickets[model] = Ticket(model, deadline)
+            running[self._pool.submit(in_context(self._attempt), attempt, tickets[model])] = model
+
+        launch(primary)
+        outcome = 'error'
+        try:
+            while True:
+                now = time.monotonic()
+                sent = [ticket.sent_at for ticket in tickets.values() if ticket.sent_at is not None]
+                deadline_at = min(sent) + deadline if sent else None
+                hedge_at = None
+                if secondary and secondary not in tickets:
+                    primary_sent = tickets[primary].sent_at
+                    if primary in errors:
+                        logger.warning(f"⚠️ {primary} failed, falling back to {secondary}: {errors[primary]}")
+                        metrics.inc('llm_fallbacks_total', model=secondary)
+                        launch(secondary)
+                    elif hedge and primary_sent is not None:
+                        hedge_at = primary_sent + delay
+                        if now >= hedge_at:
+                            logger.info(f"{primary} slower than {delay:.1f}s, hedging with {secondary}")
+                            metrics.inc('llm_hedges_total', model=secondary)
+                            launch(secondary)
+                            hedge_at = None
+                if not running:
+                    break
+                if deadline_at is not None and now >= deadline_at:
+                    outcome = 'deadline'
+                    metrics.inc('llm_deadline_exceeded_total', model=primary)
+                    raise DeadlineExceeded(f"LLM request exceeded its {deadline:g}s deadline")
+
+                # Until a request is sent there is no clock to wait on; check back shortly
+                timeout = deadline_at - now if deadline_at is not None else QUEUE_POLL_SECONDS
+                if hedge_at is not None:
+                    timeout = min(timeout, hedge_at - now)
+                elif hedge and secondary and secondary not in tickets:
+                    timeout = min(timeout, QUEUE_POLL_SECONDS)
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors[model] = e
+                        continue
+                    outcome = 'ok' if model == primary else 'secondary'
+                    if model != primary and primary not in errors:
+                        metrics.inc('llm_hedge_wins_total', model=model)
+                    return result, model
+        finally:
+            # Whatever is still running has lost
+            for future, model in running.items():
+                tickets[model].cancelled.set()
+                if not future.cancel():
+                    future.add_done_callback(functools.partial(self._discard, discard))
+            metrics.observe('llm_dispatch_seconds', time.monotonic() - started, outcome=outcome)
+
+        raise errors.get(primary) or next(iter(errors.values()))
+
+dispatcher = Dispatcher()
@@ -0,0 +1,197 @@
+import math
+import heapq
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from core.config import config
+
+# Bodies that carry no information about the user
+EMPTY_BODIES = {'', '[removed]', '[deleted]'}
+
+# Content-defined chunk boundaries (see chunk_history): chunks are at least a quarter full and
+# average about half the budget; ~5% hit the size cap. A higher minimum makes boundaries resync later
+CHUNK_MIN_FILL = 0.25
+CHUNK_CUT_SPACING = 0.25
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Llama-style tokenizers (~4 characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+def item_text(item: Dict) -> str:
+    """The free text of a post (selftext) or comment (body), blank if removed"""
+    text = (item.get('selftext') if 'title' in item else item.get('body')) or ''
+    return '' if text.strip() in EMPTY_BODIES else text.strip()
+
+def format_post(index: int, post: Dict, text: str) -> str:
+    content = text if text else "(no text)"
+    return (
+        f"POST #{index}: {post['title']} (r/{post['subreddit']}, {post['score']} upvotes)\n"
+        f"Content: {content}\n"
+    )
+
+def format_comment(index: int, comment: Dict, text: str) -> str:
+    return f"COMMENT #{index}: {text} (r/{comment['subreddit']}, {comment['score']} upvotes)\n"
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    max_chars = tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(0, max_chars - 3)]
+    # Prefer breaking on a word boundary
+    if ' ' in cut[-40:]:
+        cut = cut[:cut.rfind(' ')]
+    return cut + "..."
+
+def item_cost(item: Dict) -> int:
+    """Prompt tokens an item takes when included at its capped length"""
+    text = _truncate_to_tokens(item_text(item), config.EVIDENCE_ITEM_MAX_TOKENS)
+    if 'title' in item:
+        return estimate_tokens(format_post(1, item, text))
+    return estimate_tokens(format_comment(1, item, text))
+
+def _cut_hash(item: Dict) -> float:
+    """A stable pseudo-random number in [0, 1) per item, the same in every process and run"""
+    key = item.get('permalink') or f"{item.get('created_utc')}:{item.get('title', '')}:{item_text(item)}"
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big') / 2 ** 64
+
+def chunk_history(user_data: Dict, chunk_tokens: int) -> List[Dict]:
+    """Split a user's full history into user_data-shaped chunks of at most `chunk_tokens`.
+
+    Items are taken oldest first across posts and comments, and chunk
+    boundaries are content-defined: once a chunk holds CHUNK_MIN_FILL of
+    `chunk_tokens`, it ends after an item whose hash falls below a threshold
+    proportional to the item's cost (about CHUNK_CUT_SPACING of `chunk_tokens`
+    apart on average). Because a cut depends on the item itself rather than
+    on its position, histories capped at MAX_POSTS/MAX_COMMENTS that lose
+    their oldest items and gain new ones keep the same boundaries in the
+    middle, and those chunks keep hitting the persona cache. Only chunks
+    that had to be cut at `chunk_tokens` depend on where they started, and
+    the next content-defined cut resynchronizes them. Low-signal items are
+    dropped since they would never be selected.
+    """
+    items = [item for item in user_data['posts'] + user_data['comments'] if item_text(item) or 'title' in item]
+    items.sort(key=lambda item: item.get('created_utc', 0))
+    min_tokens = chunk_tokens * CHUNK_MIN_FILL
+    spacing = chunk_tokens * CHUNK_CUT_SPACING
+
+    chunks = []
+    current, current_tokens = [], 0
+    for item in items:
+        cost = item_cost(item)
+        if current and current_tokens + cost > chunk_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += cost
+        if current_tokens >= min_tokens and _cut_hash(item) < cost / spacing:
+            chunks.append(current)
+            current, current_tokens = [], 0
+    if current:
+        chunks.append(current)
+
+    return [
+        {
+            'user_info': user_data['user_info'],
+            'posts': [item for item in chunk if 'title' in item],
+            'comments': [item for item in chunk if 'title' not in item]
+        }
+        for chunk in chunks
+    ]
+
+def chunk_fingerprint(chunk: Dict) -> List[Tuple[str, str, str]]:
+    """What a chunk says: (permalink, title, text) per item.
+
+    Profile fields, scores and the reference time for recency weighting
+    drift between scrapes of the same history; the content of a chunk's
+    items does not, so this identifies an unchanged chunk across re-runs.
+    """
+    return [(item.get('permalink', ''), item.get('title', ''), item_text(item))
+            for item in chunk['posts'] + chunk['comments']]
+
+def information_value(item: Dict, now: float) -> float:
+    """Base value of an item: longer, higher-scored and more recent text is worth more"""
+    text = item_text(item)
+    length = len(text) + (len(item.get('title', '')) if 'title' in item else 0)
+    if length == 0:
+        return 0.0
+    length_value = math.log1p(min(length, 2000))
+    score_value = 1 + 0.3 * math.log1p(max(item.get('score', 0), 0))
+    age_days = max(0.0, (now - item.get('created_utc', now)) / 86400)
+    recency_value = 0.5 + 0.5 * math.exp(-age_days / config.EVIDENCE_RECENCY_HALF_LIFE_DAYS)
+    return length_value * score_value * recency_value
+
+def select_evidence(user_data: Dict, token_budget: Optional[int] = None) -> Tuple[str, str, Dict]:
+    """Pick the posts and comments to show the LLM within a token budget.
+
+    Items are chosen greedily by information value per token, discounted for subreddits
+    that are already represented so the evidence stays diverse. Each item is
+    capped at EVIDENCE_ITEM_MAX_TOKENS, and the last item that does not fit is
+    truncated to fill the remaining budget. Returns (posts_text, comments_text,
+    stats) with posts and comments kept in their original (newest first) order.
+    """
+    token_budget = config.PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    now = datetime.now().timestamp()
+
+    candidates = []
+    for kind in ('posts', 'comments'):
+        for position, item in enumerate(user_data[kind]):
+            value = information_value(item, now)
+            if value > 0:
+                # Rank by value per (square-rooted) token so a few long items can't crowd out the rest
+                tokens = min(estimate_tokens(item_text(item)), config.EVIDENCE_ITEM_MAX_TOKENS)
+                value /= math.sqrt(tokens)
+                candidates.append((kind, position, item, value))
+
+    # Lazy greedy: an item's value only drops as its subreddit gains picks, so a
+    # popped entry is current if its subreddit count has not changed since it was pushed
+    heap = [(-value, kind, position, 0) for kind, position, item, value in candidates]
+    heapq.heapify(heap)
+    base = {(kind, position): (item, value) for kind, position, item, value in candidates}
+    per_subreddit = {}
+    selected = {'posts': {}, 'comments': {}}
+    remaining = token_budget
+    skipped = 0
+
+    while heap and remaining > 0:
+        negative_value, kind, position, seen_count = heapq.heappop(heap)
+        item, value = base[(kind, position)]
+        subreddit_count = per_subreddit.get(item['subreddit'], 0)
+        if subreddit_count != seen_count:
+            discounted = value / (1 + config.EVIDENCE_DIVERSITY_PENALTY * subreddit_count)
+            heapq.heappush(heap, (-discounted, kind, position, subreddit_count))
+            continue
+
+        text = _truncate_to_tokens(item_text(item), config.EVIDENCE_ITEM_MAX_TOKENS)
+        index = len(selected[kind]) + 1
+        formatter = format_post if kind == 'posts' else format_comment
+        cost = estimate_tokens(formatter(index, item, text))
+        if cost > remaining:
+            overhead = cost - estimate_tokens(text)
+            if remaining - overhead < config.EVIDENCE_MIN_ITEM_TOKENS:
+                skipped += 1
+                continue
+            text = _truncate_to_tokens(text, remaining - overhead)
+            cost = estimate_tokens(formatter(index, item, text))
+
+        selected[kind][position] = text
+        per_subreddit[item['subreddit']] = subreddit_count + 1
+        remaining -= cost
+
+    posts_text = "\n".join(
+        format_post(i, user_data['posts'][position], text)
+        for i, (position, text) in enumerate(sorted(selected['posts'].items()), 1)
+    )
+    comments_text = "\n".join(
+        format_comment(i, user_data['comments'][position], text)
+        for i, (position, text) in enumerate(sorted(selected['comments'].items()), 1)
+    )
+
+    stats = {
+        'token_budget': token_budget,
+        'evidence_tokens': token_budget - remaining,
+        'posts_selected': len(selected['posts']),
+        'comments_selected': len(selected['comments']),
+        'items_skipped': skipped + len(heap),
+        'low_signal_items': len(user_data['posts']) + len(user_data['comments']) - len(candidates)
+    }
+    return posts_text, comments_text, stats
@@ -0,0 +1,183 @@
+import re
+from typing import Dict, List, Tuple
+from core.config import config
+from core.evidence import EMPTY_BODIES, item_text, item_cost
+
+# MinHash signature of NUM_BANDS * ROWS_PER_BAND values; items sharing any band
+# are compared. 8 bands of 8 rows make pairs above ~0.77 Jaccard likely to collide.
+NUM_BANDS = 8
+ROWS_PER_BAND = 8
+SHINGLE_WORDS = 3
+SHINGLE_MAX_CHARS = 2000
+_WORD_RE = re.compile(r'\w+', re.UNICODE)  # any script, so non-Latin text is shingled too
+
+# Words ignored when comparing the titles of possible reposts
+STOPWORDS = set('''
+the and for are but not you your with have this that what how why who when where was were will would
+does did can could should about from they them their there been being into than then just like any
+'''.split())
+
+def _permutations(count: int):
+    # Fixed coefficients keep filtering (and therefore prompts and cache keys) identical across processes
+    import numpy as np
+
+    rng = np.random.default_rng(20240715)
+    # x -> a*x + b (mod 2**64) is a permutation of the 64-bit space for odd a
+    a = rng.integers(0, 2 ** 63, size=count, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=count, dtype=np.uint64)
+    return a, b
+
+def shingle_batch(texts: List[str]):
+    """Hashed word 3-grams of every text, as one flat array plus the count per text.
+
+    Words are numbered with pandas.factorize and each 3-gram is hashed
+    with vectorized arithmetic, instead of hashing every 3-gram string.
+    Texts shorter than three words yield one (padded) shingle. Texts with no
+    words at all (e.g. only emoji) get a sentinel word of their own, which no
+    word token can equal, so they still have exactly one shingle and never
+    match any other text.
+    """
+    import numpy as np
+    import pandas as pd
+
+    tokens, starts, counts = [], [], []
+    padding = [''] * (SHINGLE_WORDS - 1)  # windows never span two texts
+    for index, text in enumerate(texts):
+        # Near-duplicates share their openings; long texts needn't be shingled in full
+        words = _WORD_RE.findall(text[:SHINGLE_MAX_CHARS].lower()) or [f"<{index}>"]
+        starts.append(len(tokens))
+        counts.append(max(len(words) - SHINGLE_WORDS + 1, 1))
+        tokens.extend(words)
+        tokens.extend(padding)
+
+    word_ids = pd.factorize(np.asarray(tokens, dtype=object))[0].astype(np.uint64)
+    grams = word_ids[:-2] * np.uint64(1000003) ** np.uint64(2) + word_ids[1:-1] * np.uint64(1000003) + word_ids[2:]
+    valid = np.zeros(len(grams), dtype=bool)
+    for begin, count in zip(starts, counts):
+        valid[begin:begin + count] = True
+    return grams[valid], counts
+
+def minhash_signatures(shingles, counts: List[int], a, b, block: int = 20000):
+    """MinHash signatures (one row per text): the minimum of each universal hash
+    (a*x + b) over a text's shingles, computed for blocks of texts at once"""
+    import numpy as np
+
+    signatures = np.empty((len(counts), len(a)), dtype=np.uint64)
+    ends = np.cumsum(counts)
+    start, offset = 0, 0
+    while start < len(counts):
+        # Extend the block by whole texts until it holds `block` shingles
+        end = max(int(np.searchsorted(ends, offset + block, side='right')), start + 1)
+        x = shingles[offset:ends[end - 1]]
+        offsets = np.concatenate(([0], ends[start:end - 1] - offset))
+        # uint64 arithmetic wraps, i.e. is taken mod 2**64
+        values = np.outer(a, x) + b[:, None]
+        signatures[start:end] = np.minimum.reduceat(values, offsets, axis=1).T
+        start, offset = end, int(ends[end - 1])
+    return signatures
+
+def _full_text(item: Dict) -> str:
+    return f"{item.get('title', '')} {item_text(item)}"
+
+def low_signal_reason(item: Dict) -> str:
+    """Why an item carries too little about its author to be worth prompt tokens ('' if it doesn't)"""
+    if 'title' in item:
+        if item['title'].strip() in EMPTY_BODIES:
+            return 'removed'
+        if not item_text(item) and len(item['title'].split()) < config.FILTER_MIN_TITLE_WORDS:
+            return 'empty'
+        return ''
+    body = (item.get('body') or '').strip()
+    if body in EMPTY_BODIES:
+        return 'removed' if body else 'empty'
+    if len(body.split()) < config.FILTER_MIN_COMMENT_WORDS:
+        return 'low_signal'
+    return ''
+
+def _title_words(post: Dict) -> set:
+    return {word for word in _WORD_RE.findall(post['title'].lower()) if len(word) > 2 and word not in STOPWORDS}
+
+def find_reposts(posts: List[Dict]) -> List[Dict]:
+    """Posts re-submitted with a reworded title: same subreddit, within
+    FILTER_REPOST_WINDOW_MINUTES, and at least half of the shorter title's
+    content words shared. Of each pair the lower-scored (or later) post is returned."""
+    window = config.FILTER_REPOST_WINDOW_MINUTES * 60
+    recent = {}  # subreddit -> [(created_utc, words, post)] within the window
+    losers = []
+    for post in sorted(posts, key=lambda post: post['created_utc']):
+        words = _title_words(post)
+        entries = [entry for entry in recent.get(post['subreddit'], []) if post['created_utc'] - entry[0] <= window]
+        for entry in entries:
+            shared = len(words & entry[1])
+            if words and entry[1] and shared / min(len(words), len(entry[1])) >= 0.5:
+                if post['score'] > entry[2]['score']:
+                    losers.append(entry[2])
+                    entries.remove(entry)
+                    break
+                losers.append(post)
+                words = None
+                break
+        if words is not None:
+            entries.append((post['created_utc'], words, post))
+        recent[post['subreddit']] = entries
+    return losers
+
+def filter_history(user_data: Dict, near_duplicates: bool = None) -> Tuple[Dict, Dict]:
+    """Drop removed/empty/low-signal items and collapse near-duplicates before prompt building.
+
+    Reworded reposts are caught by `find_reposts`; other near-duplicates are found with MinHash over word shingles plus LSH
+    banding, so the cost is linear in the number of items. Of each duplicate
+    group the highest-scored item is kept. Returns (filtered user_data, stats).
+    `tokens_saved` in the stats is the prompt cost the dropped items would
+    have had, which goes to other evidence instead.
+    """
+    near_duplicates = config.FILTER_NEAR_DUPLICATES if near_duplicates is None else near_duplicates
+    stats = {'items_in': 0, 'removed': 0, 'empty': 0, 'low_signal': 0, 'reposts': 0, 'near_duplicates': 0,
+             'tokens_saved': 0}
+    dropped = set()
+
+    items = [(kind, item) for kind in ('posts', 'comments') for item in user_data[kind]]
+    stats['items_in'] = len(items)
+    kept = []
+    for kind, item in items:
+        reason = low_signal_reason(item)
+        if reason:
+            stats[reason] += 1
+            dropped.add(id(item))
+        else:
+            kept.append(item)
+
+    if near_duplicates:
+        for post in find_reposts([item for item in kept if 'title' in item]):
+            stats['reposts'] += 1
+            dropped.add(id(post))
+        kept = [item for item in kept if id(item) not in dropped]
+
+    if near_duplicates and len(kept) > 1:
+        import numpy as np
+
+        kept.sort(key=lambda item: item.get('score', 0), reverse=True)
+        a, b = _permutations(NUM_BANDS * ROWS_PER_BAND)
+        shingles, counts = shingle_batch([_full_text(item) for item in kept])
+        signatures = minhash_signatures(shingles, counts, a, b)
+        # One hash per band of ROWS_PER_BAND signature values
+        band_mix = np.arange(1, ROWS_PER_BAND + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        band_keys = (signatures.reshape(len(kept), NUM_BANDS, ROWS_PER_BAND) * band_mix).sum(axis=2).tolist()
+
+        buckets = {}
+        for index, keys in enumerate(band_keys):
+            candidates = {other for band, key in enumerate(keys) for other in buckets.get((band, key), ())}
+            if any((signatures[index] == signatures[other]).mean() >= config.FILTER_DUPLICATE_THRESHOLD
+                   for other in candidates):
+                stats['near_duplicates'] += 1
+                dropped.add(id(kept[index]))
+                continue
+            for band, key in enumerate(keys):
+                buckets.setdefault((band, key), []).append(index)
+
+    filtered = dict(user_data)
+    for kind in ('posts', 'comments'):
+        filtered[kind] = [item for item in user_data[kind] if id(item) not in dropped]
+    stats['tokens_saved'] = sum(item_cost(item) for _, item in items if id(item) in dropped)
+    stats['items_out'] = stats['items_in'] - len(dropped)
+    return filtered, stats
@@ -0,0 +1,150 @@
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.config import config
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, ERROR = 'queued', 'running', 'done', 'error'
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when `max_queued` jobs are already waiting for a worker"""
+
+class Job:
+    """Status of one background analysis, updated by the worker and polled by the UI"""
+
+    def __init__(self, job_id: str, key: Optional[Tuple] = None):
+        self.id = job_id
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0
+        self.message = "Queued..."
+        self.fields = []  # (key, value) persona fields streamed so far
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, progress: Optional[int] = None, message: Optional[str] = None):
+        with self._lock:
+            if progress is not None:
+                self.progress = progress
+            if message is not None:
+                self.message = message
+
+    def add_field(self, key: str, value: Any):
+        with self._lock:
+            self.fields.append((key, value))
+
+    def snapshot(self) -> Dict:
+        """A consistent copy of the job's state for rendering"""
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'progress': self.progress,
+                'message': self.message,
+                'fields': list(self.fields),
+                'result': self.result,
+                'error': self.error
+            }
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+class JobManager:
+    """Runs jobs on a bounded worker pool and keeps their status for polling.
+
+    Finished jobs are kept for `retention` seconds, so a session that reruns
+    (or reconnects) in the meantime can still collect the result. At most
+    `max_queued` jobs wait for a worker (0 = unbounded); beyond that submit
+    raises QueueFull so callers can push back instead of piling up work.
+    """
+
+    def __init__(self, max_workers: int = 4, retention: int = 3600, max_queued: int = 0):
+        self.max_workers = max_workers
+        self.retention = retention
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._in_flight = {}  # dedup key -> unfinished job
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> str:
+        """Queue `fn(job, *args, **kwargs)`; its return value becomes the job result"""
+        return self.submit_once(None, fn, *args, **kwargs)[0]
+
+    def submit_once(self, key: Optional[Tuple], fn: Callable, *args, **kwargs) -> Tuple[str, bool]:
+        """Like submit, but while a job with the same `key` is unfinished its id is returned instead.
+
+        Returns (job id, whether a new job was created). Raises QueueFull when
+        a new job is needed but the queue is full.
+        """
+        self._prune()
+        with self._lock:
+            existing = self._in_flight.get(key) if key is not None else None
+            if existing is not None:
+                metrics.inc('jobs_deduplicated_total')
+                return existing.id, False
+            if self.max_queued and self._queued() >= self.max_queued:
+                metrics.inc('jobs_rejected_total')
+                raise QueueFull(f"Analysis queue is full ({self.max_queued} jobs waiting)")
+            job = Job(uuid.uuid4().hex, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._in_flight[key] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        metrics.inc('jobs_submitted_total')
+        return job.id, True
+
+    def _queued(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == QUEUED)
+
+    def queue_depth(self) -> Dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+            return {'queued': self._queued(), 'running': running, 'max_queued': self.max_queued,
+                    'workers': self.max_workers}
+
+    def _run(self, job: Job, fn: Callable, args: Tuple, kwargs: Dict):
+        job.status = RUNNING
+        try:
+            result = fn(job, *args, **kwargs)
+            with job._lock:
+                job.result, job.status, job.progress = result, DONE, 100
+        except Exception as e:
+            logger.error(f"❌ Job {job.id[:8]} failed: {e}")
+            with job._lock:
+                job.error, job.status = str(e), ERROR
+        finally:
+            job.finished_at = time.time()
+            if job.key is not None:
+                with self._lock:
+                    if self._in_flight.get(job.key) is job:
+                        del self._in_flight[job.key]
+            metrics.inc('jobs_finished_total', status=job.status)
+            metrics.observe('job_seconds', job.finished_at - job.created_at, status=job.status)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> List[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+jobs = JobManager(config.JOB_WORKERS, config.JOB_RETENTION, config.JOB_MAX_QUEUED)
@@ -0,0 +1,280 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+LITERALS = {'true': 'true', 'false': 'false', 'null': 'null', 'True': 'true', 'False': 'false', 'None': 'null'}
+ESCAPED_CONTROL = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+
+class JSONRepairError(ValueError):
+    pass
+
+def _next_significant(text: str, pos: int) -> str:
+    while pos < len(text) and text[pos] in ' \t\r\n':
+        pos += 1
+    return text[pos] if pos < len(text) else ''
+
+def _member_follows(text: str, pos: int, in_object: bool) -> bool:
+    """Whether what comes after the comma at `pos` starts another member, i.e. the comma is structural"""
+    pos += 1
+    while pos < len(text) and text[pos] in ' \t\r\n':
+        pos += 1
+    if pos >= len(text) or text[pos] in '"\'}]' or text.startswith(('//', '/*'), pos):
+        return True
+    if not in_object and text[pos] in '{[':
+        return True
+    end = pos
+    while end < len(text) and (text[end].isalnum() or text[end] in '-+._$'):
+        end += 1
+    if end == pos:
+        return False
+    if in_object:
+        return _next_significant(text, end) == ':'  # an unquoted key
+    word = text[pos:end]
+    return (word in LITERALS or _is_literal(word)) and _next_significant(text, end) in (',', ']', '')
+
+def _is_literal(word: str) -> bool:
+    try:
+        json.loads(word)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+def repair_json(text: str) -> str:
+    """Extract the outermost JSON object from LLM output and repair it in a single scan.
+
+    Handles surrounding prose or markdown fences, single-quoted strings and keys,
+    unquoted keys, Python literals (True/False/None), unescaped quotes and raw
+    newlines inside strings, trailing commas, comments, and output truncated
+    mid-object.
+    Raises JSONRepairError if there is no object to extract.
+    """
+    start = text.find('{')
+    if start == -1:
+        raise JSONRepairError("No JSON object found")
+
+    out = []
+    # Each frame: [closer, out index where the current member starts, member state]
+    # Object member states: 'key' (expecting/reading a key), 'colon', 'value', 'done'
+    stack = []
+    quote = None  # quote character of the open string, if any
+    last_word = -1  # out index of the most recent bare literal/number
+    pos = start
+    length = len(text)
+
+    def strip_trailing_comma():
+        while out and out[-1] in (' ', '\n'):
+            out.pop()
+        if out and out[-1] == ',':
+            out.pop()
+
+    def value_started():
+        if stack and stack[-1][0] == '}' and stack[-1][2] == 'colon':
+            stack[-1][2] = 'value'
+
+    while pos < length:
+        char = text[pos]
+
+        if quote is not None:
+            if char == '\\' and pos + 1 < length:
+                escaped = text[pos + 1]
+                if escaped == "'" and quote == "'":
+                    out.append("'")
+                elif escaped in '"\\/bfnrtu':
+                    out.append(char + escaped)
+                else:
+                    out.append('\\\\' + escaped)  # invalid escape: keep the backslash literally
+                pos += 2
+                continue
+            if char == quote:
+                # Only treat the quote as closing if JSON structure follows;
+                # otherwise it is an apostrophe or inner quote in the content
+                following = _next_significant(text, pos + 1)
+                if following == ',':
+                    comma = text.index(',', pos + 1)
+                    closes = _member_follows(text, comma, bool(stack) and stack[-1][0] == '}')
+                else:
+                    closes = following in ('}', ']', ':', '')
+                if closes:
+                    out.append('"')
+                    quote = None
+                    if stack and stack[-1][0] == '}' and stack[-1][2] == 'key':
+                        stack[-1][2] = 'colon'
+                    pos += 1
+                    continue
+            if char == '"':
+                out.append('\\"')
+            elif char in ESCAPED_CONTROL:
+                out.append(ESCAPED_CONTROL[char])
+            elif ord(char) < 0x20:
+                out.append(f'\\u{ord(char):04x}')
+            else:
+                out.append(char)
+            pos += 1
+            continue
+
+        if char in ('"', "'"):
+            value_started()
+            quote = char
+            out.append('"')
+        elif char in '{[':
+            value_started()
+            out.append(char)
+            stack.append(['}' if char == '{' else ']', len(out), 'key'])
+        elif char in '}]':
+            if stack:
+                strip_trailing_comma()
+                out.append(stack.pop()[0])
+                if stack and stack[-1][0] == '}':
+                    stack[-1][2] = 'done'
+                if not stack:
+                    break
+        elif char == ',':
+            strip_trailing_comma()
+            out.append(',')
+            if stack:
+                stack[-1][1] = len(out)
+                stack[-1][2] = 'key'
+        elif char == ':':
+            out.append(':')
+            if stack and stack[-1][0] == '}':
+                stack[-1][2] = 'colon'
+        elif char.isalnum() or char in '-+._$':
+            end = pos
+            while end < length and (text[end].isalnum() or text[end] in '-+._$'):
+                end += 1
+            word = text[pos:end]
+            in_key = stack and stack[-1][0] == '}' and stack[-1][2] == 'key'
+            if in_key and word not in LITERALS:
+                out.append(json.dumps(word))  # unquoted key
+                stack[-1][2] = 'colon'
+            else:
+                value_started()
+                out.append(LITERALS.get(word, word))
+                last_word = len(out) - 1
+            pos = end
+            continue
+        elif char == '/' and text.startswith('//', pos):
+            end = text.find('\n', pos)
+            pos = length if end == -1 else end
+            continue
+        elif char == '/' and text.startswith('/*', pos):
+            end = text.find('*/', pos + 2)
+            pos = length if end == -1 else end + 2
+            continue
+        elif char in ' \t\r\n':
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+        # Anything else outside a string (stray backticks etc.) is dropped
+        pos += 1
+
+    if stack:
+        # Truncated output: close the open string, drop a member that never got
+        # a value, then close every open container
+        if quote is not None:
+            if out and out[-1].endswith('\\') and not out[-1].endswith('\\\\'):
+                out.pop()
+            out.append('"')
+        frame = stack[-1]
+        if frame[0] == '}' and frame[2] in ('key', 'colon'):
+            del out[frame[1]:]
+        elif quote is None and last_word >= frame[1] and not _is_literal(out[last_word]):
+            del out[frame[1]:]  # cut off mid-number or mid-literal
+        while stack:
+            strip_trailing_comma()
+            out.append(stack.pop()[0])
+
+    return ''.join(out)
+
+def parse_json(text: str) -> Any:
+    """Repair and parse LLM output, raising JSONRepairError if it cannot be recovered"""
+    repaired = repair_json(text)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError as e:
+        raise JSONRepairError(f"Unrecoverable JSON ({e}): {repaired[:200]}") from e
+
+PERSONA_SCHEMA = {
+    'name': str,
+    'username': str,
+    'quote': str,
+    'demographics': 'str_dict',
+    'personality': 'score_dict',
+    'motivations': 'score_dict',
+    'behaviors': 'str_list',
+    'frustrations': 'str_list',
+    'goals': 'str_list',
+    'interests': 'str_list',
+    'confidence_level': 'str_dict',
+    'citations': 'str_list'
+}
+
+def _coerce_score(value: Any) -> float:
+    """A score in [0, 1] from a fraction, a 0-10 rating or a percentage ("85%" or 85)"""
+    percent = False
+    if isinstance(value, str):
+        value = value.strip()
+        percent = value.endswith('%')
+        value = value.rstrip('%')
+    value = float(value)
+    if percent or value > 10:
+        value /= 100
+    elif value > 1:
+        value /= 10
+    return min(1.0, max(0.0, value))
+
+def validate_persona(persona: Any) -> Tuple[Dict, List[str]]:
+    """Check a parsed persona against PERSONA_SCHEMA, coercing what can be fixed.
+
+    Returns (persona, issues). Missing fields get empty defaults, scores given
+    as strings, 0-10 ratings or percentages become floats in [0, 1], and
+    single strings become one-item lists. Raises JSONRepairError if the value
+    is not a persona object at all.
+    """
+    if not isinstance(persona, dict):
+        raise JSONRepairError(f"Expected a JSON object, got {type(persona).__name__}")
+    if not any(field in persona for field in PERSONA_SCHEMA):
+        raise JSONRepairError("JSON object has none of the persona fields")
+
+    issues = []
+    for field, kind in PERSONA_SCHEMA.items():
+        value = persona.get(field)
+        if field not in persona or value is None:
+            issues.append(f"missing '{field}'")
+            persona[field] = '' if kind is str else ([] if kind == 'str_list' else {})
+            continue
+
+        if kind is str:
+            if not isinstance(value, str):
+                issues.append(f"'{field}' is not a string")
+                persona[field] = str(value)
+        elif kind == 'str_list':
+            if isinstance(value, str):
+                issues.append(f"'{field}' is a string, not a list")
+                persona[field] = [value]
+            elif not isinstance(value, list):
+                issues.append(f"'{field}' is not a list")
+                persona[field] = []
+            else:
+                persona[field] = [item if isinstance(item, str) else json.dumps(item) for item in value]
+        elif kind == 'str_dict':
+            if not isinstance(value, dict):
+                issues.append(f"'{field}' is not an object")
+                persona[field] = {}
+            else:
+                persona[field] = {key: item if isinstance(item, str) else str(item) for key, item in value.items()}
+        elif kind == 'score_dict':
+            if not isinstance(value, dict):
+                issues.append(f"'{field}' is not an object")
+                persona[field] = {}
+                continue
+            scores = {}
+            for key, item in value.items():
+                try:
+                    scores[key] = _coerce_score(item)
+                except (TypeError, ValueError):
+                    issues.append(f"'{field}.{key}' is not a score")
+                    continue
+                if scores[key] != item:
+                    issues.append(f"'{field}.{key}' coerced to {scores[key]}")
+            persona[field] = scores
+
+    return persona, issues
@@ -0,0 +1,67 @@
+import json
+from typing import Any, List, Tuple
+
+class IncrementalJSONParser:
+    """Parse a streamed JSON object and report each top-level member as soon as it closes.
+
+    Text before the opening brace (markdown fences, preambles) is ignored.
+    Members that do not parse on their own are skipped; the caller still
+    parses the complete text once the stream ends.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume the next piece of the stream, returning newly completed (key, value) pairs"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            char = text[self._pos]
+            if self._depth == 0 and char != '{':
+                pass  # still before the object
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(self._member_start, self._pos, completed)
+                    self.done = True
+            elif char == ',' and self._depth == 1:
+                self._emit(self._member_start, self._pos, completed)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _emit(self, start: int, end: int, completed: List):
+        if start is None:
+            return
+        member = self.text[start:end].strip()
+        if not member:
+            return
+        try:
+            parsed = json.loads('{' + member + '}')
+        except json.JSONDecodeError:
+            return
+        for key, value in parsed.items():
+            self.fields[key] = value
+            completed.append((key, value))
@@ -1,47 +1,59 @@
-from groq import Groq
-from typing import Dict
-import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
 from core.config import config
+from core.persona_cache import persona_cache, make_cache_key
+from core.evidence import select_evidence, chunk_history, chunk_fingerprint, estimate_tokens
+from core.activity import activity_profile, format_activity, top_subreddits
+from core.filtering import filter_history
+from core.persona_merge import merge_personas
+from core.persona_update import history_cutoff, newest_item, delta_history, format_prior, diff_personas
+from core.json_stream import IncrementalJSONParser
+from core.json_repair import parse_json, validate_persona, JSONRepairError
+from core.metrics import metrics, span, current_trace, in_context
+from core.scheduler import scheduler
+from core.dispatch import dispatcher, DeadlineExceeded
+from core.clients import get_groq
 from datetime import datetime
 import logging
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are a JSON API. Return ONLY valid JSON. No markdown, no explanations, no text before or after the JSON object."
+
+# Typical completion length of a persona, reserved against the Groq token quota before a request
+EXPECTED_COMPLETION_TOKENS = 1000
+
 class PersonaAnalyzer:
-    def __init__(self):
+    def __init__(self, client=None):
         try:
-            self.client = Groq(api_key=config.GROQ_API_KEY)
+            # `client` lets callers supply a stand-in Groq client; by default the process-wide one is shared
+            self.client = client or get_groq()
             self.model = config.GROQ_MODEL
-            logger.info("✅ Groq client initialized successfully")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Groq client: {e}")
             raise Exception(f"Failed to initialize Groq client: {str(e)}")
 
-    def analyze_persona(self, user_data: Dict) -> Dict:
-        """Analyze user data and return structured JSON persona"""
-
-        # Prepare data for analysis
-        posts_text = "\n".join([
-            f"POST #{i+1}: {post['title']} (r/{post['subreddit']}, {post['score']} upvotes)\n"
-            f"Content: {post['selftext'][:200]}...\n"
-            for i, post in enumerate(user_data['posts'][:10])
-        ])
-
-        comments_text = "\n".join([
-            f"COMMENT #{i+1}: {comment['body'][:200]}... (r/{comment['subreddit']}, {comment['score']} upvotes)\n"
-            for i, comment in enumerate(user_data['comments'][:15])
-        ])
+    def build_prompt(self, user_data: Dict, token_budget: int = None):
+        """Build the analysis prompt, returning (prompt, activity, evidence_stats)"""
 
-        # Get top subreddits
-        subreddits = {}
-        for post in user_data['posts']:
-            subreddits[post['subreddit']] = subreddits.get(post['subreddit'], 0) + 1
-        for comment in user_data['comments']:
-            subreddits[comment['subreddit']] = subreddits.get(comment['subreddit'], 0) + 1
+        # Compact statistics over the whole history stand in for part of the raw text
+        with span('llm.activity_profile'):
+            activity = activity_profile(user_data)
+        activity_text = format_activity(activity)
 
-        top_subreddits = sorted(subreddits.items(), key=lambda x: x[1], reverse=True)[:5]
+        # Prepare data for analysis: drop removed, low-signal and duplicate items first
+        with span('llm.filter') as attrs:
+            filtered, filter_stats = filter_history(user_data)
+            attrs.update(items_dropped=filter_stats['items_in'] - filter_stats['items_out'],
+                         tokens_saved=filter_stats['tokens_saved'])
+        metrics.inc('filter_tokens_saved_total', filter_stats['tokens_saved'])
+        token_budget = (token_budget or config.PROMPT_TOKEN_BUDGET) - estimate_tokens(activity_text)
+        posts_text, comments_text, evidence_stats = select_evidence(filtered, token_budget)
+        evidence_stats['filtering'] = filter_stats
 
         prompt = f"""
     You are a JSON API that analyzes Reddit users. Return ONLY valid JSON with NO markdown, NO explanations, NO text before or after.
@@ -50,7 +62,10 @@ class PersonaAnalyzer:
     Username: {user_data['user_info']['username']}
     Account Age: {user_data['user_info']['account_age_days']:.0f} days
     Total Karma: {user_data['user_info']['comment_karma'] + user_data['user_info']['link_karma']:,}
-    Top Subreddits: {[f"r/{sub} ({count})" for sub, count in top_subreddits]}
+    Top Subreddits: {[f"r/{sub} ({count})" for sub, count in top_subreddits(activity)]}
+
+    ACTIVITY PROFILE:
+    {activity_text}
 
     POSTS:
     {posts_text}
@@ -115,83 +130,456 @@ class PersonaAnalyzer:
     ]
     }}
     """
+        return prompt, activity, evidence_stats
+
+    def _request_params(self, prompt: str) -> Dict:
+        return {
+            'model': self.model,
+            'messages': [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            'temperature': 0.1,  # Lower temperature for consistent JSON
+            'max_tokens': 3000,
+            'top_p': 0.9,
+            'stop': None
+        }
+
+    def _create(self, request: Dict, **kwargs):
+        """Send a completion request through the shared Groq request/token quotas.
+
+        Tokens are reserved up front from the prompt estimate plus a typical
+        persona length (capped at the bucket size) and settled with `_settle_tokens` once the
+        real usage is known. A request that fails or is never sent gives its
+        reservation back, as does a losing stream; a losing request that still
+        finishes is settled on its usage. The dispatcher applies the LLM deadline
+        and hedges or falls back to GROQ_FALLBACK_MODEL. Returns (response,
+        reserved, model used, time.monotonic() at which the winning request's
+        deadline expires).
+        """
+        def attempt(model: str, ticket):
+            params = dict(request, model=model)
+            reserved = self._reserve_estimate(params)
+
+            def send(**params):
+                try:
+                    return self.client.chat.completions.create(timeout=ticket.send(), **params)
+                except Exception:
+                    # Every retry reserves again, so each failed send gives its own reservation back
+                    self._refund_tokens(reserved)
+                    raise
+
+            return scheduler.call(
+                ['groq_requests', 'groq_tokens'], send, tokens={'groq_tokens': reserved}, **params, **kwargs
+            ), reserved, ticket
+
+        def discard(result):
+            response, reserved, ticket = result
+            usage = getattr(response, 'usage', None)
+            if usage is None:
+                # A closed stream never reports what it used
+                self._refund_tokens(reserved)
+            else:
+                self._settle_tokens(reserved, self._record_usage(usage, ticket.model))
+
+        (response, reserved, ticket), model = dispatcher.run(attempt, self.model, config.GROQ_FALLBACK_MODEL,
+                                                             discard=discard)
+        return response, reserved, model, ticket.sent_at + ticket.deadline
+
+    @staticmethod
+    def _reserve_estimate(request: Dict) -> int:
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in request['messages'])
+        return min(prompt_tokens + EXPECTED_COMPLETION_TOKENS, config.GROQ_TOKENS_PER_MINUTE)
+
+    @staticmethod
+    def _settle_tokens(reserved: int, usage: Dict):
+        if usage.get('total_tokens'):
+            scheduler.adjust('groq_tokens', usage['total_tokens'] - reserved)
+
+    @staticmethod
+    def _refund_tokens(reserved: int):
+        scheduler.adjust('groq_tokens', -reserved)
+
+    def analyze_persona(self, user_data: Dict, token_budget: int = None) -> Dict:
+        """Analyze user data and return structured JSON persona"""
+
+        with span('llm.prompt_build'):
+            prompt, activity, evidence_stats = self.build_prompt(user_data, token_budget)
+            request = self._request_params(prompt)
+
+        # Identical prompt + model parameters give an identical request, so reuse the result
+        cache_key = make_cache_key(request)
+        cached = self._cached_persona(cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a JSON API. Return ONLY valid JSON. No markdown, no explanations, no text before or after the JSON object."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # Lower temperature for consistent JSON
-                max_tokens=3000,
-                top_p=0.9,
-                stop=None
-            )
-
-            content = response.choices[0].message.content.strip()
-            logger.info(f"Raw LLM response: {content[:100]}...")
+            persona_json, schema_issues, usage, model = self._complete(request)
+            self._add_metadata(persona_json, user_data, activity, evidence_stats, schema_issues, usage, model)
+
+            self._cache_persona(cache_key, persona_json)
+            return persona_json
+
+        except Exception as e:
+            logger.error(f"❌ Error analyzing persona: {e}")
+            raise Exception(f"Error analyzing persona: {str(e)}")
+
+    def _complete(self, request: Dict):
+        """Run a non-streaming completion and parse it, returning (persona_json, schema_issues, usage, model)"""
+        with span('llm.request', model=self.model, stream=False) as attrs:
+            response, reserved, model, _ = self._create(request)
+            usage = self._record_usage(getattr(response, 'usage', None), model)
+            self._settle_tokens(reserved, usage)
+            attrs.update(usage, model_used=model)
+
+        content = response.choices[0].message.content.strip()
+        logger.info(f"Raw LLM response: {content[:100]}...")
+
+        with span('llm.parse') as attrs:
+            persona_json, schema_issues = self._parse_persona(content)
+            attrs['schema_issues'] = len(schema_issues)
+        return persona_json, schema_issues, usage, model
+
+    def build_update_prompt(self, prior: Dict, delta: Dict, user_data: Dict, token_budget: int = None):
+        """Build the prompt revising `prior` with the items in `delta`, returning (prompt, activity, evidence_stats)"""
+        with span('llm.activity_profile'):
+            activity = activity_profile(user_data)
+        activity_text = format_activity(activity)
+
+        filtered, filter_stats = filter_history(delta)
+        metrics.inc('filter_tokens_saved_total', filter_stats['tokens_saved'])
+        token_budget = (token_budget or config.PERSONA_UPDATE_TOKEN_BUDGET) - estimate_tokens(activity_text)
+        posts_text, comments_text, evidence_stats = select_evidence(filtered, token_budget)
+        evidence_stats['filtering'] = filter_stats
+
+        analyzed_on = prior.get('metadata', {}).get('timestamp', 'Unknown')[:10]
+        prompt = f"""
+    You are a JSON API that keeps Reddit user personas up to date. Return ONLY valid JSON with NO markdown, NO explanations, NO text before or after.
+
+    CURRENT PERSONA (analyzed {analyzed_on}):
+    {format_prior(prior)}
+
+    USER DATA:
+    Username: {user_data['user_info']['username']}
+    Account Age: {user_data['user_info']['account_age_days']:.0f} days
+    Total Karma: {user_data['user_info']['comment_karma'] + user_data['user_info']['link_karma']:,}
+
+    ACTIVITY PROFILE (whole history):
+    {activity_text}
+
+    NEW POSTS SINCE {analyzed_on}:
+    {posts_text or "None"}
 
-            # Aggressive JSON cleaning
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            # Find JSON bounds
-            start_idx = content.find('{')
-            end_idx = content.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                content = content[start_idx:end_idx]
-
-            # Multiple JSON parsing attempts
-            for attempt in range(3):
+    NEW COMMENTS SINCE {analyzed_on}:
+    {comments_text or "None"}
+
+    Revise CURRENT PERSONA with the new posts and comments. Keep every value the new activity does not
+    contradict or extend, change scores only where it gives evidence, and cite the new activity for what
+    changed. Return the complete persona with exactly the same JSON structure as CURRENT PERSONA.
+    """
+        return prompt, activity, evidence_stats
+
+    def update_persona(self, prior: Dict, user_data: Dict, token_budget: int = None) -> Dict:
+        """Revise a previously saved persona with only the items created since it was analyzed.
+
+        The prompt carries the prior persona and the new items instead of the
+        whole history, so a refresh costs a small delta prompt. The changes
+        against the prior persona are recorded in metadata['changes']. If
+        nothing new was posted the prior persona is returned, marked
+        'unchanged'. Personas without a usable timestamp get a full analysis.
+        """
+        prior_metadata = prior.get('metadata', {})
+        since = history_cutoff(prior_metadata)
+        if since is None:
+            logger.warning("Prior persona has no analysis timestamp, running a full analysis")
+            return self.analyze_persona(user_data)
+
+        delta = delta_history(user_data, since)
+        if not delta['posts'] and not delta['comments']:
+            logger.info("✅ No new activity since the last analysis, keeping the persona")
+            persona_json = dict(prior)
+            persona_json['metadata'] = dict(prior_metadata, unchanged=True, changes={},
+                                            usage=self._record_usage(None))
+            self._attach_trace(persona_json)
+            return persona_json
+
+        with span('llm.prompt_build', delta_items=len(delta['posts']) + len(delta['comments'])):
+            prompt, activity, evidence_stats = self.build_update_prompt(prior, delta, user_data, token_budget)
+            request = self._request_params(prompt)
+
+        cache_key = make_cache_key(request)
+        cached = self._cached_persona(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            persona_json, schema_issues, usage, model = self._complete(request)
+            self._add_metadata(persona_json, user_data, activity, evidence_stats, schema_issues, usage, model)
+            persona_json['metadata'].update({
+                'mode': 'update',
+                'based_on': prior_metadata.get('timestamp'),
+                'delta_posts': len(delta['posts']),
+                'delta_comments': len(delta['comments']),
+                'changes': diff_personas(prior, persona_json)
+            })
+
+            self._cache_persona(cache_key, persona_json)
+            return persona_json
+
+        except Exception as e:
+            logger.error(f"❌ Error updating persona: {e}")
+            raise Exception(f"Error updating persona: {str(e)}")
+
+    def analyze_persona_stream(self, user_data: Dict, on_field: Callable[[str, Any], None],
+                               token_budget: int = None) -> Dict:
+        """Like analyze_persona, but streams the completion and calls `on_field(key, value)`
+        for each top-level persona field as soon as it has been generated."""
+
+        with span('llm.prompt_build'):
+            prompt, activity, evidence_stats = self.build_prompt(user_data, token_budget)
+            request = self._request_params(prompt)
+
+        cache_key = make_cache_key(request)
+        cached = self._cached_persona(cache_key)
+        if cached is not None:
+            for key, value in cached.items():
+                if key != 'metadata':
+                    on_field(key, value)
+            return cached
+
+        try:
+            with span('llm.request', model=self.model, stream=True) as attrs:
+                started = time.perf_counter()
+                stream, reserved, model, expires_at = self._create(request, stream=True)
+                attrs['model_used'] = model
+
+                # The deadline counts from the send, not from waiting for quota, and part of it may
+                # already have gone to hedging. A stalled stream delivers no chunk to check it on,
+                # so a watchdog closes the response when the rest runs out
+                expired = threading.Event()
+
+                def expire():
+                    expired.set()
+                    stream.close()
+
+                watchdog = threading.Timer(max(0.0, expires_at - time.monotonic()), expire)
+                watchdog.daemon = True
+                watchdog.start()
+
+                parser = IncrementalJSONParser()
+                usage = None
                 try:
-                    persona_json = json.loads(content)
-                    logger.info(f"✅ JSON parsed successfully on attempt {attempt + 1}")
-                    
-                    # Add metadata
-                    persona_json['metadata'] = {
-                        'timestamp': datetime.now().isoformat(),
-                        'model_used': self.model,
-                        'posts_analyzed': len(user_data['posts']),
-                        'comments_analyzed': len(user_data['comments']),
-                        'top_subreddits': top_subreddits,
-                        'is_json': True
-                    }
-                    
-                    return persona_json
-                    
-                except json.JSONDecodeError as e:
-                    logger.warning(f"JSON parsing attempt {attempt + 1} failed: {e}")
-                    
-                    if attempt == 0:
-                        # Fix trailing commas
-                        content = content.replace(',}', '}').replace(',]', ']')
-                    elif attempt == 1:
-                        # Fix quotes
-                        content = content.replace("'", '"')
-                    elif attempt == 2:
-                        # Last attempt - raise error
-                        logger.error(f"❌ All JSON parsing attempts failed")
-                        logger.error(f"❌ Final content: {content}")
-                        raise Exception(f"Failed to parse JSON after 3 attempts. Raw content: {content[:200]}...")
+                    for chunk in stream:
+                        if expired.is_set():
+                            break
+                        # Groq reports token usage on the final chunk
+                        x_groq = getattr(chunk, 'x_groq', None)
+                        if x_groq is not None and getattr(x_groq, 'usage', None) is not None:
+                            usage = x_groq.usage
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if not delta:
+                            continue
+                        if 'time_to_first_token_ms' not in attrs:
+                            attrs['time_to_first_token_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                            metrics.observe('llm_time_to_first_token_seconds', time.perf_counter() - started,
+                                            model=model)
+                        for key, value in parser.feed(delta):
+                            on_field(key, value)
+                except Exception:
+                    # Reading a response the watchdog closed fails; that is the deadline, not an error
+                    if not expired.is_set():
+                        self._refund_tokens(reserved)
+                        raise
+                finally:
+                    watchdog.cancel()
+                if expired.is_set():
+                    self._refund_tokens(reserved)
+                    metrics.inc('llm_deadline_exceeded_total', model=model)
+                    raise DeadlineExceeded(f"LLM stream exceeded its {config.LLM_DEADLINE_SECONDS:g}s deadline")
+                usage = self._record_usage(usage, model)
+                self._settle_tokens(reserved, usage)
+                attrs.update(usage)
+
+            content = parser.text.strip()
+            logger.info(f"Raw LLM response: {content[:100]}...")
+
+            with span('llm.parse') as attrs:
+                persona_json, schema_issues = self._parse_persona(content)
+                attrs['schema_issues'] = len(schema_issues)
+            self._add_metadata(persona_json, user_data, activity, evidence_stats, schema_issues, usage, model)
+            persona_json['metadata']['streamed'] = True
+
+            self._cache_persona(cache_key, persona_json)
+            return persona_json
 
         except Exception as e:
             logger.error(f"❌ Error analyzing persona: {e}")
             raise Exception(f"Error analyzing persona: {str(e)}")
-        
+
+    def _parse_persona(self, content: str):
+        """Parse the model output into a persona, repairing malformed JSON locally.
+
+        Returns (persona_json, schema_issues). Raises if nothing usable can be
+        recovered, in which case the caller surfaces the error.
+        """
+        try:
+            persona_json, schema_issues = validate_persona(parse_json(content))
+        except JSONRepairError as e:
+            logger.error(f"❌ JSON parsing failed: {e}")
+            raise Exception(f"Failed to parse JSON. Raw content: {content[:200]}...")
+
+        if schema_issues:
+            logger.warning(f"Persona schema issues: {', '.join(schema_issues)}")
+        else:
+            logger.info("✅ JSON parsed successfully")
+        return persona_json, schema_issues
+
+    def _cached_persona(self, cache_key: str):
+        cached = persona_cache.get(cache_key)
+        if cached is None:
+            metrics.inc('persona_cache_misses_total')
+            return None
+        logger.info(f"✅ Persona cache hit ({cache_key[:12]})")
+        metrics.inc('persona_cache_hits_total')
+        metadata = cached.setdefault('metadata', {})
+        metadata['cache_hit'] = True
+        # The stored trace and usage belong to the original run
+        metadata['usage'] = self._record_usage(None)
+        self._attach_trace(cached)
+        return cached
+
+    def _cache_persona(self, cache_key: str, persona_json: Dict):
+        # The key names the primary model; a fallback's answer shouldn't be served as if it came from it
+        if persona_json['metadata']['model_used'] == self.model:
+            persona_cache.set(cache_key, persona_json)
+
+    def _record_usage(self, usage, model: str = None) -> Dict:
+        """Normalize the Groq usage field and add it to the token counters"""
+        model = model or self.model
+        counts = {
+            'prompt_tokens': getattr(usage, 'prompt_tokens', 0) or 0,
+            'completion_tokens': getattr(usage, 'completion_tokens', 0) or 0
+        }
+        counts['total_tokens'] = counts['prompt_tokens'] + counts['completion_tokens']
+        if usage is not None:
+            metrics.inc('llm_prompt_tokens_total', counts['prompt_tokens'], model=model)
+            metrics.inc('llm_completion_tokens_total', counts['completion_tokens'], model=model)
+            metrics.inc('llm_requests_total', model=model)
+        return counts
+
+    @staticmethod
+    def _attach_trace(persona_json: Dict):
+        trace = current_trace()
+        if trace is not None:
+            persona_json.setdefault('metadata', {})['trace'] = trace.to_list()
+
+    def _add_metadata(self, persona_json: Dict, user_data: Dict, activity: Dict, evidence_stats: Dict,
+                      schema_issues: list = None, usage: Dict = None, model: str = None):
+        persona_json['metadata'] = {
+            'timestamp': datetime.now().isoformat(),
+            'model_used': model or self.model,
+            'posts_analyzed': len(user_data['posts']),
+            'comments_analyzed': len(user_data['comments']),
+            'history_until': newest_item(user_data),
+            'top_subreddits': top_subreddits(activity),
+            'activity': activity,
+            'evidence': evidence_stats,
+            'schema_issues': schema_issues or [],
+            'usage': usage or self._record_usage(None),
+            'is_json': True,
+            'cache_hit': False
+        }
+        self._attach_trace(persona_json)
+
+    def analyze_persona_map_reduce(self, user_data: Dict, chunk_tokens: int = None,
+                                   max_workers: int = None) -> Dict:
+        """Analyze a full history by summarizing token-sized chunks in parallel and merging them.
+
+        Each chunk goes through analyze_persona, and its partial persona is
+        cached by the chunk's items (see _analyze_chunk), so only new or
+        changed chunks cost tokens on a re-run. The partials are merged
+        deterministically, weighted by chunk size.
+        """
+        chunk_tokens = chunk_tokens or config.MAP_CHUNK_TOKENS
+        max_workers = max_workers or config.MAP_REDUCE_CONCURRENCY
+        filtered, filter_stats = filter_history(user_data)
+        chunks = chunk_history(filtered, chunk_tokens)
+        if len(chunks) <= 1:
+            return self.analyze_persona(user_data)
+
+        logger.info(f"Map-reduce analysis over {len(chunks)} chunks ({max_workers} concurrent)")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(in_context(self._analyze_chunk), chunk, chunk_tokens) for chunk in chunks]
+
+        partials, weights, failed = [], [], 0
+        for chunk, future in zip(chunks, futures):
+            try:
+                partials.append(future.result())
+                weights.append(len(chunk['posts']) + len(chunk['comments']))
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Chunk analysis failed, skipping: {e}")
+        if not partials:
+            raise Exception(f"Error analyzing persona: all {len(chunks)} chunks failed")
+
+        username = user_data['user_info']['username']
+        persona_json = merge_personas(partials, weights, username)
+
+        activity = activity_profile(user_data)
+        persona_json['metadata'] = {
+            'timestamp': datetime.now().isoformat(),
+            'model_used': ', '.join(sorted({p.get('metadata', {}).get('model_used', self.model) for p in partials})),
+            'posts_analyzed': len(user_data['posts']),
+            'comments_analyzed': len(user_data['comments']),
+            'history_until': newest_item(user_data),
+            'top_subreddits': top_subreddits(activity),
+            'activity': activity,
+            'filtering': filter_stats,
+            'mode': 'map_reduce',
+            'chunks': len(chunks),
+            'chunks_failed': failed,
+            'chunk_cache_hits': sum(1 for p in partials if p.get('metadata', {}).get('cache_hit')),
+            'usage': {
+                key: sum(p.get('metadata', {}).get('usage', {}).get(key, 0) for p in partials)
+                for key in ('prompt_tokens', 'completion_tokens', 'total_tokens')
+            },
+            'is_json': True,
+            'cache_hit': False
+        }
+        self._attach_trace(persona_json)
+        return persona_json
+
+    def _analyze_chunk(self, chunk: Dict, chunk_tokens: int) -> Dict:
+        """analyze_persona for one map-reduce chunk, cached by the chunk's content.
+
+        The chunk prompt also carries the account age and karma, and its
+        evidence picks are weighted by recency, so it differs on every
+        re-scrape even when the chunk's items are unchanged. Keying on the
+        items and the model parameters lets an unchanged chunk hit the cache.
+        """
+        request = self._request_params('')
+        request['messages'] = request['messages'][:1]  # the system prompt; the user prompt is what varies
+        cache_key = make_cache_key(dict(request, chunk=chunk_fingerprint(chunk), chunk_tokens=chunk_tokens))
+        cached = self._cached_persona(cache_key)
+        if cached is not None:
+            return cached
+        persona_json = self.analyze_persona(chunk, chunk_tokens)
+        self._cache_persona(cache_key, persona_json)
+        return persona_json
+
     def get_model_info(self) -> Dict:
         """Get information about the current model"""
         return {
             'provider': 'Groq',
             'model': self.model,
-            'api_key_set': bool(config.GROQ_API_KEY)
+            'fallback_model': config.GROQ_FALLBACK_MODEL,
+            'latency_p90': dispatcher.percentile(self.model, 90),
+            'api_key_set': bool(config.GROQ_API_KEY),
+            'cache_stats': dict(persona_cache.stats)
         }
\ No newline at end of file
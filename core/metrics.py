@@ -0,0 +1,198 @@
+import json
+import time
+import functools
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, exportable as Prometheus text or JSON"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict) -> Tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), 'buckets': dict(zip(self.buckets, h['counts'])),
+                     'sum': h['sum'], 'count': h['count']}
+                    for (name, labels), h in sorted(self._histograms.items())
+                ]
+            }
+
+    def render_prometheus(self) -> str:
+        def label_text(labels, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            escaped = (v.replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+            return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{label_text(labels)} {value}")
+            for (name, labels), h in sorted(self._histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                for bound, count in zip(self.buckets, h['counts']):
+                    lines.append(f"{name}_bucket{label_text(labels, (('le', str(bound)),))} {count}")
+                lines.append(f"{name}_bucket{label_text(labels, (('le', '+Inf'),))} {h['count']}")
+                lines.append(f"{name}_sum{label_text(labels)} {h['sum']}")
+                lines.append(f"{name}_count{label_text(labels)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+metrics = MetricsRegistry()
+
+class Trace:
+    """Timed spans for one analysis, attached to persona metadata"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, duration: float, attrs: Dict):
+        span = {
+            'name': name,
+            'start_ms': round((start - self.started) * 1000, 2),
+            'duration_ms': round(duration * 1000, 2),
+            **attrs
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def to_list(self) -> List[Dict]:
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span['start_ms'])
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+def start_trace() -> Trace:
+    """Begin a trace that spans in this context (and contexts copied from it) record into"""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def in_context(fn):
+    """Wrap `fn` to run in a copy of the caller's context, for thread pool submissions"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block, recording it in the stage_seconds histogram and the current trace.
+
+    The yielded dict can be updated with attributes (token counts, sizes, ...).
+    """
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield attrs
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        metrics.observe('stage_seconds', duration, stage=name)
+        if status == 'error':
+            metrics.inc('stage_errors_total', stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, started, duration, dict(attrs, status=status) if status == 'error' else attrs)
+
+def traced(name: str):
+    """Decorator form of `span` for timing whole functions"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int, host: str = '0.0.0.0'):
+    """Serve /metrics (Prometheus) and /metrics.json from a daemon thread; safe to call repeatedly"""
+    global _server
+    with _server_lock:
+        if _server is not None or not port:
+            return _server
+        # Imported here: most processes never serve metrics
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body, content_type = json.dumps(metrics.snapshot()).encode(), 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body, content_type = metrics.render_prometheus().encode(), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Metrics server not started on port {port}: {e}")
+            return None
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"✅ Metrics available at http://{host}:{port}/metrics")
+        return _server
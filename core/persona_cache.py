@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from core.config import config
+
+def make_cache_key(payload: Dict) -> str:
+    """Stable SHA-256 over a JSON-serializable payload (prompt + model parameters)"""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class PersonaCache:
+    """Two-tier cache of persona results: an in-process LRU in front of a JSON-file store.
+
+    Entries expire after `max_age` seconds. The memory tier holds at most
+    `max_entries`, the disk tier at most `max_disk_entries` (oldest files evicted).
+    """
+
+    def __init__(self, cache_dir: str = None, max_entries: int = None,
+                 max_disk_entries: int = None, max_age: int = None):
+        self.cache_dir = cache_dir or config.PERSONA_CACHE_DIR
+        self.max_entries = max_entries if max_entries is not None else config.PERSONA_CACHE_MAX_ENTRIES
+        self.max_disk_entries = max_disk_entries if max_disk_entries is not None else config.PERSONA_CACHE_MAX_DISK_ENTRIES
+        self.max_age = max_age if max_age is not None else config.PERSONA_CACHE_TTL
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry['created_at'] <= self.max_age:
+                    self._memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    self.stats['memory_hits'] += 1
+                    return json.loads(entry['value'])
+                del self._memory[key]
+                self.stats['evictions'] += 1
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and now - entry['created_at'] <= self.max_age:
+                self._remember(key, entry)
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return json.loads(entry['value'])
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Dict):
+        entry = {'created_at': time.time(), 'value': json.dumps(value, ensure_ascii=False)}
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+
+    def _remember(self, key: str, entry: Dict):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if time.time() - entry.get('created_at', 0) > self.max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: Dict):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        files = [
+            os.path.join(self.cache_dir, filename)
+            for filename in os.listdir(self.cache_dir)
+            if filename.endswith('.json')
+        ]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda path: os.path.getmtime(path))
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+                with self._lock:
+                    self.stats['evictions'] += 1
+            except OSError:
+                pass
+
+# Shared by every PersonaAnalyzer in the process so Streamlit reruns hit the memory tier
+persona_cache = PersonaCache()
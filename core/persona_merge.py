@@ -0,0 +1,98 @@
+from collections import Counter
+from typing import Dict, List
+
+UNKNOWN_VALUES = {'', 'unknown', 'n/a', 'none', 'not specified'}
+LIST_FIELDS = ['behaviors', 'frustrations', 'goals', 'interests']
+SCORE_FIELDS = ['personality', 'motivations']
+MAX_LIST_ITEMS = {'behaviors': 5, 'frustrations': 5, 'goals': 5, 'interests': 8}
+MAX_CITATIONS = 6
+
+def _weighted_scores(partials: List[Dict], weights: List[float], field: str) -> Dict:
+    """Weighted mean of each trait score over the partials that report it"""
+    totals, weight_sums = {}, {}
+    for partial, weight in zip(partials, weights):
+        for trait, score in (partial.get(field) or {}).items():
+            try:
+                score = float(score)
+            except (TypeError, ValueError):
+                continue
+            totals[trait] = totals.get(trait, 0.0) + score * weight
+            weight_sums[trait] = weight_sums.get(trait, 0.0) + weight
+    merged = {trait: round(totals[trait] / weight_sums[trait], 2) for trait in totals}
+    return dict(sorted(merged.items(), key=lambda x: x[1], reverse=True))
+
+def _ranked_list(partials: List[Dict], weights: List[float], field: str, limit: int) -> List[str]:
+    """Entries ranked by total weight of the partials mentioning them (case-insensitive)"""
+    votes = Counter()
+    first_seen = {}
+    for partial, weight in zip(partials, weights):
+        for entry in partial.get(field) or []:
+            if not isinstance(entry, str) or not entry.strip():
+                continue
+            key = entry.strip().lower()
+            first_seen.setdefault(key, entry.strip())
+            votes[key] += weight
+    # Ties keep first-seen order, which follows chunk order
+    order = {key: index for index, key in enumerate(first_seen)}
+    ranked = sorted(votes, key=lambda key: (-votes[key], order[key]))
+    return [first_seen[key] for key in ranked[:limit]]
+
+def _vote(values: List, weights: List[float], default: str = 'Unknown') -> str:
+    votes = Counter()
+    for value, weight in zip(values, weights):
+        if isinstance(value, str) and value.strip().lower() not in UNKNOWN_VALUES:
+            votes[value.strip()] += weight
+    return votes.most_common(1)[0][0] if votes else default
+
+def merge_personas(partials: List[Dict], weights: List[float], username: str) -> Dict:
+    """Deterministically merge partial personas computed over chunks of a user's history.
+
+    `weights` is typically the number of items each partial was built from.
+    Score dictionaries are weight-averaged, list fields are ranked by weighted
+    votes, and categorical fields take the weighted majority ignoring "Unknown".
+    """
+    if not partials:
+        raise ValueError("No partial personas to merge")
+
+    demographic_keys = []
+    for partial in partials:
+        for key in (partial.get('demographics') or {}):
+            if key not in demographic_keys:
+                demographic_keys.append(key)
+    confidence_keys = []
+    for partial in partials:
+        for key in (partial.get('confidence_level') or {}):
+            if key not in confidence_keys:
+                confidence_keys.append(key)
+
+    heaviest = max(range(len(partials)), key=lambda i: weights[i])
+
+    merged = {
+        'name': f"Reddit User {username}",
+        'username': username,
+        'quote': partials[heaviest].get('quote') or _vote([p.get('quote') for p in partials], weights, ''),
+        'demographics': {
+            key: _vote([(p.get('demographics') or {}).get(key) for p in partials], weights)
+            for key in demographic_keys
+        },
+        'confidence_level': {
+            key: _vote([(p.get('confidence_level') or {}).get(key) for p in partials], weights)
+            for key in confidence_keys
+        }
+    }
+    for field in SCORE_FIELDS:
+        merged[field] = _weighted_scores(partials, weights, field)
+    for field in LIST_FIELDS:
+        merged[field] = _ranked_list(partials, weights, field, MAX_LIST_ITEMS[field])
+
+    # Round-robin citations so every chunk contributes evidence
+    citations = []
+    queues = [list(p.get('citations') or []) for p in partials]
+    while len(citations) < MAX_CITATIONS and any(queues):
+        for queue in queues:
+            if queue and len(citations) < MAX_CITATIONS:
+                citation = queue.pop(0)
+                if citation not in citations:
+                    citations.append(citation)
+    merged['citations'] = citations
+    return merged
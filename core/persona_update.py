@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from core.json_repair import PERSONA_SCHEMA
+
+# Score changes smaller than this are model noise, not a change in the persona
+SCORE_CHANGE_THRESHOLD = 0.05
+
+def history_cutoff(metadata: Dict) -> Optional[float]:
+    """The created_utc up to which a persona's history was analyzed.
+
+    Newer personas record the newest analyzed item ('history_until'); older
+    ones only have the analysis timestamp, which bounds it from above.
+    """
+    if metadata.get('history_until') is not None:
+        return float(metadata['history_until'])
+    try:
+        return datetime.fromisoformat(metadata['timestamp']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def newest_item(user_data: Dict) -> Optional[float]:
+    return max((item['created_utc'] for item in user_data['posts'] + user_data['comments']), default=None)
+
+def delta_history(user_data: Dict, since: float) -> Dict:
+    """The user_data-shaped subset of items created after `since`"""
+    delta = dict(user_data)
+    for kind in ('posts', 'comments'):
+        delta[kind] = [item for item in user_data[kind] if item['created_utc'] > since]
+    return delta
+
+def persona_fields(persona: Dict) -> Dict:
+    """The model-generated part of a persona (no metadata), for prompting and comparison"""
+    return {field: persona.get(field) for field in PERSONA_SCHEMA}
+
+def format_prior(persona: Dict) -> str:
+    return json.dumps(persona_fields(persona), indent=2, ensure_ascii=False)
+
+def diff_personas(prior: Dict, revised: Dict) -> Dict:
+    """What an update changed: {field: change} for every field that differs.
+
+    Strings and demographic/confidence values are reported as
+    {'from', 'to'}, scores per trait when they move by at least
+    SCORE_CHANGE_THRESHOLD, and lists as {'added', 'removed'} entries
+    (compared case-insensitively). Citations are left out; they are
+    replaced on every run.
+    """
+    changes = {}
+    for field, kind in PERSONA_SCHEMA.items():
+        if field == 'citations':
+            continue
+        old, new = prior.get(field), revised.get(field)
+        if kind is str:
+            if (old or '').strip() != (new or '').strip():
+                changes[field] = {'from': old, 'to': new}
+        elif kind == 'str_list':
+            old_keys = {entry.strip().lower(): entry for entry in old or []}
+            new_keys = {entry.strip().lower(): entry for entry in new or []}
+            added = [entry for key, entry in new_keys.items() if key not in old_keys]
+            removed = [entry for key, entry in old_keys.items() if key not in new_keys]
+            if added or removed:
+                changes[field] = {'added': added, 'removed': removed}
+        else:
+            old, new = old or {}, new or {}
+            moved = {}
+            for key in list(old) + [key for key in new if key not in old]:
+                before, after = old.get(key), new.get(key)
+                if kind == 'score_dict' and before is not None and after is not None:
+                    if abs(float(after) - float(before)) < SCORE_CHANGE_THRESHOLD:
+                        continue
+                elif before == after:
+                    continue
+                moved[key] = {'from': before, 'to': after}
+            if moved:
+                changes[field] = moved
+    return changes
+
+def describe_changes(changes: Dict) -> List[str]:
+    """One readable line per change, for the UI and the text report"""
+    lines = []
+    for field, change in changes.items():
+        label = field.replace('_', ' ').title()
+        if 'added' in change:
+            parts = [f"+ {entry}" for entry in change['added']] + [f"- {entry}" for entry in change['removed']]
+            lines.append(f"{label}: {'; '.join(parts)}")
+        elif 'from' in change:
+            lines.append(f"{label}: \"{change['from']}\" → \"{change['to']}\"")
+        else:
+            for key, value in change.items():
+                before = '—' if value['from'] is None else value['from']
+                after = '—' if value['to'] is None else value['to']
+                lines.append(f"{label} / {key}: {before} → {after}")
+    return lines
@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from core.config import config
+from core.citation_index import CitationIndex, ground_citations
+from core.jobs import Job
+from core.metrics import span, start_trace
+from utils.report_renderer import report_cache
+
+logger = logging.getLogger(__name__)
+
+def analysis_key(username: str, posts_limit: int, comments_limit: int, deep_analysis: bool,
+                 incremental: bool = None) -> Tuple:
+    """Identifies identical analyses so concurrent requests for them can share one job"""
+    incremental = config.INCREMENTAL_UPDATES if incremental is None else incremental
+    return 'analysis', username.lower(), posts_limit, comments_limit, deep_analysis, incremental
+
+def stamp_new_version(persona_data: Dict, prior: Optional[Dict]):
+    """Number a new persona as the version after `prior` (the user's latest saved one, if any)"""
+    metadata = persona_data.setdefault('metadata', {})
+    metadata['version'] = prior.get('metadata', {}).get('version', 1) + 1 if prior is not None else 1
+    # A cache hit carries the timestamp of the run that produced it; a new version is saved under its own
+    metadata['timestamp'] = datetime.now().isoformat()
+
+def run_analysis(job: Job, username: str, posts_limit: int, comments_limit: int, deep_analysis: bool,
+                 scraper, analyzer, file_handler, incremental: bool = None) -> Dict:
+    """Scrape -> analyze -> save for one user, reporting progress on `job`.
+
+    Runs on a JobManager worker thread. Persona fields are published on the
+    job as they stream in, so the UI can fill in the card while polling.
+    With `incremental` (INCREMENTAL_UPDATES by default) a previously saved
+    persona is revised with the new activity instead of being rebuilt, and
+    every new persona is saved as the user's next version.
+    """
+    incremental = config.INCREMENTAL_UPDATES if incremental is None else incremental
+    start_trace()
+
+    # Step 1: Scrape data
+    job.update(25, "🔍 Scraping Reddit data...")
+    user_data = file_handler.load_cached_user_data(username, posts_limit, comments_limit)
+    if user_data is None:
+        previous = file_handler.load_latest_user_data(username)
+        user_data = scraper.get_user_data(username, previous=previous, max_posts=posts_limit,
+                                          max_comments=comments_limit)
+        file_handler.save_raw_user_data(username, user_data, posts_limit, comments_limit)
+    else:
+        job.update(message="♻️ Using recently scraped Reddit data...")
+    with span('citations.index') as attrs:
+        index = CitationIndex(user_data)
+        attrs.update(items=len(index))
+
+    # Step 2: Analyze, or revise the previous version with what is new
+    prior = file_handler.load_latest_persona(username)
+    job.update(50, "🧠 Analyzing persona...")
+    if prior is not None and incremental and not deep_analysis:
+        job.update(message="🔄 Updating the previous persona with new activity...")
+        persona_data = analyzer.update_persona(prior, user_data)
+    elif deep_analysis:
+        persona_data = analyzer.analyze_persona_map_reduce(user_data)
+    elif config.STREAM_RESPONSES:
+        persona_data = analyzer.analyze_persona_stream(user_data, on_field=job.add_field)
+    else:
+        persona_data = analyzer.analyze_persona(user_data)
+    metadata = persona_data.get('metadata', {})
+    is_new_version = metadata.get('is_json') and not metadata.get('unchanged')
+    if is_new_version:
+        ground_citations(persona_data, index)
+        stamp_new_version(persona_data, prior)
+
+    # Step 3: Save. The report is rendered once; the UI's download reuses the same bytes
+    job.update(90, "💾 Saving report...")
+    report = report_cache.get(username, persona_data, user_data)
+    filepath, save_error = None, None
+    try:
+        if is_new_version:
+            file_handler.save_report(report, 'json')
+        filepath = file_handler.save_report(report, 'txt')
+    except Exception as e:
+        # The persona is still worth showing if the report can't be written
+        logger.error(f"❌ Error saving report: {e}")
+        save_error = str(e)
+
+    job.update(100, "✅ Complete!")
+    return {
+        'username': username,
+        'user_data': user_data,
+        'persona': persona_data,
+        'filepath': filepath,
+        'save_error': save_error
+    }
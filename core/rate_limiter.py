@@ -0,0 +1,72 @@
+import time
+import threading
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` tokens per second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._slow_rate = None  # server-imposed rate until _slow_until
+        self._slow_until = 0.0
+        self._lock = threading.Lock()
+
+    def _rate(self, now: float) -> float:
+        if self._slow_rate is not None and now < self._slow_until:
+            return min(self.rate, self._slow_rate)
+        return self.rate
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self._rate(now))
+        self._updated = max(self._updated, now)
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Consume `tokens` if available and return 0, else return the seconds to wait"""
+        tokens = min(tokens, self.burst)
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self._rate(now)
+
+    def acquire(self, tokens: float = 1):
+        """Block until `tokens` are available, then consume them"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def adjust(self, tokens: float):
+        """Charge (positive) or refund (negative) tokens after the fact, e.g. actual vs estimated usage"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.burst, self._tokens - tokens)
+
+    def slow_down(self, remaining: float, seconds: float):
+        """Spread the `remaining` quota the server reports over the `seconds` until it resets.
+
+        Until then tokens refill at no more than remaining / seconds, and the
+        bucket never holds more than `remaining`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._slow_rate = max(remaining, 0.0) / seconds
+            self._slow_until = now + seconds
+            self._tokens = min(self._tokens, remaining)
+
+    def pause(self, seconds: float):
+        """Hand out nothing for `seconds` (server asked us to back off) and drain the bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
@@ -38,73 +38,224 @@
 #         print(f"Error fetching Reddit data: {e}")
 #         return {'posts': [], 'comments': []} 
 
-import praw
 import re
 from typing import Dict, List, Optional
 from core.config import config
+from core.scheduler import scheduler
+from core.clients import get_reddit, reddit_pool
+from core.metrics import span, in_context
+from core.data_sources import DataSource
 from datetime import datetime
 
-class RedditScraper:
-    def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=config.REDDIT_CLIENT_ID,
-            client_secret=config.REDDIT_CLIENT_SECRET,
-            user_agent=config.REDDIT_USER_AGENT
-        )
-    
-    def extract_username(self, url: str) -> Optional[str]:
-        patterns = [
-            r'reddit\.com/u/([^/\?]+)',
-            r'reddit\.com/user/([^/\?]+)'
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+# Reddit returns at most 100 items per listing request
+LISTING_PAGE_SIZE = 100
+
+class RedditScraper(DataSource):
+    def __init__(self, reddit=None):
+        # `reddit` lets callers supply a stand-in PRAW client; by default each thread uses its own
+        self._reddit = reddit
+
+    @property
+    def reddit(self):
+        """The PRAW client for the calling thread (PRAW is not thread-safe)"""
+        return self._reddit or get_reddit()
     
-    def get_user_data(self, username: str) -> Dict:
+    def get_user_data(self, username: str, previous: Optional[Dict] = None, *, max_posts: Optional[int] = None,
+                      max_comments: Optional[int] = None, concurrent: Optional[bool] = None) -> Dict:
+        """Scrape a user's info, posts and comments.
+
+        If `previous` (a raw snapshot from FileHandler.load_latest_user_data) is
+        given, listings are only paged until the newest stored item is reached and
+        the new items are merged into the stored history.
+
+        With `concurrent` (default: config.CONCURRENT_FETCH) the user info and the
+        two listings are fetched in parallel, all drawing from the shared
+        'reddit' scheduler resource. Either way the requests run on the
+        long-lived reddit_pool() threads, whose clients are already authenticated.
+
+        `max_posts`/`max_comments` default to config.MAX_POSTS/MAX_COMMENTS; pass
+        them when scrapes with different limits run at the same time.
+        """
+        concurrent = config.CONCURRENT_FETCH if concurrent is None else concurrent
+        max_posts = config.MAX_POSTS if max_posts is None else max_posts
+        max_comments = config.MAX_COMMENTS if max_comments is None else max_comments
         try:
-            user = self.reddit.redditor(username)
-            
-            # Get user info
-            user_info = {
+            with span('reddit.get_user_data', concurrent=concurrent, delta=bool(previous)):
+                return self._get_user_data(username, previous, concurrent, max_posts, max_comments)
+        except Exception as e:
+            raise Exception(f"Error scraping Reddit data: {str(e)}")
+
+    def _get_user_data(self, username: str, previous: Optional[Dict], concurrent: bool,
+                       max_posts: int, max_comments: int) -> Dict:
+        previous_posts, previous_comments = self._usable_history(previous, max_posts, max_comments)
+
+        # Each fetch looks the user up on its own thread's client, so no PRAW object crosses threads
+        pool = reddit_pool()
+        if concurrent:
+            user_info_future = pool.submit(in_context(self._fetch_user_info), username)
+            posts_future = pool.submit(in_context(self._fetch_posts), username, max_posts, previous_posts)
+            comments_future = pool.submit(in_context(self._fetch_comments), username, max_comments, previous_comments)
+            user_info = user_info_future.result()
+            new_posts = posts_future.result()
+            new_comments = comments_future.result()
+        else:
+            user_info, new_posts, new_comments = pool.submit(in_context(self._fetch_all), username, max_posts,
+                                                             max_comments, previous_posts, previous_comments).result()
+
+        posts = self._merge_history(new_posts, previous_posts, max_posts)
+        comments = self._merge_history(new_comments, previous_comments, max_comments)
+
+        # Items carried over from the stored history may have stale scores
+        kept = {id(item) for item in posts + comments}
+        pool.submit(in_context(self._refresh_scores),
+                    [item for item in previous_posts + previous_comments if id(item) in kept]).result()
+
+        return {
+            'user_info': user_info,
+            'posts': posts,
+            'comments': comments
+        }
+
+    def _usable_history(self, previous: Optional[Dict], max_posts: int, max_comments: int):
+        """Return the stored posts/comments that can seed a delta scrape.
+
+        A listing is only reused if the snapshot covered the current limit,
+        otherwise older items would be missing from the merged history.
+        """
+        if not previous:
+            return [], []
+        meta = previous.get('snapshot', {})
+        posts = previous.get('posts', [])
+        comments = previous.get('comments', [])
+        if not (len(posts) >= max_posts or meta.get('max_posts', 0) >= max_posts):
+            posts = []
+        if not (len(comments) >= max_comments or meta.get('max_comments', 0) >= max_comments):
+            comments = []
+        return posts, comments
+
+    def _fetch_all(self, username: str, max_posts: int, max_comments: int,
+                   previous_posts: List[Dict], previous_comments: List[Dict]):
+        return (self._fetch_user_info(username),
+                self._fetch_posts(username, max_posts, previous_posts),
+                self._fetch_comments(username, max_comments, previous_comments))
+
+    def _fetch_user_info(self, username: str) -> Dict:
+        user = self.reddit.redditor(username)
+        with span('reddit.user_info'):
+            # The first attribute access triggers the (lazy) profile request
+            created_utc = scheduler.call('reddit', lambda: user.created_utc)
+            return {
                 'username': username,
-                'created_utc': user.created_utc,
+                'created_utc': created_utc,
                 'comment_karma': user.comment_karma,
                 'link_karma': user.link_karma,
-                'account_age_days': (datetime.now().timestamp() - user.created_utc) / 86400
+                'account_age_days': (datetime.now().timestamp() - created_utc) / 86400
             }
-            
-            # Get posts
-            posts = []
-            for submission in user.submissions.new(limit=config.MAX_POSTS):
-                posts.append({
-                    'title': submission.title,
-                    'selftext': submission.selftext,
-                    'subreddit': str(submission.subreddit),
-                    'score': submission.score,
-                    'permalink': f"https://reddit.com{submission.permalink}",
-                    'created_utc': submission.created_utc
+
+    def _fetch_posts(self, username: str, limit: int, known: List[Dict]) -> List[Dict]:
+        user = self.reddit.redditor(username)
+        high_water, known_permalinks = self._high_water(known)
+        posts = []
+        for submission in _paced(user.submissions.new(limit=limit), 'submissions'):
+            permalink = f"https://reddit.com{submission.permalink}"
+            if submission.created_utc <= high_water or permalink in known_permalinks:
+                break
+            posts.append({
+                'title': submission.title,
+                'selftext': submission.selftext,
+                'subreddit': str(submission.subreddit),
+                'score': submission.score,
+                'permalink': permalink,
+                'created_utc': submission.created_utc
+            })
+        return posts
+
+    def _fetch_comments(self, username: str, limit: int, known: List[Dict]) -> List[Dict]:
+        user = self.reddit.redditor(username)
+        high_water, known_permalinks = self._high_water(known)
+        comments = []
+        for comment in _paced(user.comments.new(limit=limit), 'comments'):
+            permalink = f"https://reddit.com{comment.permalink}"
+            if comment.created_utc <= high_water or permalink in known_permalinks:
+                break
+            if hasattr(comment, 'body') and comment.body != '[deleted]':
+                comments.append({
+                    'body': comment.body,
+                    'subreddit': str(comment.subreddit),
+                    'score': comment.score,
+                    'permalink': permalink,
+                    'created_utc': comment.created_utc
                 })
-            
-            # Get comments
-            comments = []
-            for comment in user.comments.new(limit=config.MAX_COMMENTS):
-                if hasattr(comment, 'body') and comment.body != '[deleted]':
-                    comments.append({
-                        'body': comment.body,
-                        'subreddit': str(comment.subreddit),
-                        'score': comment.score,
-                        'permalink': f"https://reddit.com{comment.permalink}",
-                        'created_utc': comment.created_utc
-                    })
-            
-            return {
-                'user_info': user_info,
-                'posts': posts,
-                'comments': comments
-            }
-            
-        except Exception as e:
-            raise Exception(f"Error scraping Reddit data: {str(e)}")
\ No newline at end of file
+        return comments
+
+    @staticmethod
+    def _high_water(known: List[Dict]):
+        if not known:
+            return float('-inf'), set()
+        return max(item['created_utc'] for item in known), {item['permalink'] for item in known}
+
+    @staticmethod
+    def _merge_history(new_items: List[Dict], known: List[Dict], limit: int) -> List[Dict]:
+        """Prepend newly scraped items to the stored history, newest first"""
+        seen = {item['permalink'] for item in new_items}
+        merged = new_items + [item for item in known if item['permalink'] not in seen]
+        return merged[:limit]
+
+    def _refresh_scores(self, items: List[Dict]):
+        """Re-read scores of stored items that are still young enough to change.
+
+        Only items newer than SCORE_REFRESH_DAYS are looked up, in batches of
+        100 per request; older scores have settled and are kept as stored.
+        """
+        cutoff = datetime.now().timestamp() - config.SCORE_REFRESH_DAYS * 86400
+        by_fullname = {}
+        for item in items:
+            if item['created_utc'] < cutoff:
+                continue
+            fullname = fullname_from_permalink(item['permalink'], is_comment='body' in item)
+            if fullname:
+                by_fullname[fullname] = item
+        if not by_fullname:
+            return
+
+        try:
+            for thing in _paced(self.reddit.info(fullnames=list(by_fullname)), 'info'):
+                item = by_fullname.get(thing.fullname)
+                if item is not None:
+                    item['score'] = thing.score
+        except Exception:
+            # Stale scores are acceptable; the new items are what matter
+            pass
+
+def _paced(listing, name: str):
+    """Yield from a PRAW listing, admitting each page request through the scheduler.
+
+    The first item of each page is what triggers the HTTP request, so that
+    fetch is timed as a `reddit.listing_page` span and retried on throttling
+    (PRAW's listing generator re-requests the same page after a failed fetch).
+    """
+    iterator = iter(listing)
+    index = 0
+    while True:
+        if index % LISTING_PAGE_SIZE == 0:
+            try:
+                with span('reddit.listing_page', listing=name, page=index // LISTING_PAGE_SIZE):
+                    item = scheduler.call('reddit', next, iterator)
+            except StopIteration:
+                return
+        else:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        index += 1
+        yield item
+
+def fullname_from_permalink(permalink: str, is_comment: bool) -> Optional[str]:
+    """Derive a Reddit fullname (t3_/t1_ id) from a stored permalink"""
+    match = re.search(r'/comments/([a-z0-9]+)/[^/]*/?([a-z0-9]+)?', permalink)
+    if not match:
+        return None
+    if is_comment:
+        return f"t1_{match.group(2)}" if match.group(2) else None
+    return f"t3_{match.group(1)}"
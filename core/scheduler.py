@@ -0,0 +1,211 @@
+import re
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence, Union
+from core.config import config
+from core.rate_limiter import RateLimiter
+from core.metrics import metrics, span
+
+logger = logging.getLogger(__name__)
+
+# Request priorities: lower runs first
+INTERACTIVE = 0
+BATCH = 1
+
+_priority = contextvars.ContextVar('request_priority', default=INTERACTIVE)
+
+@contextmanager
+def priority(level: int):
+    """Run the enclosed calls at `level` (INTERACTIVE or BATCH)"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+# Quota headers per resource: (remaining, reset). Groq reports requests and tokens separately.
+QUOTA_HEADERS = {
+    'reddit': ('x-ratelimit-remaining', 'x-ratelimit-reset'),
+    'groq_requests': ('x-ratelimit-remaining-requests', 'x-ratelimit-reset-requests'),
+    'groq_tokens': ('x-ratelimit-remaining-tokens', 'x-ratelimit-reset-tokens')
+}
+SLOWDOWN_HORIZON = 60  # seconds; a quota that wouldn't last this long at our own rate is spread out
+
+class RateLimitExceeded(Exception):
+    pass
+
+def _header_seconds(value: str) -> Optional[float]:
+    """Parse rate-limit header durations: '12', '1.5', '7.66s', '2m59.56s', '250ms'"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, matched = 0.0, False
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        matched = True
+        total += float(amount) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit]
+    return total if matched else None
+
+def _status_and_headers(error: Exception):
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None) \
+        or getattr(response, 'status', None)
+    headers = getattr(response, 'headers', None) or {}
+    return status, headers
+
+def is_rate_limited(error: Exception) -> bool:
+    status, _ = _status_and_headers(error)
+    return status == 429 or type(error).__name__ in ('RateLimitError', 'TooManyRequests')
+
+def is_retryable(error: Exception) -> bool:
+    if is_rate_limited(error):
+        return True
+    status, _ = _status_and_headers(error)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError', 'ServerError',
+                                    'RequestException', 'ConnectionError', 'Timeout')
+
+class _Resource:
+    """A token bucket plus a priority queue of waiting callers"""
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.bucket = RateLimiter(rate, burst)
+        self.waiting = []
+        self.condition = threading.Condition()
+
+class Scheduler:
+    """Process-wide admission control for Reddit and Groq calls.
+
+    Each resource is a token bucket; callers queue by priority (interactive
+    before batch, then FIFO). When a call is throttled, the server's
+    Retry-After / x-ratelimit-reset headers pause the whole resource for every
+    caller, and the call is retried with jittered exponential backoff.
+    """
+
+    def __init__(self):
+        self._resources = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def configure(self, name: str, per_minute: float, burst: float = None):
+        burst = burst if burst is not None else max(1, per_minute / 6)
+        with self._lock:
+            self._resources[name] = _Resource(name, per_minute / 60, burst)
+
+    def resource(self, name: str) -> _Resource:
+        return self._resources[name]
+
+    def acquire(self, name: str, tokens: float = 1, level: int = None):
+        """Block until `tokens` of resource `name` are granted, honouring priority order"""
+        resource = self._resources[name]
+        level = _priority.get() if level is None else level
+        ticket = (level, next(self._sequence))
+        label = 'interactive' if level == INTERACTIVE else 'batch'
+        with span('scheduler.wait', resource=name, priority=label), resource.condition:
+            heapq.heappush(resource.waiting, ticket)
+            try:
+                while True:
+                    if resource.waiting[0] == ticket:
+                        wait = resource.bucket.try_acquire(tokens)
+                        if wait <= 0:
+                            return
+                    else:
+                        wait = 0.05
+                    resource.condition.wait(timeout=min(wait, 1.0))
+            finally:
+                resource.waiting.remove(ticket)
+                heapq.heapify(resource.waiting)
+                resource.condition.notify_all()
+
+    def adjust(self, name: str, tokens: float):
+        self._resources[name].bucket.adjust(tokens)
+
+    def observe_headers(self, name: str, headers) -> Optional[float]:
+        """Adapt resource `name` to the quota reported in response headers; returns any pause.
+
+        Called for every response, not only throttled ones. A used-up quota
+        (or Retry-After) pauses the resource until the reset. A quota that
+        would run out within SLOWDOWN_HORIZON at our own rate, before it
+        resets, slows the bucket down to spread what is left over the time
+        to the reset, so we slow down before the server has to answer 429.
+        Long windows such as Groq's daily request quota only matter once
+        they are nearly used up.
+        """
+        if not headers or name not in self._resources:
+            return None
+        get = lambda key: headers.get(key) if hasattr(headers, 'get') else None
+        bucket = self._resources[name].bucket
+        remaining_key, reset_key = QUOTA_HEADERS.get(name, QUOTA_HEADERS['reddit'])
+        try:
+            remaining = float(get(remaining_key)) if get(remaining_key) is not None else None
+        except ValueError:
+            remaining = None
+        reset = _header_seconds(get(reset_key))
+
+        pause = _header_seconds(get('retry-after'))
+        if pause is None and remaining is not None and remaining < 1:
+            pause = reset
+        if pause:
+            logger.warning(f"⏳ {name} rate limit reached, pausing for {pause:.1f}s")
+            bucket.pause(pause)
+            metrics.inc('scheduler_pauses_total', resource=name)
+        elif remaining is not None and reset and remaining < bucket.rate * min(reset, SLOWDOWN_HORIZON):
+            bucket.slow_down(remaining, reset)
+            metrics.inc('scheduler_slowdowns_total', resource=name)
+        return pause
+
+    def response_hook(self, *names: str):
+        """An HTTP client response hook feeding every response's headers to `names`"""
+        def hook(response, *args, **kwargs):
+            for name in names:
+                self.observe_headers(name, response.headers)
+        return hook
+
+    def call(self, resources: Union[str, Sequence[str]], fn: Callable, *args, tokens: Dict[str, float] = None,
+             max_retries: int = None, **kwargs):
+        """Run `fn` once admitted by every resource, retrying throttled or transient failures.
+
+        `tokens` maps resource name to the amount to take (default 1 each).
+        """
+        names = [resources] if isinstance(resources, str) else list(resources)
+        tokens = tokens or {}
+        max_retries = config.SCHEDULER_MAX_RETRIES if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            for name in names:
+                self.acquire(name, tokens.get(name, 1))
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == max_retries:
+                    if is_rate_limited(e):
+                        metrics.inc('scheduler_rate_limited_total', resource=names[0])
+                        raise RateLimitExceeded(f"{names[0]} rate limit exceeded after {attempt + 1} attempts: {e}")
+                    raise
+                _, headers = _status_and_headers(e)
+                paused = None
+                if is_rate_limited(e):
+                    metrics.inc('scheduler_throttled_total', resource=names[0])
+                    for name in names:
+                        paused = self.observe_headers(name, headers) or paused
+                # Any server-requested pause is enforced by acquire(); backoff adds jitter on top
+                backoff = config.SCHEDULER_BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"Retrying {names[0]} call in {backoff + (paused or 0):.1f}s "
+                               f"(attempt {attempt + 1}): {e}")
+                metrics.inc('scheduler_retries_total', resource=names[0])
+                time.sleep(backoff)
+
+scheduler = Scheduler()
+scheduler.configure('reddit', config.REDDIT_REQUESTS_PER_MINUTE, config.REDDIT_REQUEST_BURST)
+scheduler.configure('groq_requests', config.GROQ_REQUESTS_PER_MINUTE)
+scheduler.configure('groq_tokens', config.GROQ_TOKENS_PER_MINUTE, config.GROQ_TOKENS_PER_MINUTE)
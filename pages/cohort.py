@@ -0,0 +1,85 @@
+import streamlit as st
+from core.config import config
+from core.cohort import load_cohort, cluster_users, describe_clusters, neighbor_table
+from utils.file_handler import FileHandler
+
+st.set_page_config(
+    page_title="Cohort - Reddit Persona Analyzer",
+    page_icon="👥",
+    layout="wide"
+)
+
+COHORT_TTL = 600  # seconds before newly analyzed users are picked up
+
+@st.cache_resource(ttl=COHORT_TTL)
+def get_cohort():
+    """Matrices over every stored history and saved persona, shared by all sessions"""
+    return load_cohort(FileHandler(config.PERSONA_DIR))
+
+@st.cache_data(ttl=COHORT_TTL)
+def get_clusters(n_clusters: int, weight: float):
+    labels, fit = cluster_users(get_cohort(), n_clusters, weight)
+    return labels, describe_clusters(get_cohort(), labels)
+
+def main():
+    st.title("👥 Cohort Analysis")
+    st.markdown("Compare every analyzed user by subreddit overlap and persona traits.")
+
+    cohort = get_cohort()
+    if len(cohort) < 2:
+        st.info("Analyze at least two users to compare them.")
+        return
+
+    weight = st.sidebar.slider("Subreddit overlap vs. persona traits", 0.0, 1.0, config.COHORT_SUBREDDIT_WEIGHT, 0.1,
+                               help="1.0 compares only where users post, 0.0 only their persona scores")
+    n_clusters = st.sidebar.number_input("Clusters", 2, max(2, min(50, len(cohort))),
+                                         min(config.COHORT_CLUSTERS, len(cohort)))
+    if st.sidebar.button("🔄 Reload users"):
+        get_cohort.clear()
+        get_clusters.clear()
+        st.rerun()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Users", len(cohort))
+    with col2:
+        st.metric("Subreddits", len(cohort.subreddits))
+    with col3:
+        st.metric("Traits", len(cohort.traits))
+
+    labels, clusters = get_clusters(int(n_clusters), weight)
+    st.header("Clusters")
+    st.dataframe([
+        {
+            'Cluster': cluster['cluster'],
+            'Users': cluster['size'],
+            'Top subreddits': ', '.join(f"r/{s['name']} ({s['share']:.0%})" for s in cluster['top_subreddits']),
+            'Top traits': ', '.join(f"{t['name']} ({t['mean']:.2f})" for t in cluster['top_traits']),
+            'Examples': ', '.join(cluster['members'][:3])
+        }
+        for cluster in clusters
+    ], use_container_width=True, hide_index=True)
+
+    st.header("Similar Users")
+    username = st.selectbox("User", sorted(cohort.users))
+    if len(cohort) <= 2:
+        # The only other user is the only neighbour; a slider needs a range to pick from
+        k = 1
+    else:
+        k = st.slider("Neighbours", 1, min(50, len(cohort) - 1), min(config.COHORT_NEIGHBORS, len(cohort) - 1))
+    neighbors = neighbor_table(cohort, username, k, weight)
+    st.caption(f"u/{username} is in cluster {labels[cohort.index[username]]}")
+    if neighbors:
+        st.dataframe([
+            {
+                'User': f"u/{entry['username']}",
+                'Similarity': entry['similarity'],
+                'Cluster': int(labels[cohort.index[entry['username']]]),
+                'Shared subreddits': ', '.join(f"r/{s}" for s in entry['shared_subreddits'])
+            }
+            for entry in neighbors
+        ], use_container_width=True, hide_index=True)
+    else:
+        st.info("No similar users found.")
+
+main()
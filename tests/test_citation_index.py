@@ -0,0 +1,19 @@
+from core.citation_index import CitationIndex, ground_citations
+
+def comment(index, body, subreddit='test'):
+    return {'body': body, 'subreddit': subreddit, 'score': 1, 'permalink': f"https://reddit.com/c/{index}",
+            'created_utc': 1700000000 + index}
+
+def test_non_latin_citation_is_grounded():
+    comments = [
+        comment(0, "I rode my bike along the coast all weekend"),
+        comment(1, "По выходным я чиню старые велосипеды и катаюсь вдоль побережья", 'russia'),
+        comment(2, "Τα Σαββατοκύριακα επισκευάζω παλιά ποδήλατα στην παραλία", 'greece'),
+    ]
+    index = CitationIndex({'posts': [], 'comments': comments})
+    persona = {'citations': ['"я чиню старые велосипеды" (r/russia)', 'Τα Σαββατοκύριακα επισκευάζω ποδήλατα']}
+    russian, greek = ground_citations(persona, index)
+    assert russian['permalink'] == "https://reddit.com/c/1"
+    assert russian['confidence'] == 1.0
+    assert greek['permalink'] == "https://reddit.com/c/2"
+    assert greek['verified']
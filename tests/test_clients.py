@@ -0,0 +1,47 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from core import clients, reddit_scraper
+from core.config import config
+from core.reddit_scraper import RedditScraper
+from benchmarks.fakes import FakeReddit, synthetic_user_data
+
+class Unthrottled:
+    """Admits every call at once; the shared Reddit quota isn't what these tests are about"""
+
+    def call(self, resources, fn, *args, tokens=None, max_retries=None, **kwargs):
+        return fn(*args, **kwargs)
+
+@pytest.fixture
+def built(monkeypatch):
+    """Threads a PRAW stand-in was built on, with a fresh 3-thread fetch pool"""
+    threads = []
+    users = {'someone': synthetic_user_data('someone', 30, 30)}
+
+    def build():
+        reddit = FakeReddit(users)
+        reddit.auth = SimpleNamespace(scopes=lambda: {'read'})
+        threads.append(threading.current_thread().name)
+        return reddit
+
+    monkeypatch.setattr(clients, '_build_reddit', build)
+    monkeypatch.setattr(config, 'REDDIT_FETCH_WORKERS', 3)
+    for module in (clients, reddit_scraper):
+        monkeypatch.setattr(module, 'scheduler', Unthrottled())
+    pool = clients._build_reddit_pool()
+    monkeypatch.setitem(clients._clients, 'reddit_pool', pool)
+    yield threads
+    pool.shutdown()
+
+def test_warm_up_authenticates_every_fetch_thread(built):
+    clients._warm_up_reddit()
+    assert len(built) == 3
+    assert len(set(built)) == 3 and all(name.startswith('reddit-fetch') for name in built)
+
+def test_scrapes_reuse_the_fetch_threads_clients(built):
+    clients._warm_up_reddit()
+    scraper = RedditScraper()
+    for concurrent in (True, False, True, True):
+        user_data = scraper.get_user_data('someone', max_posts=10, max_comments=10, concurrent=concurrent)
+        assert len(user_data['posts']) == 10 and len(user_data['comments']) == 10
+    assert len(built) == 3
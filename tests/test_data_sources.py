@@ -0,0 +1,33 @@
+import json
+import inspect
+import pytest
+from core.data_sources import DataSource, ArchiveDumpSource
+
+def test_data_source_is_abstract():
+    class Incomplete(DataSource):
+        pass
+
+    with pytest.raises(TypeError):
+        DataSource()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_options_are_keyword_only():
+    for source in (DataSource, ArchiveDumpSource):
+        parameters = inspect.signature(source.get_user_data).parameters
+        assert [name for name, p in parameters.items() if p.kind is p.KEYWORD_ONLY][:2] == ['max_posts', 'max_comments']
+
+def test_archive_dump_source(tmp_path):
+    dump = tmp_path / 'RC_2024-01.ndjson'
+    records = [{'author': 'Someone', 'body': f"comment {i}", 'subreddit': 'test', 'score': i, 'id': f"c{i}",
+                'link_id': 't3_abc', 'created_utc': 1700000000 + i} for i in range(5)]
+    records.append({'author': 'someone_else', 'body': "not ours", 'subreddit': 'test', 'score': 1, 'id': 'x',
+                    'link_id': 't3_abc', 'created_utc': 1700000000})
+    dump.write_text(''.join(json.dumps(record) + '\n' for record in records))
+
+    source = ArchiveDumpSource([str(dump)], workers=1)
+    user_data = source.get_user_data('someone', max_posts=10, max_comments=3)
+    assert user_data['user_info']['username'] == 'Someone'
+    assert [item['body'] for item in user_data['comments']] == ['comment 4', 'comment 3', 'comment 2']
+    with pytest.raises(TypeError):
+        source.get_user_data('someone', None, 10, 3)
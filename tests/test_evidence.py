@@ -0,0 +1,28 @@
+import random
+from core.evidence import chunk_history, item_cost
+
+def comment(index):
+    rng = random.Random(index)
+    body = ' '.join(rng.choice(['reddit', 'homelab', 'coffee', 'python', 'cycling', 'music']) for _ in range(rng.randint(5, 60)))
+    return {'body': body, 'subreddit': 'test', 'score': 1, 'permalink': f"https://reddit.com/c/{index}",
+            'created_utc': 1700000000 + index}
+
+def history(indices):
+    # newest first, like the scraper
+    return {'user_info': {'username': 'someone'}, 'posts': [], 'comments': [comment(i) for i in reversed(indices)]}
+
+def boundaries(chunks):
+    return [tuple(item['permalink'] for item in chunk['comments']) for chunk in chunks]
+
+def test_chunks_respect_token_budget():
+    chunks = chunk_history(history(range(300)), 400)
+    assert sum(len(chunk['comments']) for chunk in chunks) == 300
+    assert all(sum(item_cost(item) for item in chunk['comments']) <= 400 for chunk in chunks)
+
+def test_capped_history_keeps_middle_chunks():
+    # A capped history that lost its 40 oldest items and gained 40 new ones
+    before = boundaries(chunk_history(history(range(0, 1000)), 3000))
+    after = set(boundaries(chunk_history(history(range(40, 1040)), 3000)))
+    reanalyzed = [chunk for chunk in before[:-1] if chunk not in after and int(chunk[-1].rsplit('/', 1)[1]) >= 40]
+    # Greedy cuts would shift every boundary; here only the first chunk or two differ
+    assert sum(len(chunk) for chunk in reanalyzed) < 100
@@ -0,0 +1,43 @@
+from core.filtering import filter_history, shingle_batch, minhash_signatures, _permutations
+
+def comment(body, score=1, created_utc=1700000000):
+    return {'body': body, 'subreddit': 'test', 'score': score, 'permalink': f"https://reddit.com/{hash(body)}",
+            'created_utc': created_utc}
+
+def history(*comments):
+    return {'user_info': {'username': 'someone'}, 'posts': [], 'comments': list(comments)}
+
+ENGLISH = comment("I have been running my own homelab for years and still enjoy tinkering with it", score=5)
+CYRILLIC = comment("Я давно занимаюсь домашним сервером и до сих пор люблю с ним возиться", score=1)
+OTHER_CYRILLIC = comment("Вчера наконец собрал новый компьютер для игр и работы с видео", score=2)
+EMOJI = comment("😀 😂 🎉 🔥 👍", score=1)
+OTHER_EMOJI = comment("🐍 🐧 🦀 🚀 💾", score=0)
+
+def test_non_latin_comment_last_does_not_crash():
+    filtered, stats = filter_history(history(ENGLISH, CYRILLIC), near_duplicates=True)
+    assert filtered['comments'] == [ENGLISH, CYRILLIC]
+    assert stats['near_duplicates'] == 0
+
+def test_distinct_non_latin_comments_are_not_duplicates():
+    filtered, stats = filter_history(history(ENGLISH, CYRILLIC, OTHER_CYRILLIC), near_duplicates=True)
+    assert len(filtered['comments']) == 3
+    assert stats['near_duplicates'] == 0
+
+def test_non_latin_near_duplicates_are_collapsed():
+    repeat = comment(CYRILLIC['body'] + "!", score=0)
+    filtered, stats = filter_history(history(ENGLISH, CYRILLIC, repeat), near_duplicates=True)
+    assert filtered['comments'] == [ENGLISH, CYRILLIC]
+    assert stats['near_duplicates'] == 1
+
+def test_emoji_only_comments_are_kept():
+    filtered, stats = filter_history(history(EMOJI, OTHER_EMOJI, ENGLISH), near_duplicates=True)
+    assert len(filtered['comments']) == 3
+    assert stats['near_duplicates'] == 0
+
+def test_shingle_counts_match_shingles():
+    texts = ["one two three four", "🎉", "два слова", ""]
+    shingles, counts = shingle_batch(texts)
+    assert len(shingles) == sum(counts)
+    assert counts == [2, 1, 1, 1]
+    a, b = _permutations(16)
+    assert minhash_signatures(shingles, counts, a, b).shape == (4, 16)
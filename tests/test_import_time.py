@@ -0,0 +1,13 @@
+import pytest
+from benchmarks.import_time import DEFAULT_MODULES, budget_for, check_module
+
+# Third-party packages a module cannot be imported without
+REQUIRES = {'app': 'streamlit'}
+
+@pytest.mark.parametrize('module', DEFAULT_MODULES)
+def test_import_time_budget(module):
+    if module in REQUIRES:
+        pytest.importorskip(REQUIRES[module])
+    report = check_module(module, budget_for(module), repeat=3)
+    assert not report['eager_imports'], f"{module} imports {', '.join(report['eager_imports'])} eagerly"
+    assert not report['over_budget'], f"{module} took {report['total_ms']} ms (budget {budget_for(module):.0f} ms)"
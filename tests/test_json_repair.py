@@ -0,0 +1,53 @@
+import pytest
+from core.json_repair import parse_json, validate_persona, _coerce_score, JSONRepairError
+
+def test_apostrophes_in_single_quoted_strings():
+    assert parse_json("{'quote': 'it's fine, I'm told', 'name': 'Sam'}") == {'quote': "it's fine, I'm told", 'name': 'Sam'}
+
+def test_markdown_fences_and_prose():
+    text = 'Here is the persona:\n```json\n{"name": "Sam", "goals": ["ride"]}\n```\nHope this helps!'
+    assert parse_json(text) == {'name': 'Sam', 'goals': ['ride']}
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"name": "Sam", "goals": ["ride", "bui', {'name': 'Sam', 'goals': ['ride', 'bui']}),
+    ('{"name": "Sam", "quote": ', {'name': 'Sam'}),
+    ('{"name": "Sam", "personality": {"openness": 0.', {'name': 'Sam', 'personality': {}}),
+    ('{"name": "Sam", "personality": {"openness": 0.8', {'name': 'Sam', 'personality': {'openness': 0.8}}),
+])
+def test_truncated_output(text, expected):
+    assert parse_json(text) == expected
+
+def test_trailing_commas_and_comments():
+    text = '{"goals": ["ride", "build",], // the rest\n "name": "Sam", /* done */}'
+    assert parse_json(text) == {'goals': ['ride', 'build'], 'name': 'Sam'}
+
+def test_python_literals_and_unquoted_keys():
+    assert parse_json("{name: 'Sam', active: True, age: None, bot: False}") == \
+        {'name': 'Sam', 'active': True, 'age': None, 'bot': False}
+
+@pytest.mark.parametrize('text, expected', [
+    ('{"quote": "I said "no", then left", "name": "Sam"}', {'quote': 'I said "no", then left', 'name': 'Sam'}),
+    ('{"quote": "the "best" bike", "name": "Sam"}', {'quote': 'the "best" bike', 'name': 'Sam'}),
+    ('{"goals": ["finish "the", race", "rest"]}', {'goals': ['finish "the", race', 'rest']}),
+    ('{"quote": "said "hi", name: "Sam"}', {'quote': 'said "hi', 'name': 'Sam'}),
+])
+def test_unescaped_inner_quotes(text, expected):
+    assert parse_json(text) == expected
+
+def test_no_object():
+    with pytest.raises(JSONRepairError):
+        parse_json("Sorry, I can't help with that.")
+
+@pytest.mark.parametrize('value, expected', [
+    (0.7, 0.7), (1, 1.0), (0, 0.0), ('0.35', 0.35),
+    (7, 0.7), ('8', 0.8), (10, 1.0),
+    (85, 0.85), ('85%', 0.85), ('5%', 0.05), (100, 1.0),
+    (250, 1.0), (-3, 0.0),
+])
+def test_score_scales(value, expected):
+    assert _coerce_score(value) == pytest.approx(expected)
+
+def test_validate_persona_coerces_scores():
+    persona, issues = validate_persona({'name': 'Sam', 'personality': {'openness': 8, 'grit': '90%', 'calm': 'high'}})
+    assert persona['personality'] == {'openness': 0.8, 'grit': 0.9}
+    assert "'personality.calm' is not a score" in issues
@@ -0,0 +1,57 @@
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+from core.config import config
+from core.llm_utils import PersonaAnalyzer
+
+class StallingStream:
+    """Sends the start of a persona, then stalls until closed, like a response whose server went quiet"""
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content='{"name": "Someone", '))])
+        self.closed.wait(10)
+        raise ConnectionError("read on a closed response")
+
+    def close(self):
+        self.closed.set()
+
+class FakeGroq:
+    def __init__(self, stream, response_delay=0.0):
+        def create(**params):
+            time.sleep(response_delay)  # time to the response headers, after the request was sent
+            return stream
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+def history():
+    comment = {'body': "I spend my weekends fixing up old bikes and riding them along the coast", 'subreddit': 'bicycling',
+               'score': 12, 'permalink': f"https://reddit.com/c/{time.time_ns()}", 'created_utc': 1700000000}
+    return {'user_info': {'username': 'someone', 'created_utc': 1600000000, 'comment_karma': 1, 'link_karma': 1,
+                          'account_age_days': 1000},
+            'posts': [], 'comments': [comment]}
+
+def test_stalled_stream_hits_deadline(monkeypatch):
+    monkeypatch.setattr(config, 'LLM_DEADLINE_SECONDS', 0.5)
+    monkeypatch.setattr(config, 'GROQ_FALLBACK_MODEL', '')
+    stream = StallingStream()
+    fields = []
+    started = time.perf_counter()
+    with pytest.raises(Exception, match="deadline"):
+        PersonaAnalyzer(FakeGroq(stream)).analyze_persona_stream(history(), lambda key, value: fields.append(key))
+    assert time.perf_counter() - started < 5
+    assert stream.closed.is_set()
+    assert fields == ['name']
+
+def test_stream_deadline_counts_time_before_the_response(monkeypatch):
+    monkeypatch.setattr(config, 'LLM_DEADLINE_SECONDS', 1.0)
+    monkeypatch.setattr(config, 'GROQ_FALLBACK_MODEL', '')
+    stream = StallingStream()
+    started = time.perf_counter()
+    with pytest.raises(Exception, match="deadline"):
+        PersonaAnalyzer(FakeGroq(stream, response_delay=0.7)).analyze_persona_stream(history(), lambda key, value: None)
+    # A fresh full-deadline timer after the response arrived would end at ~1.7s
+    assert time.perf_counter() - started < 1.4
+    assert stream.closed.is_set()
@@ -0,0 +1,48 @@
+import json
+import random
+import pytest
+from core import llm_utils
+from core.llm_utils import PersonaAnalyzer
+from core.persona_cache import PersonaCache
+from benchmarks.fakes import FakeGroq
+
+class Unthrottled:
+    """Admits every call at once; the Groq quotas aren't what these tests are about"""
+
+    def call(self, resources, fn, *args, tokens=None, max_retries=None, **kwargs):
+        return fn(*args, **kwargs)
+
+    def adjust(self, resource, tokens):
+        pass
+
+def comment(index):
+    rng = random.Random(index)
+    words = ['bikes', 'coast', 'coffee', 'python', 'homelab', 'music', 'weekend', 'repair', 'trail', 'camera']
+    return {'body': ' '.join(rng.choice(words) for _ in range(rng.randint(20, 60))), 'subreddit': rng.choice(words),
+            'score': rng.randint(0, 50), 'permalink': f"https://reddit.com/r/x/comments/a{index}/_/c{index}/",
+            'created_utc': 1700000000 + index * 3600}
+
+def scrape(account_age_days, karma, score_bump=0):
+    comments = [comment(i) for i in reversed(range(120))]
+    comments[0] = dict(comments[0], score=comments[0]['score'] + score_bump)
+    return {'user_info': {'username': 'someone', 'created_utc': 1600000000, 'comment_karma': karma, 'link_karma': 10,
+                          'account_age_days': account_age_days},
+            'posts': [], 'comments': comments}
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_utils, 'persona_cache', PersonaCache(cache_dir=str(tmp_path)))
+    monkeypatch.setattr(llm_utils, 'scheduler', Unthrottled())
+    return PersonaAnalyzer(FakeGroq())
+
+def test_rescrape_with_unchanged_chunks_makes_no_llm_calls(analyzer):
+    first = analyzer.analyze_persona_map_reduce(scrape(1000, 500), chunk_tokens=600)
+    calls = analyzer.client.calls
+    assert first['metadata']['chunks'] > 2 and calls == first['metadata']['chunks']
+
+    # A day later: the account is older, karma and a score moved, the items are the same
+    second = analyzer.analyze_persona_map_reduce(scrape(1001, 530, score_bump=5), chunk_tokens=600)
+    assert analyzer.client.calls == calls
+    assert second['metadata']['chunk_cache_hits'] == second['metadata']['chunks']
+    assert json.dumps({k: v for k, v in second.items() if k != 'metadata'}) == \
+        json.dumps({k: v for k, v in first.items() if k != 'metadata'})
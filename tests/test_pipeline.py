@@ -0,0 +1,70 @@
+import json
+from datetime import datetime
+import pytest
+import batch
+from core.citation_index import CitationIndex
+from core.config import config
+from core.jobs import Job
+from core.pipeline import run_analysis
+from utils.file_handler import FileHandler
+
+CACHED_AT = '2024-01-01T12:00:00'
+
+USER_DATA = {
+    'user_info': {'username': 'someone', 'created_utc': 1600000000, 'comment_karma': 1, 'link_karma': 1,
+                  'account_age_days': 1000},
+    'posts': [],
+    'comments': [{'body': "I fix up old bikes", 'subreddit': 'bicycling', 'score': 3,
+                  'permalink': 'https://reddit.com/c/1', 'created_utc': 1700000000}]
+}
+
+class Scraper:
+    def get_user_data(self, username, previous=None, *, max_posts=None, max_comments=None):
+        return json.loads(json.dumps(USER_DATA))
+
+class CachedAnalyzer:
+    """Answers every analysis from the persona cache: a fresh copy with the original run's metadata"""
+
+    def persona(self):
+        return {'name': 'Someone', 'username': 'someone', 'citations': [],
+                'metadata': {'is_json': True, 'timestamp': CACHED_AT, 'cache_hit': True, 'model_used': 'test'}}
+
+    def analyze_persona(self, user_data):
+        return self.persona()
+
+    def update_persona(self, prior, user_data):
+        return self.persona()
+
+@pytest.fixture
+def file_handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'json')
+    monkeypatch.setattr(config, 'STREAM_RESPONSES', False)
+    return FileHandler(str(tmp_path))
+
+def test_cache_hit_new_version_gets_its_own_timestamp(file_handler):
+    analyzer, scraper = CachedAnalyzer(), Scraper()
+    first = run_analysis(Job('a'), 'someone', 10, 10, False, scraper, analyzer, file_handler, incremental=True)
+    second = run_analysis(Job('b'), 'someone', 10, 10, False, scraper, analyzer, file_handler, incremental=True)
+    assert [first['persona']['metadata']['version'], second['persona']['metadata']['version']] == [1, 2]
+    for result in (first, second):
+        timestamp = result['persona']['metadata']['timestamp']
+        assert timestamp != CACHED_AT
+        assert abs((datetime.now() - datetime.fromisoformat(timestamp)).total_seconds()) < 60
+
+def test_versions_saved_in_the_same_second_are_kept_apart(file_handler):
+    analyzer, scraper = CachedAnalyzer(), Scraper()
+    for job_id in 'abc':
+        run_analysis(Job(job_id), 'someone', 10, 10, False, scraper, analyzer, file_handler, incremental=True)
+    versions = file_handler.list_persona_versions('someone')
+    assert len(versions) == 3
+    assert file_handler.load_latest_persona('someone')['metadata']['version'] == 3
+    assert file_handler.latest_personas()['someone']['metadata']['version'] == 3
+
+def test_batch_saves_each_run_as_the_next_version(file_handler, monkeypatch):
+    monkeypatch.setattr(batch, 'PersonaAnalyzer', CachedAnalyzer)
+    runner = batch.BatchRunner(output_dir=file_handler.output_dir, source=Scraper())
+    for _ in range(2):
+        user_data = runner.scrape('someone')
+        runner.analyze('someone', user_data, CitationIndex(user_data))
+    assert len(file_handler.list_persona_versions('someone')) == 2
+    assert file_handler.load_latest_persona('someone')['metadata']['version'] == 2
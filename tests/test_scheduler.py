@@ -0,0 +1,49 @@
+from core.rate_limiter import RateLimiter
+from core.scheduler import Scheduler
+
+def make_scheduler(per_minute=60, burst=10):
+    scheduler = Scheduler()
+    scheduler.configure('reddit', per_minute, burst)
+    return scheduler
+
+def test_healthy_quota_leaves_bucket_alone():
+    scheduler = make_scheduler()
+    assert scheduler.observe_headers('reddit', {'x-ratelimit-remaining': '500', 'x-ratelimit-reset': '300'}) is None
+    assert scheduler.resource('reddit').bucket.try_acquire() == 0
+
+def test_low_quota_slows_bucket_before_429():
+    scheduler = make_scheduler()
+    # 5 requests left for 50s: at 1/s we would run out long before the reset
+    scheduler.observe_headers('reddit', {'x-ratelimit-remaining': '5', 'x-ratelimit-reset': '50'})
+    bucket = scheduler.resource('reddit').bucket
+    for _ in range(5):
+        assert bucket.try_acquire() == 0
+    # Then one token per 10s instead of one per second
+    assert 9 < bucket.try_acquire() <= 10
+
+def test_used_up_quota_pauses_until_reset():
+    scheduler = make_scheduler()
+    pause = scheduler.observe_headers('reddit', {'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '42'})
+    assert pause == 42
+    assert 41 < scheduler.resource('reddit').bucket.try_acquire() <= 42
+
+def test_groq_headers_apply_per_resource():
+    scheduler = Scheduler()
+    scheduler.configure('groq_requests', 30)
+    scheduler.configure('groq_tokens', 6000, 6000)
+    hook = scheduler.response_hook('groq_requests', 'groq_tokens')
+    response = type('Response', (), {'headers': {
+        'x-ratelimit-remaining-requests': '14000', 'x-ratelimit-reset-requests': '2h10m',
+        'x-ratelimit-remaining-tokens': '0', 'x-ratelimit-reset-tokens': '7.5s'
+    }})()
+    hook(response)
+    assert scheduler.resource('groq_requests').bucket.try_acquire() == 0
+    assert 7 < scheduler.resource('groq_tokens').bucket.try_acquire() <= 7.5
+
+def test_slow_down_expires():
+    bucket = RateLimiter(rate=100, burst=1)
+    bucket.slow_down(remaining=0.5, seconds=0.01)
+    assert bucket.try_acquire() > 0
+    import time
+    time.sleep(0.03)
+    assert bucket.try_acquire() == 0
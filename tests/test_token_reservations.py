@@ -0,0 +1,77 @@
+import time
+from types import SimpleNamespace
+import pytest
+from benchmarks.fakes import FakeGroq, synthetic_user_data
+from core import llm_utils
+from core.config import config
+from core.llm_utils import PersonaAnalyzer
+from core.persona_cache import PersonaCache
+
+class Ledger:
+    """Admits every call at once and keeps the Groq token balance: what was reserved minus what was given back"""
+
+    def __init__(self):
+        self.reserved = 0
+        self.adjusted = 0
+
+    def call(self, resources, fn, *args, tokens=None, max_retries=None, **kwargs):
+        self.reserved += (tokens or {}).get('groq_tokens', 0)
+        return fn(*args, **kwargs)
+
+    def adjust(self, resource, tokens):
+        self.adjusted += tokens
+
+    @property
+    def charged(self):
+        return self.reserved + self.adjusted
+
+class SlowModel:
+    """A FakeGroq client whose `model` answers only after `delay` seconds"""
+
+    def __init__(self, model, delay):
+        self.fake = FakeGroq()
+        self.usage = []
+
+        def create(**params):
+            if params['model'] == model:
+                time.sleep(delay)
+            response = self.fake.chat.completions.create(**params)
+            self.usage.append(response.usage.total_tokens)
+            return response
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+class Failing:
+    def __init__(self):
+        def create(**params):
+            raise ValueError("bad request")
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+@pytest.fixture
+def ledger(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_utils, 'persona_cache', PersonaCache(cache_dir=str(tmp_path)))
+    ledger = Ledger()
+    monkeypatch.setattr(llm_utils, 'scheduler', ledger)
+    return ledger
+
+def test_failed_request_gives_its_reservation_back(ledger, monkeypatch):
+    monkeypatch.setattr(config, 'GROQ_FALLBACK_MODEL', '')
+    with pytest.raises(Exception, match="bad request"):
+        PersonaAnalyzer(Failing()).analyze_persona(synthetic_user_data('someone', 20, 20))
+    assert ledger.reserved > 0
+    assert ledger.charged == 0
+
+def test_hedge_loser_is_settled_on_its_usage(ledger, monkeypatch):
+    monkeypatch.setattr(config, 'HEDGE_REQUESTS', True)
+    monkeypatch.setattr(config, 'HEDGE_DELAY_SECONDS', 0.05)
+    monkeypatch.setattr(config, 'GROQ_FALLBACK_MODEL', 'fallback-model')
+    client = SlowModel(config.GROQ_MODEL, 0.3)
+    analyzer = PersonaAnalyzer(client)
+    persona = analyzer.analyze_persona(synthetic_user_data('someone', 20, 20))
+    assert persona['metadata']['model_used'] == 'fallback-model'
+    # The primary finishes after it lost; its result is discarded but its tokens were spent
+    deadline = time.monotonic() + 5
+    while len(client.usage) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert len(client.usage) == 2
+    assert ledger.charged == sum(client.usage)
@@ -1,58 +1,214 @@
 import os
+import re
 import json
+import time
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from core.config import config
+from core.metrics import traced
+from utils.history_store import HistoryStore
+from utils.report_renderer import PersonaReport, report_cache
+
+RAW_FILENAME_RE = re.compile(r'^(?P<username>.+)_raw_(?P<timestamp>\d{8}_\d{6})\.json$')
+PERSONA_FILENAME_RE = re.compile(r'^(?P<username>.+)_persona_(?P<timestamp>\d{8}_\d{6})(?:_v(?P<version>\d+))?\.json$')
+
+def persona_order(match: re.Match) -> Tuple[str, int]:
+    """Sort key of a persona filename match: by timestamp, then version within the same second"""
+    return match.group('timestamp'), int(match.group('version') or 0)
+
+def snapshot_covers(user_data: Dict, meta: Dict, max_posts: int, max_comments: int) -> bool:
+    """A snapshot covers a request if it holds enough items, or if it was
+    scraped with at least the requested limit (the user has fewer items)"""
+    posts_ok = len(user_data['posts']) >= max_posts or meta.get('max_posts', 0) >= max_posts
+    comments_ok = len(user_data['comments']) >= max_comments or meta.get('max_comments', 0) >= max_comments
+    return posts_ok and comments_ok
 
 class FileHandler:
     def __init__(self, output_dir: str = "./data/personas"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-    
-    def save_raw_user_data(self, username: str, user_data: Dict):
+        # Raw histories go to the deduplicated SQLite store unless the legacy JSON files are requested
+        self.history = None
+        if config.STORAGE_BACKEND == 'sqlite':
+            self.history = HistoryStore(config.HISTORY_DB_PATH or os.path.join(output_dir, 'history.db'))
+
+    @traced('file.save_raw')
+    def save_raw_user_data(self, username: str, user_data: Dict,
+                           max_posts: Optional[int] = None, max_comments: Optional[int] = None):
+        max_posts = max_posts if max_posts is not None else config.MAX_POSTS
+        max_comments = max_comments if max_comments is not None else config.MAX_COMMENTS
+        if self.history is not None:
+            self.history.save_snapshot(username, user_data, max_posts, max_comments)
+            self.history.evict_snapshots(username, keep=config.RAW_CACHE_KEEP)
+            return self.history.db_path
+
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{username}_raw_{timestamp}.json"
         filepath = os.path.join(self.output_dir, filename)
-        
+
+        # Record the limits the snapshot was scraped with so the cache can tell
+        # whether it covers a later request
+        snapshot = dict(user_data)
+        snapshot['snapshot'] = {
+            'fetched_at': time.time(),
+            'max_posts': max_posts,
+            'max_comments': max_comments
+        }
+
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(user_data, f, indent=2)
-        
+            json.dump(snapshot, f, indent=2)
+
+        self.evict_raw_snapshots(username, keep=config.RAW_CACHE_KEEP)
+
         return filepath
 
-    def save_persona(self, username: str, persona_data: Dict, user_data: Dict) -> str:
+    def list_raw_snapshots(self, username: str) -> List[Tuple[float, str]]:
+        """Return (fetched_at, filepath) for a user's raw snapshots, newest first"""
+        snapshots = []
+        for filename in os.listdir(self.output_dir):
+            match = RAW_FILENAME_RE.match(filename)
+            if not match or match.group('username') != username:
+                continue
+            fetched_at = datetime.strptime(match.group('timestamp'), '%Y%m%d_%H%M%S').timestamp()
+            snapshots.append((fetched_at, os.path.join(self.output_dir, filename)))
+        return sorted(snapshots, reverse=True)
+
+    def load_latest_user_data(self, username: str) -> Optional[Dict]:
+        """Return the newest raw snapshot regardless of age, including its 'snapshot' metadata"""
+        if self.history is not None:
+            user_data = self.history.load_latest(username)
+            if user_data is not None:
+                return user_data
+            # Nothing stored yet: fall back to JSON snapshots written before the switch
+        for fetched_at, filepath in self.list_raw_snapshots(username):
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    user_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            user_data.setdefault('snapshot', {}).setdefault('fetched_at', fetched_at)
+            return user_data
+        return None
+
+    def load_cached_user_data(self, username: str, max_posts: int, max_comments: int,
+                              ttl: Optional[int] = None) -> Optional[Dict]:
+        """Return the newest raw snapshot if it is fresh and covers the requested limits"""
+        ttl = config.RAW_CACHE_TTL if ttl is None else ttl
+        if ttl <= 0:
+            return None
+
+        user_data = self.load_latest_user_data(username)
+        if user_data is None:
+            return None
+
+        meta = user_data.pop('snapshot')
+        if time.time() - meta['fetched_at'] > ttl:
+            return None
+        if not snapshot_covers(user_data, meta, max_posts, max_comments):
+            return None
+
+        user_data['posts'] = user_data['posts'][:max_posts]
+        user_data['comments'] = user_data['comments'][:max_comments]
+        return user_data
+
+    def evict_raw_snapshots(self, username: str, keep: int = 1, ttl: Optional[int] = None) -> List[str]:
+        """Delete superseded snapshots beyond `keep` and, if given, those older than `ttl`"""
+        if self.history is not None:
+            return self.history.evict_snapshots(username, keep, ttl)
+        removed = []
+        now = time.time()
+        for index, (fetched_at, filepath) in enumerate(self.list_raw_snapshots(username)):
+            superseded = keep > 0 and index >= keep
+            stale = ttl is not None and index > 0 and now - fetched_at > ttl
+            if superseded or stale:
+                try:
+                    os.remove(filepath)
+                    removed.append(filepath)
+                except OSError:
+                    pass
+        return removed
+
+    @traced('file.save_persona_json')
+    def save_persona_json(self, username: str, persona_data: Dict) -> str:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{username}_persona_{timestamp}.txt"
+        filename = f"{username}_persona_{timestamp}.json"
         filepath = os.path.join(self.output_dir, filename)
-        
+
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"REDDIT USER PERSONA ANALYSIS\n")
-            f.write(f"=" * 50 + "\n\n")
-            f.write(f"Username: {username}\n")
-            f.write(f"Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Account Age: {user_data['user_info']['account_age_days']:.0f} days\n")
-            f.write(f"Total Karma: {user_data['user_info']['comment_karma'] + user_data['user_info']['link_karma']}\n")
-            f.write(f"Posts Analyzed: {len(user_data['posts'])}\n")
-            f.write(f"Comments Analyzed: {len(user_data['comments'])}\n\n")
-            
-            f.write("PERSONA ANALYSIS\n")
-            f.write("-" * 30 + "\n\n")
-            f.write(persona_data['analysis'])
-            
-            f.write("\n\n" + "=" * 50 + "\n")
-            f.write("DATA SOURCES\n")
-            f.write("=" * 50 + "\n\n")
-            
-            # Recent posts
-            f.write("RECENT POSTS:\n")
-            for i, post in enumerate(user_data['posts'][:5], 1):
-                f.write(f"{i}. {post['title']}\n")
-                f.write(f"   r/{post['subreddit']} | Score: {post['score']}\n")
-                f.write(f"   {post['permalink']}\n\n")
-            
-            # Recent comments
-            f.write("RECENT COMMENTS:\n")
-            for i, comment in enumerate(user_data['comments'][:5], 1):
-                f.write(f"{i}. r/{comment['subreddit']} | Score: {comment['score']}\n")
-                f.write(f"   {comment['body'][:150]}...\n")
-                f.write(f"   {comment['permalink']}\n\n")
-        
-        return filepath 
\ No newline at end of file
+            json.dump(persona_data, f, indent=2, ensure_ascii=False)
+
+        return filepath
+
+    def list_persona_versions(self, username: str) -> List[Tuple[float, str]]:
+        """Return (saved_at, filepath) for a user's saved persona JSON files, newest first"""
+        versions = []
+        for filename in os.listdir(self.output_dir):
+            match = PERSONA_FILENAME_RE.match(filename)
+            if not match or match.group('username') != username:
+                continue
+            saved_at = datetime.strptime(match.group('timestamp'), '%Y%m%d_%H%M%S').timestamp()
+            versions.append((persona_order(match), saved_at, os.path.join(self.output_dir, filename)))
+        return [(saved_at, filepath) for _, saved_at, filepath in sorted(versions, reverse=True)]
+
+    def load_latest_persona(self, username: str) -> Optional[Dict]:
+        """Return the newest saved JSON persona of a user, or None if there is none"""
+        for saved_at, filepath in self.list_persona_versions(username):
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    persona_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if persona_data.get('metadata', {}).get('is_json'):
+                return persona_data
+        return None
+
+    def latest_personas(self) -> Dict[str, Dict]:
+        """The newest saved JSON persona of every user, read in one directory scan"""
+        newest = {}
+        for filename in os.listdir(self.output_dir):
+            match = PERSONA_FILENAME_RE.match(filename)
+            if match and persona_order(match) > newest.get(match.group('username'), (('', 0),))[0]:
+                newest[match.group('username')] = (persona_order(match), filename)
+        personas = {}
+        for username, (_, filename) in newest.items():
+            try:
+                with open(os.path.join(self.output_dir, filename), 'r', encoding='utf-8') as f:
+                    persona_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if persona_data.get('metadata', {}).get('is_json'):
+                personas[username] = persona_data
+        return personas
+
+    def subreddit_counts(self) -> List[Tuple[str, str, int]]:
+        """Return (username, subreddit, items) over every user's stored raw history"""
+        if self.history is not None:
+            return self.history.subreddit_counts()
+        newest = {}
+        for filename in os.listdir(self.output_dir):
+            match = RAW_FILENAME_RE.match(filename)
+            if match and match.group('timestamp') > newest.get(match.group('username'), ('',))[0]:
+                newest[match.group('username')] = (match.group('timestamp'), filename)
+        rows = []
+        for username, (_, filename) in newest.items():
+            try:
+                with open(os.path.join(self.output_dir, filename), 'r', encoding='utf-8') as f:
+                    user_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            counts = {}
+            for item in user_data['posts'] + user_data['comments']:
+                counts[item['subreddit']] = counts.get(item['subreddit'], 0) + 1
+            rows += [(username, subreddit, count) for subreddit, count in counts.items()]
+        return rows
+
+    @traced('file.save_report')
+    def save_report(self, report: PersonaReport, fmt: str = 'txt') -> str:
+        """Write a rendered report; the bytes are the same object the download button gets"""
+        filepath = os.path.join(self.output_dir, report.filename(fmt))
+        with open(filepath, 'wb') as f:
+            f.write(report.render(fmt))
+        return filepath
+
+    def save_persona(self, username: str, persona_data: Dict, user_data: Dict, fmt: str = 'txt') -> str:
+        return self.save_report(report_cache.get(username, persona_data, user_data), fmt) 
\ No newline at end of file
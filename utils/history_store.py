@@ -0,0 +1,214 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    created_utc REAL,
+    comment_karma INTEGER,
+    link_karma INTEGER,
+    account_age_days REAL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('post', 'comment')),
+    permalink TEXT NOT NULL,
+    subreddit TEXT NOT NULL,
+    title TEXT,
+    body TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_utc REAL NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    UNIQUE (username, permalink)
+);
+CREATE INDEX IF NOT EXISTS items_by_user_created ON items (username, kind, created_utc DESC);
+
+-- One row when an item is first stored and one per observed score change
+CREATE TABLE IF NOT EXISTS item_versions (
+    item_id INTEGER NOT NULL REFERENCES items (id) ON DELETE CASCADE,
+    observed_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (item_id, observed_at)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS item_first_version AFTER INSERT ON items BEGIN
+    INSERT OR REPLACE INTO item_versions VALUES (new.id, new.last_seen, new.score);
+END;
+CREATE TRIGGER IF NOT EXISTS item_score_version AFTER UPDATE OF score ON items
+WHEN new.score != old.score BEGIN
+    INSERT OR REPLACE INTO item_versions VALUES (new.id, new.last_seen, new.score);
+END;
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    max_posts INTEGER,
+    max_comments INTEGER,
+    posts INTEGER NOT NULL,
+    comments INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_user_fetched ON snapshots (username, fetched_at DESC);
+"""
+
+UPSERT_ITEM = """
+INSERT INTO items (username, kind, permalink, subreddit, title, body, score, created_utc, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (username, permalink) DO UPDATE SET
+    title = excluded.title,
+    body = excluded.body,
+    score = excluded.score,
+    last_seen = excluded.last_seen
+"""
+
+class HistoryStore:
+    """Deduplicated SQLite store of scraped Reddit histories.
+
+    Every post/comment is stored once per (username, permalink); a re-scrape
+    only updates `last_seen` (and the score, which is versioned in
+    item_versions), so the database grows with new content only. A snapshot
+    row records each scrape, and the items seen by the newest one make up the
+    user's latest raw data.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def save_snapshot(self, username: str, user_data: Dict, max_posts: Optional[int] = None,
+                      max_comments: Optional[int] = None) -> int:
+        """Upsert a scraped history and record the scrape; returns the snapshot id"""
+        fetched_at = time.time()
+        info = user_data['user_info']
+        rows = [
+            (username, 'post', post['permalink'], post['subreddit'], post['title'], post['selftext'],
+             post['score'], post['created_utc'], fetched_at, fetched_at)
+            for post in user_data['posts']
+        ] + [
+            (username, 'comment', comment['permalink'], comment['subreddit'], None, comment['body'],
+             comment['score'], comment['created_utc'], fetched_at, fetched_at)
+            for comment in user_data['comments']
+        ]
+        with self._connection() as conn:
+            conn.execute(
+                """INSERT INTO users VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (username) DO UPDATE SET created_utc = excluded.created_utc,
+                       comment_karma = excluded.comment_karma, link_karma = excluded.link_karma,
+                       account_age_days = excluded.account_age_days, updated_at = excluded.updated_at""",
+                (username, info['created_utc'], info['comment_karma'], info['link_karma'],
+                 info['account_age_days'], fetched_at)
+            )
+            conn.executemany(UPSERT_ITEM, rows)
+            cursor = conn.execute(
+                "INSERT INTO snapshots (username, fetched_at, max_posts, max_comments, posts, comments) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (username, fetched_at, max_posts, max_comments, len(user_data['posts']), len(user_data['comments']))
+            )
+            return cursor.lastrowid
+
+    def list_snapshots(self, username: str) -> List[Tuple[float, int]]:
+        """Return (fetched_at, snapshot_id) for a user's recorded scrapes, newest first"""
+        rows = self._connection().execute(
+            "SELECT fetched_at, id FROM snapshots WHERE username = ? ORDER BY fetched_at DESC", (username,)
+        )
+        return [(fetched_at, snapshot_id) for fetched_at, snapshot_id in rows]
+
+    def load_latest(self, username: str) -> Optional[Dict]:
+        """Rebuild the newest snapshot in the raw user_data shape, with its 'snapshot' metadata"""
+        conn = self._connection()
+        snapshot = conn.execute(
+            "SELECT fetched_at, max_posts, max_comments FROM snapshots WHERE username = ? "
+            "ORDER BY fetched_at DESC LIMIT 1", (username,)
+        ).fetchone()
+        user = conn.execute(
+            "SELECT created_utc, comment_karma, link_karma, account_age_days FROM users WHERE username = ?",
+            (username,)
+        ).fetchone()
+        if snapshot is None or user is None:
+            return None
+        fetched_at, max_posts, max_comments = snapshot
+
+        posts = [
+            {'title': title, 'selftext': body, 'subreddit': subreddit, 'score': score,
+             'permalink': permalink, 'created_utc': created_utc}
+            for title, body, subreddit, score, permalink, created_utc in conn.execute(
+                "SELECT title, body, subreddit, score, permalink, created_utc FROM items "
+                "WHERE username = ? AND kind = 'post' AND last_seen >= ? ORDER BY created_utc DESC",
+                (username, fetched_at)
+            )
+        ]
+        comments = [
+            {'body': body, 'subreddit': subreddit, 'score': score, 'permalink': permalink,
+             'created_utc': created_utc}
+            for body, subreddit, score, permalink, created_utc in conn.execute(
+                "SELECT body, subreddit, score, permalink, created_utc FROM items "
+                "WHERE username = ? AND kind = 'comment' AND last_seen >= ? ORDER BY created_utc DESC",
+                (username, fetched_at)
+            )
+        ]
+        created_utc, comment_karma, link_karma, account_age_days = user
+        return {
+            'user_info': {
+                'username': username,
+                'created_utc': created_utc,
+                'comment_karma': comment_karma,
+                'link_karma': link_karma,
+                'account_age_days': account_age_days
+            },
+            'posts': posts,
+            'comments': comments,
+            'snapshot': {'fetched_at': fetched_at, 'max_posts': max_posts, 'max_comments': max_comments}
+        }
+
+    def evict_snapshots(self, username: str, keep: int = 1, ttl: Optional[int] = None) -> List[int]:
+        """Drop snapshot records beyond `keep` and, if given, those older than `ttl`.
+
+        Items are kept: they are the deduplicated history and cost nothing per snapshot.
+        """
+        removed = []
+        now = time.time()
+        for index, (fetched_at, snapshot_id) in enumerate(self.list_snapshots(username)):
+            superseded = keep > 0 and index >= keep
+            stale = ttl is not None and index > 0 and now - fetched_at > ttl
+            if superseded or stale:
+                removed.append(snapshot_id)
+        if removed:
+            with self._connection() as conn:
+                conn.executemany("DELETE FROM snapshots WHERE id = ?", [(snapshot_id,) for snapshot_id in removed])
+        return removed
+
+    def item_history(self, username: str, permalink: str) -> List[Tuple[float, int]]:
+        """Return (observed_at, score) for every recorded score of an item, oldest first"""
+        rows = self._connection().execute(
+            "SELECT v.observed_at, v.score FROM item_versions v JOIN items i ON i.id = v.item_id "
+            "WHERE i.username = ? AND i.permalink = ? ORDER BY v.observed_at", (username, permalink)
+        )
+        return list(rows)
+
+    def subreddit_counts(self) -> List[Tuple[str, str, int]]:
+        """Return (username, subreddit, items) over every stored history, for cohort analysis"""
+        rows = self._connection().execute(
+            "SELECT username, subreddit, COUNT(*) FROM items GROUP BY username, subreddit"
+        )
+        return list(rows)
@@ -1,10 +1,5 @@
 import streamlit as st
-import json
-import plotly.graph_objects as go
-import plotly.express as px
 from typing import Dict, Any
-import base64
-from io import BytesIO
 
 class PersonaRenderer:
     def __init__(self):
@@ -18,67 +13,134 @@ class PersonaRenderer:
     
     def render_lucas_style_persona(self, persona: Dict[str, Any]):
         """Render a persona card using only Streamlit-native components (no HTML)."""
-        name = persona.get('name', 'Unknown User')
-        username = persona.get('username', 'unknown')
+        card = self.create_progressive_card()
+        card.finish(persona)
+
+    def create_progressive_card(self) -> 'ProgressivePersonaCard':
+        """Lay out an empty persona card whose sections fill in as fields arrive."""
+        return ProgressivePersonaCard(self)
+
+    def render_header(self, name: str, username: str):
         st.header(f"{name}")
         st.caption(f"@{username}")
 
-        col1, col2, col3 = st.columns(3)
-        demo = persona.get('demographics', {})
-        with col1:
-            st.subheader("Demographics")
-            st.write(f"**Age:** {demo.get('age', 'Unknown')}")
-            st.write(f"**Occupation:** {demo.get('occupation', 'Unknown')}")
-            st.write(f"**Status:** {demo.get('status', 'Unknown')}")
-            st.write(f"**Location:** {demo.get('location', 'Unknown')}")
-            st.write(f"**Tier:** {demo.get('tier', 'Unknown')}")
-            st.write(f"**Archetype:** {demo.get('archetype', 'Unknown')}")
-
-            st.subheader("Personality")
-            personality = persona.get('personality', {})
-            if personality:
-                for trait, score in list(personality.items())[:4]:
-                    st.write(f"- {trait}: {score}")
-            else:
-                st.write("No personality traits available.")
-
-            st.subheader("Motivations")
-            motivations = persona.get('motivations', {})
-            if motivations:
-                for motivation, score in motivations.items():
-                    st.write(f"- {motivation}: {int(score*100)}%")
-            else:
-                st.write("No motivations available.")
+    def render_demographics(self, demo: Dict[str, Any]):
+        st.subheader("Demographics")
+        st.write(f"**Age:** {demo.get('age', 'Unknown')}")
+        st.write(f"**Occupation:** {demo.get('occupation', 'Unknown')}")
+        st.write(f"**Status:** {demo.get('status', 'Unknown')}")
+        st.write(f"**Location:** {demo.get('location', 'Unknown')}")
+        st.write(f"**Tier:** {demo.get('tier', 'Unknown')}")
+        st.write(f"**Archetype:** {demo.get('archetype', 'Unknown')}")
+
+    def render_personality(self, personality: Dict[str, float]):
+        st.subheader("Personality")
+        if personality:
+            for trait, score in list(personality.items())[:4]:
+                st.write(f"- {trait}: {score}")
+        else:
+            st.write("No personality traits available.")
+
+    def render_motivations(self, motivations: Dict[str, float]):
+        st.subheader("Motivations")
+        if motivations:
+            for motivation, score in motivations.items():
+                st.write(f"- {motivation}: {int(score*100)}%")
+        else:
+            st.write("No motivations available.")
+
+    def render_list(self, title: str, items: list, empty_label: str):
+        st.subheader(title)
+        if items:
+            for item in items:
+                st.write(f"- {item}")
+        else:
+            st.write(f"No {empty_label} available.")
+
+    def render_quote(self, quote: str):
+        st.subheader("Quote")
+        if quote:
+            st.info(f'"{quote}"')
+        else:
+            st.write("No quote available.")
+
+    def render_activity(self, activity: Dict[str, Any]):
+        if not activity.get('items'):
+            st.write("No activity available.")
+            return
+        import pandas as pd
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Items / week", activity['items_per_week'])
+        col2.metric("Active days", activity['active_days'])
+        col3.metric("Subreddits", activity['subreddit_count'],
+                    help=f"Entropy {activity['subreddit_entropy']} bits")
+        col4.metric("Median score", activity['score_percentiles']['p50'])
 
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption("Posting hour (UTC)")
+            st.bar_chart(pd.Series(activity['hour_histogram'], name='items'), color=self.colors['orange'])
         with col2:
-            st.subheader("Behaviour & Habits")
-            behaviors = persona.get('behaviors', [])
-            if behaviors:
-                for behavior in behaviors:
-                    st.write(f"- {behavior}")
-            else:
-                st.write("No behaviors available.")
-
-            st.subheader("Goals & Needs")
-            goals = persona.get('goals', [])
-            if goals:
-                for goal in goals:
-                    st.write(f"- {goal}")
-            else:
-                st.write("No goals available.")
+            st.caption("Weekday")
+            weekdays = activity['weekday_histogram']
+            st.bar_chart(pd.Series(list(weekdays.values()), index=list(weekdays), name='items'),
+                         color=self.colors['orange'])
+
+        bursts = activity['bursts']
+        st.write(f"**Bursts:** {bursts['count']} ({bursts['share_of_items']:.0%} of items)"
+                 + (f", largest {bursts['largest']} items on {bursts['largest_on']}" if bursts['count'] else ""))
+        if activity['post_comment_ratio'] is not None:
+            st.write(f"**Posts per comment:** {activity['post_comment_ratio']}")
+
+class ProgressivePersonaCard:
+    """A persona card laid out up front with one placeholder per section.
 
+    `update(key, value)` fills the section for a top-level persona field, so it
+    can be used as the `on_field` callback of PersonaAnalyzer.analyze_persona_stream.
+    """
+
+    def __init__(self, renderer: PersonaRenderer):
+        self.renderer = renderer
+        self.fields = {}
+        self.header = st.empty()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            demographics = st.empty()
+            personality = st.empty()
+            motivations = st.empty()
+        with col2:
+            behaviors = st.empty()
+            goals = st.empty()
         with col3:
-            st.subheader("Frustrations")
-            frustrations = persona.get('frustrations', [])
-            if frustrations:
-                for frustration in frustrations:
-                    st.write(f"- {frustration}")
-            else:
-                st.write("No frustrations available.")
-
-            st.subheader("Quote")
-            quote = persona.get('quote', None)
-            if quote:
-                st.info(f'"{quote}"')
-            else:
-                st.write("No quote available.")
\ No newline at end of file
+            frustrations = st.empty()
+            quote = st.empty()
+        self.sections = {
+            'demographics': (demographics, lambda v: renderer.render_demographics(v or {})),
+            'personality': (personality, lambda v: renderer.render_personality(v or {})),
+            'motivations': (motivations, lambda v: renderer.render_motivations(v or {})),
+            'behaviors': (behaviors, lambda v: renderer.render_list("Behaviour & Habits", v or [], "behaviors")),
+            'goals': (goals, lambda v: renderer.render_list("Goals & Needs", v or [], "goals")),
+            'frustrations': (frustrations, lambda v: renderer.render_list("Frustrations", v or [], "frustrations")),
+            'quote': (quote, lambda v: renderer.render_quote(v)),
+        }
+        self.header.caption("Generating persona...")
+
+    def update(self, key: str, value: Any):
+        self.fields[key] = value
+        if key in ('name', 'username'):
+            name = self.fields.get('name', 'Unknown User')
+            username = self.fields.get('username', 'unknown')
+            with self.header.container():
+                self.renderer.render_header(name, username)
+        elif key in self.sections:
+            placeholder, render = self.sections[key]
+            with placeholder.container():
+                render(value)
+
+    def finish(self, persona: Dict[str, Any]):
+        """Render the final persona, including empty states for missing fields."""
+        self.update('name', persona.get('name', 'Unknown User'))
+        self.update('username', persona.get('username', 'unknown'))
+        for key in self.sections:
+            self.update(key, persona.get(key))
@@ -0,0 +1,201 @@
+import html
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+from core.metrics import metrics, span
+from core.persona_update import describe_changes
+
+# format -> (MIME type, file extension)
+FORMATS = {
+    'txt': ('text/plain', 'txt'),
+    'md': ('text/markdown', 'md'),
+    'html': ('text/html', 'html'),
+    'json': ('application/json', 'json')
+}
+SAMPLE_ITEMS = 5  # recent posts/comments listed as data sources
+
+def _percent(value) -> str:
+    try:
+        return f"{float(value):.0%}"
+    except (TypeError, ValueError):
+        return str(value)
+
+def report_sections(persona: Dict, user_data: Dict) -> List[Tuple[str, str, object]]:
+    """The report content as (title, kind, content) sections, shared by every text format.
+
+    kind is 'fields' ([(label, value)]), 'text' (str) or 'items'
+    ([(text, url or None)]). Empty sections are left out.
+    """
+    info = user_data['user_info']
+    metadata = persona.get('metadata', {})
+    overview = [
+        ('Username', info['username']),
+        ('Analysis Date', metadata.get('timestamp', datetime.now().isoformat())[:19].replace('T', ' ')),
+        ('Model', metadata.get('model_used', 'Unknown')),
+        ('Account Age', f"{info['account_age_days']:.0f} days"),
+        ('Total Karma', f"{info['comment_karma'] + info['link_karma']:,}"),
+        ('Posts Analyzed', len(user_data['posts'])),
+        ('Comments Analyzed', len(user_data['comments']))
+    ]
+    if metadata.get('version'):
+        overview.append(('Version', metadata['version']))
+
+    sections = [('Overview', 'fields', overview)]
+    if not metadata.get('is_json'):
+        # Personas from the plain-text path only carry the model's prose
+        sections.append(('Persona Analysis', 'text', persona.get('analysis') or 'No analysis available'))
+    else:
+        sections.append(('Quote', 'text', persona.get('quote')))
+        sections.append(('Demographics', 'fields', [(key.replace('_', ' ').title(), value)
+                                                     for key, value in (persona.get('demographics') or {}).items()]))
+        for field in ('personality', 'motivations'):
+            scores = persona.get(field) or {}
+            sections.append((field.title(), 'fields', [(trait, _percent(score)) for trait, score in scores.items()]))
+        for field in ('behaviors', 'frustrations', 'goals', 'interests'):
+            sections.append((field.title(), 'items', [(entry, None) for entry in persona.get(field) or []]))
+        sections.append(('Confidence', 'fields', [(key.replace('_', ' ').title(), value)
+                                                   for key, value in (persona.get('confidence_level') or {}).items()]))
+
+        grounded = metadata.get('citations')
+        if grounded:
+            evidence = [(c['citation'], c['permalink'] if c['verified'] else None) for c in grounded]
+        else:
+            evidence = [(citation, None) for citation in persona.get('citations') or []]
+        sections.append(('Supporting Evidence', 'items', evidence))
+        if metadata.get('mode') == 'update':
+            sections.append((f"Changes Since {(metadata.get('based_on') or 'Last Version')[:10]}", 'items',
+                             [(line, None) for line in describe_changes(metadata.get('changes', {}))]))
+
+    sections.append(('Recent Posts', 'items', [
+        (f"{post['title']} (r/{post['subreddit']}, score {post['score']})", post['permalink'])
+        for post in user_data['posts'][:SAMPLE_ITEMS]
+    ]))
+    sections.append(('Recent Comments', 'items', [
+        (f"{comment['body'][:150]}... (r/{comment['subreddit']}, score {comment['score']})", comment['permalink'])
+        for comment in user_data['comments'][:SAMPLE_ITEMS]
+    ]))
+    return [section for section in sections if section[2]]
+
+def render_txt(title: str, sections: List) -> str:
+    out = [title.upper(), "=" * 50, ""]
+    for heading, kind, content in sections:
+        out += [heading.upper(), "-" * 30]
+        if kind == 'fields':
+            out += [f"{label}: {value}" for label, value in content]
+        elif kind == 'text':
+            out.append(content)
+        else:
+            for i, (text, url) in enumerate(content, 1):
+                out.append(f"{i}. {text}")
+                if url:
+                    out.append(f"   {url}")
+        out.append("")
+    return "\n".join(out)
+
+def render_md(title: str, sections: List) -> str:
+    out = [f"# {title}", ""]
+    for heading, kind, content in sections:
+        out += [f"## {heading}", ""]
+        if kind == 'fields':
+            out += [f"- **{label}:** {value}" for label, value in content]
+        elif kind == 'text':
+            out.append(f"> {content}" if heading == 'Quote' else content)
+        else:
+            out += [f"{i}. {text}" + (f" ([link]({url}))" if url else "") for i, (text, url) in enumerate(content, 1)]
+        out.append("")
+    return "\n".join(out)
+
+def render_html(title: str, sections: List) -> str:
+    e = html.escape
+    out = ["<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\">", f"<title>{e(title)}</title>", "</head><body>",
+           f"<h1>{e(title)}</h1>"]
+    for heading, kind, content in sections:
+        out.append(f"<h2>{e(heading)}</h2>")
+        if kind == 'fields':
+            out.append("<ul>" + "".join(f"<li><b>{e(str(label))}:</b> {e(str(value))}</li>"
+                                        for label, value in content) + "</ul>")
+        elif kind == 'text':
+            tag = 'blockquote' if heading == 'Quote' else 'p'
+            out.append(f"<{tag}>{e(content)}</{tag}>")
+        else:
+            out.append("<ol>" + "".join(
+                f"<li>{e(text)}" + (f" (<a href=\"{e(url)}\">link</a>)" if url else "") + "</li>"
+                for text, url in content
+            ) + "</ol>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+TEXT_RENDERERS = {'txt': render_txt, 'md': render_md, 'html': render_html}
+
+class PersonaReport:
+    """Downloadable reports of one persona version.
+
+    Each format is rendered on first request only, as one string joined in
+    memory and encoded once. The same bytes object then goes to the disk
+    writer and to the download button.
+    """
+
+    def __init__(self, username: str, persona: Dict, user_data: Dict):
+        self.username = username
+        self.persona = persona
+        self.user_data = user_data
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def render(self, fmt: str) -> bytes:
+        if fmt not in FORMATS:
+            raise Exception(f"Unknown report format: {fmt}")
+        with self._lock:
+            data = self._rendered.get(fmt)
+            if data is None:
+                with span('report.render', format=fmt) as attrs:
+                    if fmt == 'json':
+                        text = json.dumps(self.persona, indent=2, ensure_ascii=False)
+                    else:
+                        sections = report_sections(self.persona, self.user_data)
+                        text = TEXT_RENDERERS[fmt]("Reddit User Persona Analysis", sections)
+                    data = self._rendered[fmt] = text.encode('utf-8')
+                    attrs['bytes'] = len(data)
+                metrics.inc('reports_rendered_total', format=fmt)
+            return data
+
+    @staticmethod
+    def mime(fmt: str) -> str:
+        return FORMATS[fmt][0]
+
+    def filename(self, fmt: str) -> str:
+        metadata = self.persona.get('metadata', {})
+        timestamp = metadata.get('timestamp') or datetime.now().isoformat()
+        stamp = datetime.fromisoformat(timestamp).strftime('%Y%m%d_%H%M%S')
+        # The version keeps two versions saved within the same second (or with a reused timestamp) apart
+        version = f"_v{metadata['version']}" if metadata.get('version') else ''
+        return f"{self.username}_persona_{stamp}{version}.{FORMATS[fmt][1]}"
+
+class ReportCache:
+    """LRU of PersonaReports keyed by persona version, so reruns reuse rendered bytes"""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(username: str, persona: Dict) -> Tuple:
+        metadata = persona.get('metadata', {})
+        return username, metadata.get('timestamp'), metadata.get('version'), metadata.get('model_used')
+
+    def get(self, username: str, persona: Dict, user_data: Dict) -> PersonaReport:
+        key = self._key(username, persona)
+        with self._lock:
+            report = self._reports.get(key)
+            if report is not None:
+                self._reports.move_to_end(key)
+                return report
+            report = self._reports[key] = PersonaReport(username, persona, user_data)
+            while len(self._reports) > self.max_entries:
+                self._reports.popitem(last=False)
+            return report
+
+report_cache = ReportCache()